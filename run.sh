@@ -55,6 +55,16 @@ run_pipeline () {
     python3 src/pipeline/flows/run.py
 }
 
+run_benchmarks () {
+    # Benchmark pocket area methods and the pipeline on synthetic data
+    python3 src/benchmarks/run.py "$@"
+}
+
+convert_data () {
+    # Convert raw Kaggle CSV files to a partitioned Parquet dataset
+    python3 src/pipeline/flows/convert.py
+}
+
 # Run commands based on chosen shortcut and options
 
 # Install main project dependencies needed for immediate development
@@ -88,6 +98,14 @@ elif [ "$1" == "jupyter" ]; then
 elif [ "$1" == "pipeline" ]; then
     run_pipeline
 
+# Convert raw data to Parquet
+elif [ "$1" == "convert-data" ]; then
+    convert_data
+
+# Run benchmarks on synthetic data, with any extra options
+elif [ "$1" == "benchmark" ]; then
+    run_benchmarks "${@:2}"
+
 else
     echo "No run shortcut found for: '$1'"
 fi
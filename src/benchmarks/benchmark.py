@@ -0,0 +1,343 @@
+import functools
+import json
+import platform
+import time
+import tracemalloc
+from dataclasses import asdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.benchmarks.synthetic import SyntheticDataConfig, write_synthetic_data
+from src.metrics.pocket_area.all import (
+    POCKET_AREA_BATCH_METHODS,
+    POCKET_AREA_METHODS,
+)
+from src.metrics.pocket_area.batch import FrameBatch
+from src.pipeline.flows import main_no_prefect
+from src.pipeline.flows.profiling import RUN_REPORT_FILE
+from src.pipeline.tasks import (
+    augment_tracking_events,
+    calculate_pocket_area,
+    calculate_pocket_area_batch,
+    center_tracking_data,
+    clean_event_data,
+    get_passer_out_of_pocket,
+    get_pocket_eligibility,
+    is_failed_pocket,
+    normalize_tracking_data,
+    read_csv,
+    read_tracking_data,
+    transform_to_frame_batch,
+    transform_to_frames,
+    transform_to_records_per_frame,
+)
+from src.pipeline.tasks.constants import TRACKING_COLUMNS
+
+# Relative change in a metric, in the worse direction, that counts as a
+# regression against the baseline.
+DEFAULT_TOLERANCE = 0.2
+# Timings shorter than this are too noisy to compare against the baseline.
+DEFAULT_MIN_SECONDS = 0.1
+
+
+def time_function(fn: Callable, repeat: int) -> Tuple[float, Any]:
+    """
+    Runs the function repeatedly and returns the fastest wall time in seconds
+    and the output of the last run.
+    """
+    best_seconds = np.inf
+    output = None
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        output = fn()
+        best_seconds = min(best_seconds, time.perf_counter() - start)
+    return best_seconds, output
+
+
+def measure_peak_memory(fn: Callable) -> int:
+    """
+    Runs the function once and returns the peak memory allocated while it
+    runs, in bytes, as traced by tracemalloc.
+    """
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak_bytes
+
+
+def prepare_frames(inpath: str, weeks: int) -> Dict[str, Any]:
+    """
+    Runs the pipeline stages that prepare the frames for the pocket area
+    methods, and returns the frame records and the frame batch.
+    """
+    df_tracking_raw = read_tracking_data(
+        f"{inpath}/week", weeks, columns=TRACKING_COLUMNS
+    )
+    df_pff = read_csv(f"{inpath}/pffScoutingData.csv")
+
+    df_tracking_rotated = normalize_tracking_data(df_tracking_raw)
+    df_passer_out_of_pocket = get_passer_out_of_pocket(
+        df_tracking_rotated, df_pff, max_yards_from_snap=7
+    )
+    df_clean_events = clean_event_data(df_tracking_raw)
+    df_events = get_pocket_eligibility(df_clean_events, df_passer_out_of_pocket)
+    df_tracking_with_events = augment_tracking_events(
+        df_tracking_rotated, df_events
+    )
+    df_tracking = center_tracking_data(df_tracking_with_events)
+    df_frames = transform_to_frames(df_tracking, df_pff)
+    df_frame_keys, frame_batch = transform_to_frame_batch(df_frames)
+    return {
+        "df_frame_records": transform_to_records_per_frame(df_frames),
+        "df_frame_keys": df_frame_keys,
+        "frame_batch": frame_batch,
+    }
+
+
+def get_method_result(
+    engine: str,
+    method_name: str,
+    seconds: float,
+    peak_memory_bytes: int,
+    df_areas: pd.DataFrame,
+) -> Dict:
+    frames = len(df_areas)
+    return {
+        "engine": engine,
+        "method": method_name,
+        "frames": frames,
+        "failures": int(df_areas["pocket"].apply(is_failed_pocket).sum()),
+        "seconds": seconds,
+        "frames_per_second": frames / seconds if seconds > 0 else None,
+        "peak_memory_bytes": peak_memory_bytes,
+    }
+
+
+def benchmark_pocket_area_methods(
+    df_frame_records: pd.DataFrame,
+    methods: Dict[str, Callable],
+    repeat: int,
+) -> List[Dict]:
+    """Times each pocket area method on the frame records."""
+    results = []
+    for method in methods.items():
+        run = functools.partial(calculate_pocket_area, df_frame_records, method)
+        seconds, df_areas = time_function(run, repeat)
+        peak_bytes = measure_peak_memory(run)
+        result = get_method_result(
+            "records", method[0], seconds, peak_bytes, df_areas
+        )
+        results.append(result)
+    return results
+
+
+def benchmark_pocket_area_batch_methods(
+    df_frame_keys: pd.DataFrame,
+    frame_batch: FrameBatch,
+    methods: Dict[str, Callable],
+    repeat: int,
+) -> List[Dict]:
+    """Times each batch pocket area method on the frame batch."""
+    results = []
+    for method in methods.items():
+        run = functools.partial(
+            calculate_pocket_area_batch, df_frame_keys, frame_batch, method
+        )
+        seconds, df_areas = time_function(run, repeat)
+        peak_bytes = measure_peak_memory(run)
+        result = get_method_result(
+            "batch", method[0], seconds, peak_bytes, df_areas
+        )
+        results.append(result)
+    return results
+
+
+def benchmark_flow(
+    inpath: str, outpath: str, weeks: int, repeat: int, **kwargs
+) -> Dict:
+    """
+    Runs the end-to-end flow with profiling and returns the run report of the
+    fastest run, with the total time of each stage across its calls.
+    """
+    best_report: Optional[Dict] = None
+    for _ in range(max(repeat, 1)):
+        main_no_prefect.main_flow(
+            inpath=inpath,
+            outpath=outpath,
+            max_weeks=weeks,
+            profile=True,
+            **kwargs,
+        )
+        with open(f"{outpath}/{RUN_REPORT_FILE}") as file:
+            report = json.load(file)
+        if (
+            best_report is None
+            or report["wall_seconds"] < best_report["wall_seconds"]
+        ):
+            best_report = report
+
+    stages: Dict[str, Dict] = {}
+    for stage in best_report["stages"]:
+        totals = stages.setdefault(
+            stage["name"],
+            {
+                "calls": 0,
+                "wall_seconds": 0.0,
+                "cpu_seconds": 0.0,
+                "output_rows": 0,
+                "output_bytes": 0,
+            },
+        )
+        totals["calls"] += 1
+        for key in ["wall_seconds", "cpu_seconds", "output_rows"]:
+            totals[key] += stage[key]
+        totals["output_bytes"] = max(
+            totals["output_bytes"], stage["output_bytes"]
+        )
+
+    return {
+        "wall_seconds": best_report["wall_seconds"],
+        "peak_rss_bytes": best_report["peak_rss_bytes"],
+        "stages": stages,
+        "pocket_area_methods": best_report["pocket_area_methods"],
+    }
+
+
+def get_environment() -> Dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def run_benchmarks(
+    config: SyntheticDataConfig,
+    workdir: str,
+    repeat: int = 3,
+    engines: Tuple[str, ...] = ("records", "batch"),
+) -> Dict:
+    """
+    Generates a synthetic dataset in the working directory, then times each
+    pocket area method for each engine, and the end-to-end flow for each
+    engine with the time of each stage. Returns the benchmark report.
+    """
+    inpath = f"{workdir}/raw"
+    write_synthetic_data(config, inpath)
+
+    frames = prepare_frames(inpath, config.weeks)
+    method_results = []
+    if "records" in engines:
+        method_results += benchmark_pocket_area_methods(
+            frames["df_frame_records"], POCKET_AREA_METHODS, repeat
+        )
+    if "batch" in engines:
+        method_results += benchmark_pocket_area_batch_methods(
+            frames["df_frame_keys"],
+            frames["frame_batch"],
+            POCKET_AREA_BATCH_METHODS,
+            repeat,
+        )
+
+    flow_results = {
+        engine: benchmark_flow(
+            inpath,
+            f"{workdir}/outputs/{engine}",
+            config.weeks,
+            repeat,
+            engine=engine,
+        )
+        for engine in engines
+    }
+
+    return {
+        "config": asdict(config),
+        "environment": get_environment(),
+        "frames": len(frames["frame_batch"]),
+        "pocket_area_methods": method_results,
+        "flows": flow_results,
+    }
+
+
+def get_benchmark_metrics(report: Dict) -> Dict[str, Tuple[float, bool]]:
+    """
+    Returns the metrics to compare between benchmark reports, by name, with
+    whether higher values are better.
+    """
+    metrics: Dict[str, Tuple[float, bool]] = {}
+    for result in report["pocket_area_methods"]:
+        prefix = f"methods/{result['engine']}/{result['method']}"
+        metrics[f"{prefix}/seconds"] = (result["seconds"], False)
+        metrics[f"{prefix}/frames_per_second"] = (
+            result["frames_per_second"],
+            True,
+        )
+        metrics[f"{prefix}/peak_memory_bytes"] = (
+            result["peak_memory_bytes"],
+            False,
+        )
+    for engine, flow in report["flows"].items():
+        prefix = f"flows/{engine}"
+        metrics[f"{prefix}/wall_seconds"] = (flow["wall_seconds"], False)
+        for name, stage in flow["stages"].items():
+            metrics[f"{prefix}/stages/{name}/wall_seconds"] = (
+                stage["wall_seconds"],
+                False,
+            )
+    return metrics
+
+
+def compare_to_baseline(
+    report: Dict,
+    baseline: Dict,
+    tolerance: float = DEFAULT_TOLERANCE,
+    min_seconds: float = DEFAULT_MIN_SECONDS,
+) -> List[Dict]:
+    """
+    Compares a benchmark report to a baseline report and returns the metrics
+    that got worse by more than the tolerance, as a fraction of the baseline.
+    Metrics that are only in one report are skipped, as are timings where
+    both runs are shorter than min_seconds.
+    """
+    current_metrics = get_benchmark_metrics(report)
+    baseline_metrics = get_benchmark_metrics(baseline)
+    regressions = []
+    for name, (current, higher_is_better) in current_metrics.items():
+        if name not in baseline_metrics:
+            continue
+        expected, _ = baseline_metrics[name]
+        if current is None or expected is None or expected == 0:
+            continue
+        is_timing = name.endswith("seconds") and "per_second" not in name
+        if is_timing and max(current, expected) < min_seconds:
+            continue
+
+        change = (current - expected) / expected
+        is_worse = -change if higher_is_better else change
+        if is_worse > tolerance:
+            regressions.append(
+                {
+                    "metric": name,
+                    "baseline": expected,
+                    "current": current,
+                    "change": change,
+                }
+            )
+    return regressions
+
+
+def write_report(report: Dict, outfile: str):
+    with open(outfile, "w") as file:
+        json.dump(report, file, indent=2)
+
+
+def read_report(infile: str) -> Dict:
+    with open(infile) as file:
+        return json.load(file)
@@ -0,0 +1,61 @@
+from src.benchmarks.benchmark import compare_to_baseline, run_benchmarks
+from src.benchmarks.synthetic import SyntheticDataConfig
+
+
+def get_report(frames_per_second: float, wall_seconds: float):
+    return {
+        "pocket_area_methods": [
+            {
+                "engine": "records",
+                "method": "a",
+                "seconds": 100 / frames_per_second,
+                "frames_per_second": frames_per_second,
+                "peak_memory_bytes": 1000,
+            }
+        ],
+        "flows": {
+            "records": {
+                "wall_seconds": wall_seconds,
+                "stages": {"read_csv": {"wall_seconds": 0.001}},
+            }
+        },
+    }
+
+
+def test_compare_to_baseline():
+    baseline = get_report(frames_per_second=1000, wall_seconds=10)
+    # Within tolerance.
+    actual = compare_to_baseline(get_report(900, 11), baseline, tolerance=0.2)
+    assert actual == []
+
+    # Slower method and flow. Short timings are not compared.
+    actual = compare_to_baseline(get_report(500, 13), baseline, tolerance=0.2)
+    assert [r["metric"] for r in actual] == [
+        "methods/records/a/seconds",
+        "methods/records/a/frames_per_second",
+        "flows/records/wall_seconds",
+    ]
+    assert actual[1]["change"] == -0.5
+
+
+def test_run_benchmarks(tmp_path):
+    config = SyntheticDataConfig(
+        games_per_week=1, plays_per_game=2, frames_per_play=20
+    )
+    actual = run_benchmarks(config, str(tmp_path), repeat=1)
+    assert actual["frames"] > 0
+
+    methods = actual["pocket_area_methods"]
+    assert {r["engine"] for r in methods} == {"records", "batch"}
+    for result in methods:
+        assert result["frames"] == actual["frames"]
+        assert result["frames_per_second"] > 0
+        assert result["peak_memory_bytes"] > 0
+
+    for engine in ["records", "batch"]:
+        stages = actual["flows"][engine]["stages"]
+        assert "normalize_tracking_data" in stages
+        assert "transform_to_frames" in stages
+
+    # A report has no regressions against itself.
+    assert compare_to_baseline(actual, actual) == []
@@ -0,0 +1,115 @@
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.append("./")
+
+from src.benchmarks.benchmark import (
+    DEFAULT_MIN_SECONDS,
+    DEFAULT_TOLERANCE,
+    compare_to_baseline,
+    read_report,
+    run_benchmarks,
+    write_report,
+)
+from src.benchmarks.synthetic import SyntheticDataConfig
+
+DEFAULT_OUTFILE = "data/benchmarks/report.json"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the pocket area methods and the pipeline on synthetic tracking data."
+    )
+    defaults = SyntheticDataConfig()
+    parser.add_argument("--weeks", type=int, default=defaults.weeks)
+    parser.add_argument(
+        "--games-per-week", type=int, default=defaults.games_per_week
+    )
+    parser.add_argument(
+        "--plays-per-game", type=int, default=defaults.plays_per_game
+    )
+    parser.add_argument(
+        "--frames-per-play", type=int, default=defaults.frames_per_play
+    )
+    parser.add_argument("--blockers", type=int, default=defaults.blockers)
+    parser.add_argument("--rushers", type=int, default=defaults.rushers)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of runs per benchmark, of which the fastest is reported.",
+    )
+    parser.add_argument("--engines", nargs="+", default=["records", "batch"])
+    parser.add_argument("--outfile", default=DEFAULT_OUTFILE)
+    parser.add_argument(
+        "--baseline",
+        default=None,
+        help="Benchmark report to compare against. Exits with an error if any metric regressed.",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        default=None,
+        help="Also write the report to this path, to compare future runs against.",
+    )
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--min-seconds", type=float, default=DEFAULT_MIN_SECONDS
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    config = SyntheticDataConfig(
+        weeks=args.weeks,
+        games_per_week=args.games_per_week,
+        plays_per_game=args.plays_per_game,
+        frames_per_play=args.frames_per_play,
+        blockers=args.blockers,
+        rushers=args.rushers,
+        seed=args.seed,
+    )
+    with tempfile.TemporaryDirectory() as workdir:
+        report = run_benchmarks(
+            config, workdir, repeat=args.repeat, engines=tuple(args.engines)
+        )
+
+    for outfile in [args.outfile, args.save_baseline]:
+        if outfile:
+            os.makedirs(os.path.dirname(outfile) or ".", exist_ok=True)
+            write_report(report, outfile)
+
+    for result in report["pocket_area_methods"]:
+        print(
+            f"{result['engine']:>8} {result['method']:<32}"
+            f" {result['frames_per_second']:>10.1f} frames/sec"
+            f" {result['peak_memory_bytes'] / 1e6:>8.1f} MB"
+        )
+    for engine, flow in report["flows"].items():
+        print(
+            f"{engine:>8} {'end-to-end flow':<32} {flow['wall_seconds']:>10.3f} sec"
+        )
+
+    if args.baseline:
+        regressions = compare_to_baseline(
+            report,
+            read_report(args.baseline),
+            tolerance=args.tolerance,
+            min_seconds=args.min_seconds,
+        )
+        for regression in regressions:
+            print(
+                f"Regression in {regression['metric']}:"
+                f" {regression['baseline']:.4g} -> {regression['current']:.4g}"
+                f" ({regression['change']:+.0%})"
+            )
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.pipeline.tasks.constants import FIELD_LENGTH, FIELD_WIDTH
+
+FIRST_GAME_ID = 2021090900
+FIRST_PLAY_ID = 56
+FIRST_NFL_ID = 25000
+FRAMES_PER_SECOND = 10
+OFFENSE_TEAM = "KC"
+DEFENSE_TEAM = "LV"
+
+TRACKING_FILE_COLUMNS = [
+    "gameId",
+    "playId",
+    "nflId",
+    "frameId",
+    "time",
+    "jerseyNumber",
+    "team",
+    "playDirection",
+    "x",
+    "y",
+    "s",
+    "a",
+    "dis",
+    "o",
+    "dir",
+    "event",
+]
+
+
+@dataclass
+class SyntheticDataConfig:
+    """
+    Size of a synthetic dataset in the schema of the Big Data Bowl 2023 data.
+    Every play is a dropback pass: the ball is snapped, the passer drops back,
+    the rushers close in on the passer while the blockers give ground, and the
+    pass is thrown some frames before the end of the play.
+    """
+
+    weeks: int = 1
+    games_per_week: int = 4
+    plays_per_game: int = 8
+    frames_per_play: int = 50
+    blockers: int = 5
+    rushers: int = 4
+    receivers: int = 5
+    coverage: int = 7
+    seed: int = 0
+
+    @property
+    def players_per_play(self) -> int:
+        return 1 + self.blockers + self.rushers + self.receivers + self.coverage
+
+    @property
+    def frames(self) -> int:
+        plays = self.weeks * self.games_per_week * self.plays_per_game
+        return plays * self.frames_per_play
+
+
+def get_player_roles(config: SyntheticDataConfig) -> List[str]:
+    """Returns the PFF role of each player in a play, in order."""
+    return (
+        ["Pass"]
+        + ["Pass Block"] * config.blockers
+        + ["Pass Route"] * config.receivers
+        + ["Pass Rush"] * config.rushers
+        + ["Coverage"] * config.coverage
+    )
+
+
+def get_play_events(config: SyntheticDataConfig) -> np.ndarray:
+    """Returns the raw event of each frame in a play."""
+    n = config.frames_per_play
+    snap_frame = min(6, n)
+    pass_frame = max(snap_frame + 1, n - 10)
+    events = np.full(n, "None", dtype=object)
+    # Frame IDs start at 1. Raw data also has redundant auto events.
+    frame_events = {
+        snap_frame: "ball_snap",
+        snap_frame + 1: "autoevent_ballsnap",
+        pass_frame: "pass_forward",
+        pass_frame + 1: "autoevent_passforward",
+        pass_frame + 8: "pass_arrived",
+    }
+    for frame_id, event in frame_events.items():
+        if frame_id <= n:
+            events[frame_id - 1] = event
+    return events
+
+
+def generate_play_coordinates(
+    config: SyntheticDataConfig, rng: np.random.Generator, n_plays: int
+) -> Dict[str, np.ndarray]:
+    """
+    Returns the x and y coordinates of each player in each frame of each play,
+    with shape (plays, frames, players), for plays moving to the right, as well
+    as the coordinates of the ball with shape (plays, frames).
+    """
+    roles = np.array(get_player_roles(config))
+    n_frames = config.frames_per_play
+    n_players = len(roles)
+    events = get_play_events(config)
+    snap_frame = int(np.flatnonzero(events == "ball_snap")[0]) + 1
+    pass_frame = int(np.flatnonzero(events == "pass_forward")[0]) + 1
+
+    # Line of scrimmage and middle of the field for each play.
+    line_x = rng.uniform(20, FIELD_LENGTH - 40, size=n_plays)
+    mid_y = FIELD_WIDTH / 2 + rng.uniform(-8, 8, size=n_plays)
+
+    # Starting position of each player relative to the ball.
+    start_dx = np.select(
+        [
+            roles == "Pass",
+            roles == "Pass Block",
+            roles == "Pass Route",
+            roles == "Pass Rush",
+        ],
+        [-5.0, -1.5, -1.0, 1.0],
+        default=8.0,
+    )
+    spread = np.select(
+        [roles == "Pass", np.isin(roles, ["Pass Block", "Pass Rush"])],
+        [0.0, 5.0],
+        default=18.0,
+    )
+    start_dx = start_dx + rng.uniform(-1, 1, size=(n_plays, n_players))
+    start_dy = rng.uniform(-1, 1, size=(n_plays, n_players)) * spread
+
+    # Seconds since snap for each frame, zero before the snap.
+    t = np.maximum(np.arange(1, n_frames + 1) - snap_frame, 0)
+    t = t / FRAMES_PER_SECOND
+    t = t[None, :, None]
+
+    # Passer drops back, blockers give ground, rushers close in on the passer,
+    # and receivers and coverage run downfield.
+    velocity_x = np.select(
+        [
+            roles == "Pass",
+            roles == "Pass Block",
+            roles == "Pass Rush",
+        ],
+        [-2.5, -1.2, -1.5],
+        default=5.0,
+    )
+    velocity_x = velocity_x + rng.uniform(-0.5, 0.5, size=(n_plays, n_players))
+    # Rushers converge towards the middle of the pocket.
+    velocity_y = np.where(roles == "Pass Rush", -0.3, 0.0) * np.sign(start_dy)
+    velocity_y = velocity_y + rng.uniform(-0.5, 0.5, size=(n_plays, n_players))
+
+    noise = rng.normal(0, 0.05, size=(2, n_plays, n_frames, n_players))
+    x = line_x[:, None, None] + start_dx[:, None, :]
+    x = x + velocity_x[:, None, :] * t + noise[0]
+    y = mid_y[:, None, None] + start_dy[:, None, :]
+    y = y + velocity_y[:, None, :] * t + noise[1]
+
+    # The ball is at the line of scrimmage until the snap, in the hands of the
+    # passer until the pass, then flies downfield.
+    frame_ids = np.arange(1, n_frames + 1)
+    passer_x, passer_y = x[:, :, 0], y[:, :, 0]
+    seconds_after_pass = np.maximum(frame_ids - pass_frame, 0)
+    seconds_after_pass = seconds_after_pass / FRAMES_PER_SECOND
+    ball_x = np.where(
+        frame_ids < snap_frame,
+        line_x[:, None],
+        passer_x + 20 * seconds_after_pass,
+    )
+    ball_y = np.where(frame_ids < snap_frame, mid_y[:, None], passer_y)
+
+    return {"x": x, "y": y, "ball_x": ball_x, "ball_y": ball_y}
+
+
+def generate_tracking_data(
+    config: SyntheticDataConfig, game_ids: List[int], week_seed: int
+) -> pd.DataFrame:
+    """
+    Returns tracking data for the games, with the same columns as the raw
+    tracking files, sorted by play, frame, and player.
+    """
+    rng = np.random.default_rng([config.seed, week_seed])
+    play_ids = FIRST_PLAY_ID + np.arange(config.plays_per_game) * 25
+    n_plays = len(game_ids) * len(play_ids)
+    n_frames = config.frames_per_play
+    n_players = config.players_per_play
+    # Each player and the football have one row per frame.
+    n_objects = n_players + 1
+
+    coordinates = generate_play_coordinates(config, rng, n_plays)
+    x = np.concatenate([coordinates["x"], coordinates["ball_x"][..., None]], 2)
+    y = np.concatenate([coordinates["y"], coordinates["ball_y"][..., None]], 2)
+
+    # Half of the plays move to the left, so flip their coordinates.
+    is_left = rng.random(n_plays) < 0.5
+    x = np.where(is_left[:, None, None], FIELD_LENGTH - x, x)
+    y = np.where(is_left[:, None, None], FIELD_WIDTH - y, y)
+
+    shape = (n_plays, n_frames, n_objects)
+    play_game_ids = np.repeat(np.array(game_ids, dtype=np.int64), len(play_ids))
+    play_play_ids = np.tile(play_ids, len(game_ids))
+    object_ids = np.arange(n_objects)
+    is_football = np.broadcast_to(object_ids == n_players, shape)
+
+    nfl_ids = (FIRST_NFL_ID + object_ids).astype(float)
+    nfl_ids[n_players] = np.nan
+    jersey_numbers = (object_ids % 99 + 1).astype(float)
+    jersey_numbers[n_players] = np.nan
+    offense_players = 1 + config.blockers + config.receivers
+    teams = np.where(object_ids < offense_players, OFFENSE_TEAM, DEFENSE_TEAM)
+    teams = teams.astype(object)
+    teams[n_players] = "football"
+
+    speed = rng.uniform(0, 8, size=shape)
+    angles = rng.uniform(0, 360, size=(2,) + shape)
+    angles[:, is_football] = np.nan
+    frame_ids = np.arange(1, n_frames + 1)
+    seconds = (frame_ids - 1) / FRAMES_PER_SECOND
+    times = pd.Timestamp("2021-09-09 20:00:00") + pd.to_timedelta(
+        seconds, unit="s"
+    )
+    times = times.strftime("%Y-%m-%dT%H:%M:%S.%f").str[:-3].to_numpy()
+
+    df = pd.DataFrame(
+        {
+            "gameId": np.repeat(play_game_ids, n_frames * n_objects),
+            "playId": np.repeat(play_play_ids, n_frames * n_objects),
+            "nflId": np.tile(nfl_ids, n_plays * n_frames),
+            "frameId": np.tile(np.repeat(frame_ids, n_objects), n_plays),
+            "time": np.tile(np.repeat(times, n_objects), n_plays),
+            "jerseyNumber": np.tile(jersey_numbers, n_plays * n_frames),
+            "team": np.tile(teams, n_plays * n_frames),
+            "playDirection": np.repeat(
+                np.where(is_left, "left", "right"), n_frames * n_objects
+            ),
+            "x": x.ravel().round(2),
+            "y": y.ravel().round(2),
+            "s": speed.ravel().round(2),
+            "a": (speed.ravel() / 2).round(2),
+            "dis": (speed.ravel() / FRAMES_PER_SECOND).round(2),
+            "o": angles[0].ravel().round(2),
+            "dir": angles[1].ravel().round(2),
+            "event": np.tile(
+                np.repeat(get_play_events(config), n_objects), n_plays
+            ),
+        }
+    )
+    return df[TRACKING_FILE_COLUMNS]
+
+
+def generate_synthetic_data(
+    config: SyntheticDataConfig,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Returns a synthetic dataset in the schema of the Big Data Bowl 2023 data,
+    by file name: plays, pffScoutingData, and week1, week2, and so on.
+    """
+    outputs: Dict[str, pd.DataFrame] = {}
+    play_ids = FIRST_PLAY_ID + np.arange(config.plays_per_game) * 25
+    roles = get_player_roles(config)
+    play_rows = []
+    pff_rows = []
+    for week in range(1, config.weeks + 1):
+        game_ids = [
+            FIRST_GAME_ID + week * 100 + game
+            for game in range(config.games_per_week)
+        ]
+        outputs[f"week{week}"] = generate_tracking_data(config, game_ids, week)
+        for game_id in game_ids:
+            for play_id in play_ids:
+                play_rows.append(
+                    {
+                        "gameId": game_id,
+                        "playId": int(play_id),
+                        "playDescription": "Synthetic dropback pass.",
+                        "quarter": 1,
+                        "down": 1,
+                        "yardsToGo": 10,
+                        "possessionTeam": OFFENSE_TEAM,
+                        "defensiveTeam": DEFENSE_TEAM,
+                        "passResult": "C",
+                        "offenseFormation": "SHOTGUN",
+                        "dropBackType": "TRADITIONAL",
+                    }
+                )
+                for i, role in enumerate(roles):
+                    pff_rows.append(
+                        {
+                            "gameId": game_id,
+                            "playId": int(play_id),
+                            "nflId": FIRST_NFL_ID + i,
+                            "pff_role": role,
+                        }
+                    )
+
+    outputs["plays"] = pd.DataFrame(play_rows)
+    outputs["pffScoutingData"] = pd.DataFrame(pff_rows)
+    return outputs
+
+
+def write_synthetic_data(config: SyntheticDataConfig, outpath: str):
+    """
+    Writes a synthetic dataset to CSV files with the same names and columns as
+    the raw Kaggle files, so that it can be read in place of the raw data.
+    """
+    Path(outpath).mkdir(parents=True, exist_ok=True)
+    for name, df in generate_synthetic_data(config).items():
+        df.to_csv(f"{outpath}/{name}.csv", index=False)
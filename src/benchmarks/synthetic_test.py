@@ -0,0 +1,47 @@
+import numpy as np
+
+from src.benchmarks.synthetic import (
+    TRACKING_FILE_COLUMNS,
+    SyntheticDataConfig,
+    generate_synthetic_data,
+)
+from src.pipeline.tasks.events import clean_event_data
+
+
+def test_generate_synthetic_data():
+    config = SyntheticDataConfig(
+        weeks=2, games_per_week=2, plays_per_game=3, frames_per_play=20
+    )
+    actual = generate_synthetic_data(config)
+    assert set(actual) == {"week1", "week2", "plays", "pffScoutingData"}
+
+    df_tracking = actual["week1"]
+    assert list(df_tracking.columns) == TRACKING_FILE_COLUMNS
+    # One row per player and the football, in each frame of each play.
+    rows_per_play = (config.players_per_play + 1) * config.frames_per_play
+    assert len(df_tracking) == 2 * 3 * rows_per_play
+    assert len(actual["plays"]) == 2 * 2 * 3
+    assert len(actual["pffScoutingData"]) == 2 * 2 * 3 * 22
+
+    df_football = df_tracking[df_tracking["team"] == "football"]
+    assert df_football["nflId"].isna().all()
+    assert df_football["o"].isna().all()
+    assert set(df_tracking["playDirection"]) <= {"left", "right"}
+
+    # Every play has one snap after cleaning events.
+    df_events = clean_event_data(df_tracking)
+    snaps = df_events.query("event == 'ball_snap'").groupby(
+        ["gameId", "playId"]
+    )
+    assert snaps.size().tolist() == [1] * 6
+
+
+def test_generate_synthetic_data_seed():
+    config = SyntheticDataConfig(games_per_week=1, plays_per_game=1)
+    first = generate_synthetic_data(config)["week1"]
+    second = generate_synthetic_data(config)["week1"]
+    assert np.array_equal(first["x"], second["x"])
+
+    other = SyntheticDataConfig(games_per_week=1, plays_per_game=1, seed=1)
+    third = generate_synthetic_data(other)["week1"]
+    assert not np.array_equal(first["x"], third["x"])
@@ -1,24 +1,38 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import numpy as np
 import pandas as pd
-from scipy.spatial import ConvexHull
 
 from src.metrics.pocket_area.base import (
     InvalidPocketError,
     PocketArea,
     PocketAreaMetadata,
+    PocketRole,
+    get_failed_pocket_area,
+)
+from src.metrics.pocket_area.batch import (
+    FrameBatch,
+    get_passer_points,
+    get_role_points,
 )
 from src.metrics.pocket_area.helpers import (
-    get_distance,
+    get_distances,
     get_location,
-    split_records_by_role,
+    points_from_records,
+    split_records_to_points_by_role,
 )
 from src.metrics.pocket_area.passer_radius_area import (
-    find_closest_player,
-    get_passer_radius_area,
+    find_closest_point,
+    find_closest_points,
+    get_circle_area,
+)
+from src.metrics.pocket_area.pocket_pb_ch_area import (
+    IncrementalConvexHull,
+    get_convex_hull,
+    get_convex_hull_from_points,
+    get_convex_hull_points,
+    get_cropped_convex_hulls,
 )
-from src.metrics.pocket_area.pocket_pb_ch_area import get_convex_hull
 
 """
 Adaptive Corvex Hull Pseudocode:
@@ -46,17 +60,16 @@ def filter_players_within_difference(
     and any other player that should be considered to make the pocket
     """
 
-    closest_players: List[Dict] = []
-    closest_distance = float("inf")
-
-    players = blockers
-
-    # Determine whether each rusher is within the rusher difference error
-    for player in players:
-        d = get_distance(point, player)
-        if d <= (closest_rusher_distance + rusher_difference):
-            closest_players.append(player)
+    if not blockers:
+        return []
 
+    # Determine whether each blocker is within the rusher difference error.
+    origin = np.array(get_location(point), dtype=float)
+    distances = get_distances(points_from_records(blockers), origin)
+    is_close = distances <= (closest_rusher_distance + rusher_difference)
+    closest_players = [
+        player for player, close in zip(blockers, is_close) if close
+    ]
     return closest_players
 
 
@@ -74,37 +87,128 @@ def get_convexHull_area(frame: List[Dict]) -> PocketArea:
 
 def calculate_adaptive_pocket_area(frame: pd.DataFrame) -> PocketArea:
 
-    passer, blockers, rushers = split_records_by_role(frame)
-    if not rushers:
+    # Raises an error if there is no passer, and the array version raises an
+    # error if there are no rushers.
+    return calculate_adaptive_pocket_area_from_points(
+        *split_records_to_points_by_role(frame)
+    )
+
+
+def calculate_adaptive_pocket_area_from_points(
+    passer: np.ndarray, blockers: np.ndarray, rushers: np.ndarray
+) -> PocketArea:
+    """
+    Array version of calculate_adaptive_pocket_area(), for the coordinates of
+    the passer, blockers, and rushers in one frame.
+    """
+    if len(rushers) == 0:
         raise InvalidPocketError("No rushers in frame to make pocket.")
-    if not passer:
-        raise InvalidPocketError("No passer in frame.")
-
-    # Consider all pass rushers and the passer
-    pocket_players = rushers + blockers + [passer]
-    # use helper function in this file to get all the rushers that have a distance 3 yards
-    # within the distance from the closest rusher to the quarterback
-    closest_rusher, closest_distance = find_closest_player(passer, rushers)
-    closest_lineman = filter_players_within_difference(
-        passer, blockers, closest_distance, 0.75
+
+    # Find the closest rusher, then all the blockers within 0.75 yards of that
+    # rusher's distance to the passer.
+    closest_rusher_idx, closest_distance = find_closest_point(passer, rushers)
+    closest_rusher = rushers[closest_rusher_idx]
+    blocker_distances = get_distances(blockers, passer)
+    closest_lineman = blockers[blocker_distances <= closest_distance + 0.75]
+    return get_adaptive_pocket_area(
+        passer, closest_rusher, closest_distance, closest_lineman
     )
 
-    # adjusted pocket will get all the pass rushers that make a valid pocket along with the qb
-    adjusted_pocket = closest_lineman + [passer] + [closest_rusher]
 
-    # If there is 2 or more valid pass rushers, get the corvex hull of the rushers and qb
+def get_adaptive_pocket_area(
+    passer: np.ndarray,
+    closest_rusher: np.ndarray,
+    closest_distance: float,
+    closest_lineman: np.ndarray,
+    hull: Optional[IncrementalConvexHull] = None,
+) -> PocketArea:
+    """
+    Estimates the adaptive pocket area from the passer, the closest rusher and
+    their distance, and the blockers within range of the closest rusher.
+    """
+    # If there is 1 or more valid blockers, get the convex hull of the
+    # blockers, the passer, and the closest rusher.
     if len(closest_lineman) >= 1:
-        return get_convexHull_area(adjusted_pocket)
-    # If there is one valid rusher, make the radius the distance from the rusher to qb,
-    # restrict the area of the pocket two 1/3rd of a circle in front of the qb, make the metadata.edge
-    # variable the location of the nearest pass rusher
-    else:
-        pocket_area = get_passer_radius_area(adjusted_pocket)
-        # ex, ey = closest_lineman[0].get("x"), closest_lineman[0].get("y")
-        metadata = PocketAreaMetadata(
-            radius=pocket_area.metadata.radius,
-            center=pocket_area.metadata.center,
+        adjusted_pocket = np.vstack([closest_lineman, passer, closest_rusher])
+        area, vertices = get_convex_hull_from_points(adjusted_pocket, hull)
+        metadata = PocketAreaMetadata(vertices=vertices)
+        return PocketArea(area, metadata)
+
+    # Otherwise, make the radius the distance from the closest rusher to the
+    # passer and restrict the area of the pocket to 1/3rd of a circle, the 120
+    # degrees that would be right in front of the passer.
+    metadata = PocketAreaMetadata(
+        radius=closest_distance,
+        center=(passer[0], passer[1]),
+    )
+    return PocketArea(get_circle_area(closest_distance) / 3, metadata)
+
+
+def calculate_adaptive_pocket_area_batch(
+    batch: FrameBatch, incremental: bool = False
+) -> List[PocketArea]:
+    """
+    Batch version of calculate_adaptive_pocket_area(), which finds the closest
+    rusher and the blockers within range in every frame at once, leaving only
+    the convex hull to compute for each frame, then crops all the hulls to the
+    line of scrimmage at once. If incremental, reuses the hull of the previous
+    frame of the same play when it is still the hull, which is the case for
+    most consecutive frames of a play.
+    """
+    hull = IncrementalConvexHull() if incremental else None
+    passers = get_passer_points(batch)
+    rushers = get_role_points(batch, PocketRole.RUSHER)
+    blockers = get_role_points(batch, PocketRole.BLOCKER)
+    closest_indices, closest_distances = find_closest_points(
+        get_distances(rushers, passers)
+    )
+    blocker_distances = get_distances(blockers, passers)
+    # Padding has a distance of np.nan, so it is never within range.
+    with np.errstate(invalid="ignore"):
+        is_closest_lineman = blocker_distances <= (
+            closest_distances[:, np.newaxis] + 0.75
         )
-        # Dividing the total area of the pocket by 3 to only consider the 120 degrees of the circle that would
-        #  be right in front of the quarterback
-        return PocketArea(pocket_area.area / 3, metadata)
+
+    pockets = []
+    hull_frames = []
+    hull_points = []
+    is_play_start = batch.get_play_starts()
+    for i, (passer, closest_distance) in enumerate(
+        zip(passers, closest_distances)
+    ):
+        if hull is not None and is_play_start[i]:
+            hull.reset()
+        # Frames without a passer or without rushers have no pocket, like the
+        # errors raised by calculate_adaptive_pocket_area().
+        if np.isnan(passer[0]) or np.isnan(closest_distance):
+            error = InvalidPocketError("No passer or rushers in frame.")
+            pockets.append(get_failed_pocket_area(error))
+            continue
+        closest_rusher = rushers[i, closest_indices[i]]
+        closest_lineman = blockers[i, is_closest_lineman[i]]
+        if len(closest_lineman) == 0:
+            pockets.append(
+                get_adaptive_pocket_area(
+                    passer,
+                    closest_rusher,
+                    float(closest_distance),
+                    closest_lineman,
+                )
+            )
+            continue
+
+        # Same hull as get_adaptive_pocket_area(), but the hulls of all frames
+        # are cropped to the line of scrimmage at once, after the loop.
+        pockets.append(PocketArea(np.nan))
+        adjusted_pocket = np.vstack([closest_lineman, passer, closest_rusher])
+        try:
+            hull_points.append(get_convex_hull_points(adjusted_pocket, hull))
+            hull_frames.append(i)
+        except Exception as ex:
+            pockets[i] = get_failed_pocket_area(ex)
+
+    hulls = get_cropped_convex_hulls(hull_points)
+    for i, (area, vertices) in zip(hull_frames, hulls):
+        metadata = PocketAreaMetadata(vertices=vertices)
+        pockets[i] = PocketArea(area, metadata)
+    return pockets
@@ -1,8 +1,11 @@
+import numpy as np
 import pytest
 
 from src.metrics.pocket_area.adaptive_pocket_area import (
     calculate_adaptive_pocket_area,
+    calculate_adaptive_pocket_area_batch,
 )
+from src.metrics.pocket_area.batch import frame_batch_from_records
 from src.metrics.pocket_area.helpers import InvalidPocketError
 
 
@@ -39,3 +42,26 @@ def test_multiple_rushers_valid_to_make_pocket():
 
     assert actual.area == pytest.approx(0.5)
     assert actual.metadata.vertices == [(0, -1), (1, -1), (1, 0)]
+
+
+def test_calculate_adaptive_pocket_area_batch_incremental():
+    rng = np.random.default_rng(2)
+    blockers = rng.uniform(-4, 4, size=(5, 2)) + [0, -3]
+    rushers = rng.uniform(-4, 4, size=(4, 2)) + [0, -1]
+    frames = []
+    for _ in range(30):
+        blockers = blockers + rng.normal(size=blockers.shape) * 0.02
+        rushers = rushers + [0, -0.05] + rng.normal(size=rushers.shape) * 0.02
+        frames.append(
+            [{"role": "passer", "x": 0.0, "y": -7.0}]
+            + [{"role": "blocker", "x": x, "y": y} for x, y in blockers]
+            + [{"role": "rusher", "x": x, "y": y} for x, y in rushers]
+        )
+    batch = frame_batch_from_records(frames)
+    expected = calculate_adaptive_pocket_area_batch(batch)
+    actual = calculate_adaptive_pocket_area_batch(batch, incremental=True)
+    for pocket, expected_pocket in zip(actual, expected):
+        assert pocket.area == pytest.approx(expected_pocket.area, rel=1e-12)
+        assert set(pocket.metadata.vertices or []) == set(
+            expected_pocket.metadata.vertices or []
+        )
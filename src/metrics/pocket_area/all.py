@@ -1,16 +1,32 @@
+from functools import partial
 from typing import Dict
 
 from src.metrics.pocket_area.adaptive_pocket_area import (
     calculate_adaptive_pocket_area,
+    calculate_adaptive_pocket_area_batch,
 )
 from src.metrics.pocket_area.base import PocketArea, PocketAreaFunction
-from src.metrics.pocket_area.passer_radius_area import get_passer_radius_area
+from src.metrics.pocket_area.batch import (
+    PocketAreaBatchFunction,
+    calculate_frame_batch_from_records,
+)
+from src.metrics.pocket_area.passer_radius_area import (
+    get_passer_radius_area,
+    get_passer_radius_area_batch,
+)
 from src.metrics.pocket_area.pocket_pb_ch_area import (
     get_passBlocker_convexHull_area,
+    get_passBlocker_convexHull_area_batch,
 )
 from src.metrics.pocket_area.rushers_pocket_area import rushers_pocket_area
-from src.metrics.pocket_area.voronoi_pocket_area import voronoi_pocket_area
-from src.metrics.pocket_area.voronoi_rushers_only import voronoi_rushers_only
+from src.metrics.pocket_area.voronoi_pocket_area import (
+    voronoi_pocket_area,
+    voronoi_pocket_area_batch,
+)
+from src.metrics.pocket_area.voronoi_rushers_only import (
+    voronoi_rushers_only,
+    voronoi_rushers_only_batch,
+)
 
 POCKET_AREA_METHODS: Dict[str, PocketAreaFunction] = {
     # "passer_radius": get_passer_radius_area,
@@ -20,3 +36,29 @@ POCKET_AREA_METHODS: Dict[str, PocketAreaFunction] = {
     "adaptive_pocket_area": calculate_adaptive_pocket_area,
     "voronoi_rushers_only": voronoi_rushers_only,
 }
+
+# Batch versions of the methods above, with the same names, for use with a
+# FrameBatch. Methods without an array version compute each frame from records.
+POCKET_AREA_BATCH_METHODS: Dict[str, PocketAreaBatchFunction] = {
+    # "passer_radius": get_passer_radius_area_batch,
+    # "blocker_convex_hull": get_passBlocker_convexHull_area_batch,
+    # "rushers_pocket_area": partial(
+    #     calculate_frame_batch_from_records, rushers_pocket_area
+    # ),
+    # "voronoi_pocket_area": voronoi_pocket_area_batch,
+    "adaptive_pocket_area": calculate_adaptive_pocket_area_batch,
+    "voronoi_rushers_only": voronoi_rushers_only_batch,
+}
+
+# Batch methods for runs with incremental hulls, which reuse the convex hull of
+# the previous frame when it is still the hull. Methods without an incremental
+# version are the same as above.
+INCREMENTAL_POCKET_AREA_BATCH_METHODS: Dict[str, PocketAreaBatchFunction] = {
+    **POCKET_AREA_BATCH_METHODS,
+    # "blocker_convex_hull": partial(
+    #     get_passBlocker_convexHull_area_batch, incremental=True
+    # ),
+    "adaptive_pocket_area": partial(
+        calculate_adaptive_pocket_area_batch, incremental=True
+    ),
+}
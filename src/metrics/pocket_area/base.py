@@ -2,6 +2,8 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Callable, Dict, List, Optional, Tuple
 
+import numpy as np
+
 # Type hint for (x, y) coordinates.
 Point = Tuple[float, float]
 
@@ -11,6 +13,8 @@ class PocketAreaMetadata:
     vertices: Optional[List[Point]] = None
     radius: Optional[float] = None
     center: Optional[Point] = None
+    # Name of the error raised if the pocket could not be calculated.
+    error: Optional[str] = None
 
 
 @dataclass
@@ -26,6 +30,15 @@ class PocketRole(Enum):
     UNKNOWN = "unknown"
 
 
+# Integer code for each pocket role, so roles can be stored in NumPy arrays.
+POCKET_ROLE_CODES: Dict[PocketRole, int] = {
+    PocketRole.PASSER: 0,
+    PocketRole.BLOCKER: 1,
+    PocketRole.RUSHER: 2,
+    PocketRole.UNKNOWN: 3,
+}
+
+
 class PFFRole(Enum):
     PASS = "Pass"  # nosec
     PASS_ROUTE = "Pass Route"  # nosec
@@ -48,3 +61,12 @@ PocketAreaFunction = Callable[[List[Dict]], PocketArea]
 
 class InvalidPocketError(Exception):
     pass
+
+
+def get_failed_pocket_area(error: Exception) -> PocketArea:
+    """
+    Returns a pocket with a null area for a frame where the pocket area could
+    not be calculated, with the name of the error in its metadata, so that
+    failures can be told apart from frames that have no area.
+    """
+    return PocketArea(np.nan, PocketAreaMetadata(error=type(error).__name__))
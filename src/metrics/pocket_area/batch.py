@@ -0,0 +1,190 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.metrics.pocket_area.base import (
+    POCKET_ROLE_CODES,
+    PocketArea,
+    PocketAreaFunction,
+    PocketRole,
+    get_failed_pocket_area,
+)
+from src.metrics.pocket_area.helpers import split_points_by_role
+
+# Tuple of form (x, y, role) with the arrays for the players in one frame.
+FrameArrays = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+ROLE_CODE_TO_POCKET_ROLE: Dict[int, PocketRole] = {
+    code: role for role, code in POCKET_ROLE_CODES.items()
+}
+
+
+@dataclass
+class FrameBatch:
+    """
+    Players from many frames, stored as flat arrays instead of one list of
+    records per frame. The players in frame i are at positions offsets[i] up
+    to offsets[i + 1] of the x, y, and role arrays. Roles are stored as the
+    integer codes in POCKET_ROLE_CODES.
+    """
+
+    x: np.ndarray
+    y: np.ndarray
+    role: np.ndarray
+    offsets: np.ndarray
+    # Whether each frame is the first frame of its play, or None if the plays
+    # of the frames are not known.
+    is_play_start: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def get_frame(self, i: int) -> FrameArrays:
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.x[start:end], self.y[start:end], self.role[start:end]
+
+    def get_frames(self, start: int, end: int) -> "FrameBatch":
+        """Returns a new batch with the frames from start up to end."""
+        player_start, player_end = self.offsets[start], self.offsets[end]
+        is_play_start = None
+        if self.is_play_start is not None:
+            is_play_start = self.is_play_start[start:end]
+        return FrameBatch(
+            x=self.x[player_start:player_end],
+            y=self.y[player_start:player_end],
+            role=self.role[player_start:player_end],
+            offsets=self.offsets[start : end + 1] - player_start,
+            is_play_start=is_play_start,
+        )
+
+    def get_play_starts(self) -> np.ndarray:
+        """
+        Returns whether each frame is the first frame of its play. If the plays
+        are not known, only the first frame starts a play.
+        """
+        if self.is_play_start is not None:
+            return self.is_play_start
+        is_play_start = np.zeros(len(self), dtype=bool)
+        is_play_start[:1] = True
+        return is_play_start
+
+    def iter_frames(self) -> Iterator[FrameArrays]:
+        for i in range(len(self)):
+            yield self.get_frame(i)
+
+    def get_records(self, i: int) -> List[Dict]:
+        """Returns frame i in the list of records form of PocketAreaFunction."""
+        x, y, role = self.get_frame(i)
+        return [
+            {"x": px, "y": py, "role": ROLE_CODE_TO_POCKET_ROLE[code].value}
+            for px, py, code in zip(x.tolist(), y.tolist(), role.tolist())
+        ]
+
+
+# Type hint for functions that compute pocket area for every frame in a batch.
+PocketAreaBatchFunction = Callable[[FrameBatch], List[PocketArea]]
+
+# Type hint for functions that compute pocket area from the coordinates of the
+# passer, blockers, and rushers in one frame.
+PocketAreaPointsFunction = Callable[
+    [np.ndarray, np.ndarray, np.ndarray], PocketArea
+]
+
+
+def get_role_points(batch: FrameBatch, role: PocketRole) -> np.ndarray:
+    """
+    Returns the coordinates of the players with the given role in each frame,
+    as an array of shape (frames, max players with the role, 2). Frames with
+    fewer players with the role are padded with np.nan.
+    """
+    is_role = batch.role == POCKET_ROLE_CODES[role]
+    frame_sizes = np.diff(batch.offsets)
+    frame_indices = np.repeat(np.arange(len(batch)), frame_sizes)[is_role]
+    counts = np.bincount(frame_indices, minlength=len(batch))
+
+    # Position of each player among the players with the role in its frame.
+    frame_starts = np.cumsum(counts) - counts
+    positions = np.arange(len(frame_indices)) - frame_starts[frame_indices]
+
+    max_count = counts.max() if len(counts) > 0 else 0
+    points = np.full((len(batch), max_count, 2), np.nan)
+    points[frame_indices, positions, 0] = batch.x[is_role]
+    points[frame_indices, positions, 1] = batch.y[is_role]
+    return points
+
+
+def get_passer_points(batch: FrameBatch) -> np.ndarray:
+    """
+    Returns the coordinates of the first passer in each frame, as an array of
+    shape (frames, 2). Frames without a passer get np.nan.
+    """
+    passers = get_role_points(batch, PocketRole.PASSER)
+    if passers.shape[1] == 0:
+        return np.full((len(batch), 2), np.nan)
+    return passers[:, 0, :]
+
+
+def frame_batch_from_records(frames: List[List[Dict]]) -> FrameBatch:
+    """
+    Creates a frame batch from a list of frames in the list of records form of
+    PocketAreaFunction.
+    """
+    players = [player for frame in frames for player in frame]
+    sizes = [len(frame) for frame in frames]
+    offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+    role = [
+        POCKET_ROLE_CODES.get(
+            _get_pocket_role(player.get("role")),
+            POCKET_ROLE_CODES[PocketRole.UNKNOWN],
+        )
+        for player in players
+    ]
+    return FrameBatch(
+        x=np.array([p.get("x") for p in players], dtype=float),
+        y=np.array([p.get("y") for p in players], dtype=float),
+        role=np.array(role, dtype=np.int8),
+        offsets=offsets,
+    )
+
+
+def _get_pocket_role(raw: str) -> PocketRole:
+    try:
+        return PocketRole(raw)
+    except ValueError:
+        return PocketRole.UNKNOWN
+
+
+def calculate_frame_batch(
+    calculate_fn: PocketAreaPointsFunction, batch: FrameBatch
+) -> List[PocketArea]:
+    """
+    Calculates the pocket area for every frame in the batch by splitting the
+    arrays of each frame by role. Frames where the pocket cannot be calculated
+    get a failed pocket with an area of np.nan, instead of stopping the batch.
+    """
+    pockets = []
+    for x, y, role in batch.iter_frames():
+        try:
+            passer, blockers, rushers = split_points_by_role(x, y, role)
+            pockets.append(calculate_fn(passer, blockers, rushers))
+        except Exception as ex:
+            pockets.append(get_failed_pocket_area(ex))
+    return pockets
+
+
+def calculate_frame_batch_from_records(
+    calculate_fn: PocketAreaFunction, batch: FrameBatch
+) -> List[PocketArea]:
+    """
+    Calculates the pocket area for every frame in the batch with a function
+    that takes a list of records, for methods that do not have an array version.
+    Use with functools.partial() so that the batch function can be pickled.
+    """
+    pockets = []
+    for i in range(len(batch)):
+        try:
+            pockets.append(calculate_fn(batch.get_records(i)))
+        except Exception as ex:
+            pockets.append(get_failed_pocket_area(ex))
+    return pockets
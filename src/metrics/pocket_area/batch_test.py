@@ -0,0 +1,148 @@
+import numpy as np
+import pytest
+
+from src.metrics.pocket_area.all import (
+    POCKET_AREA_BATCH_METHODS,
+    POCKET_AREA_METHODS,
+)
+from src.metrics.pocket_area.base import (
+    PocketArea,
+    PocketRole,
+    get_failed_pocket_area,
+)
+from src.metrics.pocket_area.batch import (
+    calculate_frame_batch,
+    frame_batch_from_records,
+    get_passer_points,
+    get_role_points,
+)
+from src.metrics.pocket_area.helpers import pocket_to_json
+from src.metrics.pocket_area.passer_radius_area import (
+    get_passer_radius_area,
+    get_passer_radius_area_batch,
+)
+from src.metrics.pocket_area.pocket_pb_ch_area import (
+    get_passBlocker_convexHull_area,
+    get_passBlocker_convexHull_area_batch,
+)
+from src.metrics.pocket_area.voronoi_pocket_area import (
+    voronoi_pocket_area,
+    voronoi_pocket_area_batch,
+)
+
+
+def get_random_frames(n_frames: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    roles = ["passer"] + ["blocker"] * 5 + ["rusher"] * 4 + ["unknown"]
+    frames = []
+    for _ in range(n_frames):
+        frame = [
+            {
+                "x": float(rng.uniform(-10, 10)),
+                "y": float(rng.uniform(-10, 2)),
+                "role": role,
+            }
+            for role in rng.permutation(roles)
+        ]
+        frames.append(frame)
+    return frames
+
+
+def calculate_from_records(calculate_fn, frames):
+    pockets = []
+    for frame in frames:
+        try:
+            pockets.append(calculate_fn(frame))
+        except Exception as ex:
+            pockets.append(get_failed_pocket_area(ex))
+    return pockets
+
+
+def test_frame_batch_from_records():
+    frames = [
+        [
+            {"x": 1, "y": 2, "role": "passer"},
+            {"x": 3, "y": 4, "role": "rusher"},
+        ],
+        [{"x": 5, "y": 6, "role": "blocker"}],
+    ]
+    batch = frame_batch_from_records(frames)
+    assert len(batch) == 2
+    assert batch.offsets.tolist() == [0, 2, 3]
+    assert batch.get_records(0) == frames[0]
+    assert batch.get_records(1) == frames[1]
+
+
+def test_get_role_points():
+    frames = [
+        [
+            {"x": 1, "y": 2, "role": "rusher"},
+            {"x": 0, "y": 0, "role": "passer"},
+            {"x": 3, "y": 4, "role": "rusher"},
+        ],
+        [{"x": 5, "y": 6, "role": "blocker"}],
+        [{"x": 7, "y": 8, "role": "rusher"}],
+    ]
+    batch = frame_batch_from_records(frames)
+    actual = get_role_points(batch, PocketRole.RUSHER)
+    expected = np.array(
+        [
+            [[1, 2], [3, 4]],
+            [[np.nan, np.nan], [np.nan, np.nan]],
+            [[7, 8], [np.nan, np.nan]],
+        ]
+    )
+    np.testing.assert_array_equal(actual, expected)
+    actual_passers = get_passer_points(batch)
+    expected_passers = np.array([[0, 0], [np.nan, np.nan], [np.nan, np.nan]])
+    np.testing.assert_array_equal(actual_passers, expected_passers)
+
+
+def test_calculate_frame_batch_failed_frame():
+    frames = [
+        [{"x": 1, "y": 2, "role": "rusher"}],
+        [
+            {"x": 0, "y": 0, "role": "passer"},
+            {"x": 3, "y": 4, "role": "rusher"},
+        ],
+    ]
+    batch = frame_batch_from_records(frames)
+    actual = get_passer_radius_area_batch(batch)
+    assert np.isnan(actual[0].area)
+    assert actual[1].area == pytest.approx(np.pi * 25)
+    assert actual[1].metadata.radius == pytest.approx(5)
+
+
+@pytest.mark.parametrize(
+    "calculate_fn, calculate_batch_fn",
+    [
+        (get_passer_radius_area, get_passer_radius_area_batch),
+        (
+            get_passBlocker_convexHull_area,
+            get_passBlocker_convexHull_area_batch,
+        ),
+        (voronoi_pocket_area, voronoi_pocket_area_batch),
+    ]
+    + [
+        (POCKET_AREA_METHODS[name], POCKET_AREA_BATCH_METHODS[name])
+        for name in POCKET_AREA_BATCH_METHODS
+    ],
+)
+def test_batch_methods_match_records_methods(calculate_fn, calculate_batch_fn):
+    frames = get_random_frames(50)
+    expected = calculate_from_records(calculate_fn, frames)
+    actual = calculate_batch_fn(frame_batch_from_records(frames))
+    assert [pocket_to_json(p) for p in actual] == [
+        pocket_to_json(p) for p in expected
+    ]
+
+
+def test_calculate_frame_batch_no_passer():
+    def calculate_area_always_seven(passer, blockers, rushers):
+        return PocketArea(area=7)
+
+    frames = [[{"x": 1, "y": 2, "role": "blocker"}]]
+    batch = frame_batch_from_records(frames)
+    actual = calculate_frame_batch(calculate_area_always_seven, batch)
+    assert len(actual) == 1
+    assert np.isnan(actual[0].area)
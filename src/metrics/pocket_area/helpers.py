@@ -1,21 +1,30 @@
 import dataclasses
 import math
-from typing import Dict, List, Tuple
+from typing import Dict, List, Sequence, Tuple
 
 import numpy as np
 from shapely import Polygon
 
 from src.metrics.pocket_area.base import (
     PFF_ROLE_TO_POCKET_ROLE,
+    POCKET_ROLE_CODES,
     InvalidPocketError,
     PFFRole,
     PocketArea,
     PocketAreaMetadata,
     PocketRole,
+    Point,
 )
 
 # Tuple of form (passer, blockers, rushers)
 PlayerRecordsByRole = Tuple[Dict, List[Dict], List[Dict]]
+# Tuple of form (passer, blockers, rushers), where the passer is an array of
+# shape (2,) and the blockers and rushers are arrays of shape (n, 2).
+PlayerPointsByRole = Tuple[np.ndarray, np.ndarray, np.ndarray]
+# Tuple of form (vertices, counts), for many polygons at once, where vertices
+# has shape (polygons, max vertices, 2) and polygon i is the first counts[i]
+# vertices of row i, padded with np.nan.
+PolygonArrays = Tuple[np.ndarray, np.ndarray]
 
 
 def split_records_by_role(frame: List[Dict]) -> PlayerRecordsByRole:
@@ -42,6 +51,60 @@ def split_records_by_role(frame: List[Dict]) -> PlayerRecordsByRole:
     return passer, blockers, rushers
 
 
+def split_points_by_role(
+    x: np.ndarray, y: np.ndarray, role: np.ndarray
+) -> PlayerPointsByRole:
+    """
+    Splits the coordinates of the players in a frame by role code and returns
+    them, keeping the order of the players within each role.
+    """
+    points = np.column_stack([x, y])
+    passer_indices = np.flatnonzero(
+        role == POCKET_ROLE_CODES[PocketRole.PASSER]
+    )
+    # If no passer was found, raise an error.
+    if len(passer_indices) == 0:
+        raise InvalidPocketError("No passer in frame.")
+
+    # If multiple passers, only return the first passer.
+    passer = points[passer_indices[0]]
+    blockers = points[role == POCKET_ROLE_CODES[PocketRole.BLOCKER]]
+    rushers = points[role == POCKET_ROLE_CODES[PocketRole.RUSHER]]
+    return passer, blockers, rushers
+
+
+def split_records_to_points_by_role(frame: List[Dict]) -> PlayerPointsByRole:
+    """
+    Splits the players in a frame by role and returns their coordinates as
+    arrays, in the same form as split_points_by_role(). Missing coordinates of
+    the passer are np.nan, as in a frame batch.
+    """
+    passer, blockers, rushers = split_records_by_role(frame)
+    return (
+        np.array([passer.get("x"), passer.get("y")], dtype=float),
+        points_from_records(blockers),
+        points_from_records(rushers),
+    )
+
+
+def points_from_records(records: List[Dict]) -> np.ndarray:
+    """Returns the coordinates of the players as an array of shape (n, 2)."""
+    locations = [get_location(record) for record in records]
+    return np.array(locations, dtype=float).reshape(-1, 2)
+
+
+def get_distances(points: np.ndarray, origin: np.ndarray) -> np.ndarray:
+    """
+    Returns the distance from the origin to each point. Works for one frame,
+    with points of shape (n, 2) and an origin of shape (2,), or for many frames
+    at once, with points of shape (frames, n, 2) and origins of shape
+    (frames, 2), which returns a matrix of shape (frames, n).
+    """
+    delta = points - origin[..., np.newaxis, :]
+    dx, dy = delta[..., 0], delta[..., 1]
+    return np.sqrt(dx * dx + dy * dy)
+
+
 def get_distance(a: Dict, b: Dict) -> float:
     ax, ay = a.get("x"), a.get("y")
     bx, by = b.get("x"), b.get("y")
@@ -118,3 +181,110 @@ def vertices_from_shape(shape: Polygon):
 
 def vertices_to_shape(vertices):
     return Polygon(vertices)
+
+
+def polygon_arrays_from_vertices(
+    polygons: Sequence[np.ndarray],
+) -> PolygonArrays:
+    """
+    Packs a list of polygons, each an array of vertices of shape (n, 2), into
+    padded arrays for the vectorized polygon functions.
+    """
+    counts = np.array([len(vertices) for vertices in polygons], dtype=int)
+    max_count = max(counts.max(initial=0), 1)
+    vertices = np.full((len(polygons), max_count, 2), np.nan)
+    for i, polygon in enumerate(polygons):
+        vertices[i, : len(polygon)] = polygon
+    return vertices, counts
+
+
+def get_next_vertices(polygons: PolygonArrays) -> np.ndarray:
+    """Returns the vertex after each vertex of each polygon, wrapping around."""
+    vertices, counts = polygons
+    positions = np.arange(vertices.shape[1])
+    next_positions = (positions + 1) % np.maximum(counts, 1)[:, np.newaxis]
+    return vertices[np.arange(len(counts))[:, np.newaxis], next_positions]
+
+
+def clip_polygons(
+    polygons: PolygonArrays, normals: np.ndarray, limits: np.ndarray
+) -> PolygonArrays:
+    """
+    Clips each convex polygon to the half-plane of points p where the dot
+    product of the normal and p is at most the limit, with one
+    Sutherland-Hodgman step for all polygons at once. Polygons with a null
+    normal are not clipped.
+    """
+    vertices, counts = polygons
+    n_polygons, max_count, _ = vertices.shape
+    is_vertex = np.arange(max_count) < counts[:, np.newaxis]
+    next_vertices = get_next_vertices(polygons)
+
+    # Signed distance of each vertex past the line, scaled by the normal.
+    limits = limits[:, np.newaxis]
+    distances = np.einsum("fmd,fd->fm", vertices, normals) - limits
+    next_distances = np.einsum("fmd,fd->fm", next_vertices, normals) - limits
+    is_active = ~np.isnan(normals).any(axis=1)[:, np.newaxis]
+    is_inside = distances <= 0
+    is_crossing = is_inside != (next_distances <= 0)
+
+    # Edges that do not cross the line divide by 0, but are never emitted.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = distances / (distances - next_distances)
+        crossings = vertices + t[..., np.newaxis] * (next_vertices - vertices)
+
+    # Each edge keeps its first vertex if inside, then adds the point where it
+    # crosses the line, if any.
+    keep = is_vertex & (is_inside | ~is_active)
+    add = is_vertex & is_crossing & is_active
+    emitted = np.stack([vertices, crossings], axis=2).reshape(
+        n_polygons, 2 * max_count, 2
+    )
+    is_emitted = np.stack([keep, add], axis=2).reshape(
+        n_polygons, 2 * max_count
+    )
+    new_counts = is_emitted.sum(axis=1)
+    new_positions = np.cumsum(is_emitted, axis=1) - 1
+
+    new_vertices = np.full(
+        (n_polygons, max(new_counts.max(initial=0), 1), 2), np.nan
+    )
+    emitted_polygons, emitted_positions = np.nonzero(is_emitted)
+    new_vertices[
+        emitted_polygons, new_positions[emitted_polygons, emitted_positions]
+    ] = emitted[emitted_polygons, emitted_positions]
+    return new_vertices, new_counts
+
+
+def get_polygon_areas(polygons: PolygonArrays) -> np.ndarray:
+    """
+    Returns the area of each polygon with the shoelace formula, positive for
+    vertices in counterclockwise order.
+    """
+    vertices, counts = polygons
+    next_vertices = get_next_vertices(polygons)
+    cross = (
+        vertices[..., 0] * next_vertices[..., 1]
+        - next_vertices[..., 0] * vertices[..., 1]
+    )
+    # Add up the vertices in order, rather than with a sum over the rows, so
+    # that the area of a polygon does not depend on how much it is padded.
+    total = np.zeros(len(counts))
+    for position in range(vertices.shape[1]):
+        total += np.where(position < counts, cross[:, position], 0.0)
+    return total / 2
+
+
+def get_polygon_vertices(polygons: PolygonArrays, i: int) -> List[Point]:
+    """
+    Returns the vertices of polygon i as a list of points, without repeated
+    points, such as where a polygon was clipped through one of its vertices.
+    """
+    vertices, counts = polygons
+    points: List[Point] = []
+    for x, y in vertices[i, : counts[i]].tolist():
+        if not points or (x, y) != points[-1]:
+            points.append((x, y))
+    if len(points) > 1 and points[0] == points[-1]:
+        points.pop()
+    return points
@@ -7,8 +7,12 @@ from src.metrics.pocket_area.base import (
     PocketAreaMetadata,
 )
 from src.metrics.pocket_area.helpers import (
+    clip_polygons,
     convert_pff_role_to_pocket_role,
     get_distance,
+    get_distances,
+    get_polygon_areas,
+    get_polygon_vertices,
     pocket_from_json,
     pocket_to_json,
     split_records_by_role,
@@ -56,6 +60,19 @@ def test_get_distance_two_dimensions():
     assert actual == pytest.approx(1.414213)
 
 
+def test_get_distances_many_frames():
+    points = np.array(
+        [
+            [[1, 0], [2, 2], [np.nan, np.nan]],
+            [[3, 4], [0, 0], [0, 1]],
+        ]
+    )
+    origins = np.array([[0, 0], [0, 0]])
+    actual = get_distances(points, origins)
+    expected = np.array([[1.0, 2.828427, np.nan], [5.0, 0.0, 1.0]])
+    np.testing.assert_allclose(actual, expected, rtol=1e-6)
+
+
 def test_get_distance_missing_b_x_coordinate():
     expected = "Coordinates must not be null."
     with pytest.raises(ValueError, match=expected):
@@ -125,3 +142,25 @@ def test_pocket_to_json_no_metadata():
     actual = pocket_to_json(pocket)
     expected = {"area": 42}
     assert actual == expected
+
+
+def test_clip_polygons():
+    square = np.array([[[0, 0], [2, 0], [2, 2], [0, 2]]], dtype=float)
+    polygons = (square, np.array([4]))
+    # Keep x + y <= 2, which cuts the square along its diagonal.
+    vertices, counts = clip_polygons(
+        polygons, np.array([[1.0, 1.0]]), np.array([2])
+    )
+    assert get_polygon_areas((vertices, counts)).tolist() == [2]
+    # The diagonal goes through two corners, which are only kept once.
+    assert get_polygon_vertices((vertices, counts), 0) == [
+        (0, 0),
+        (2, 0),
+        (0, 2),
+    ]
+    # A null normal leaves the polygon as it is.
+    vertices, counts = clip_polygons(
+        polygons, np.array([[np.nan, np.nan]]), np.array([np.nan])
+    )
+    assert counts.tolist() == [4]
+    assert vertices[0].tolist() == square[0].tolist()
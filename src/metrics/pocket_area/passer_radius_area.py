@@ -1,13 +1,27 @@
 import math
 from typing import Dict, List, Tuple
 
+import numpy as np
+
 from src.metrics.pocket_area.base import (
     InvalidPocketError,
     PocketArea,
     PocketAreaMetadata,
+    PocketRole,
     Point,
+    get_failed_pocket_area,
+)
+from src.metrics.pocket_area.batch import (
+    FrameBatch,
+    get_passer_points,
+    get_role_points,
+)
+from src.metrics.pocket_area.helpers import (
+    get_distances,
+    get_location,
+    points_from_records,
+    split_records_to_points_by_role,
 )
-from src.metrics.pocket_area.helpers import get_distance, split_records_by_role
 
 PlayerAndDistance = Tuple[Dict, float]
 
@@ -17,16 +31,44 @@ def find_closest_player(point: Dict, players: List[Dict]) -> PlayerAndDistance:
     if not players:
         raise InvalidPocketError("No players in input.")
 
-    closest_player: Dict = {}
-    closest_distance = float("inf")
+    origin = np.array(get_location(point), dtype=float)
+    closest_idx, closest_distance = find_closest_point(
+        origin, points_from_records(players)
+    )
+    return players[closest_idx], closest_distance
+
+
+def find_closest_point(
+    point: np.ndarray, points: np.ndarray
+) -> Tuple[int, float]:
+    """
+    Returns the index of the closest point to the given point and the distance.
+    If there is a tie, the first of the closest points is returned.
+    """
+    if len(points) == 0:
+        raise InvalidPocketError("No players in input.")
+
+    distances = get_distances(points, point)
+    closest_idx = int(np.argmin(distances))
+    return closest_idx, float(distances[closest_idx])
 
-    for player in players:
-        d = get_distance(point, player)
-        if d < closest_distance or not closest_player:
-            closest_player = player
-            closest_distance = d
 
-    return closest_player, closest_distance
+def find_closest_points(distances: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the index of the closest point in each frame and the distance, given
+    a matrix of distances of shape (frames, n) padded with np.nan. If there is a
+    tie, the first of the closest points is returned. Frames without any points
+    get a distance of np.nan.
+    """
+    n_frames = distances.shape[0]
+    if distances.shape[1] == 0:
+        return np.zeros(n_frames, dtype=int), np.full(n_frames, np.nan)
+
+    closest_indices = np.argmin(
+        np.where(np.isnan(distances), np.inf, distances), axis=1
+    )
+    closest_distances = distances[np.arange(n_frames), closest_indices]
+    return closest_indices, closest_distances
 
 
 def get_circle_area(radius: float) -> float:
@@ -40,17 +82,53 @@ def get_passer_radius_area(frame: List[Dict]) -> PocketArea:
     Estimates the pocket area as the area of a circle where the radius is the
     distance from the passer to the closest rusher.
     """
-    passer, blockers, rushers = split_records_by_role(frame)
-    if not rushers:
+    passer, blockers, rushers = split_records_to_points_by_role(frame)
+    if len(rushers) == 0:
         raise InvalidPocketError("No rushers in frame.")
 
-    closest_rusher, distance = find_closest_player(passer, rushers)
-    area = get_circle_area(radius=distance)
-
-    px, py = passer["x"], passer["y"]
-    if px is None or py is None:
+    if np.isnan(passer).any():
         raise InvalidPocketError("Missing x, y coordinates for passer.")
-    center: Point = (px, py)
 
+    return get_passer_radius_area_from_points(passer, blockers, rushers)
+
+
+def get_passer_radius_area_from_points(
+    passer: np.ndarray, blockers: np.ndarray, rushers: np.ndarray
+) -> PocketArea:
+    """
+    Array version of get_passer_radius_area(), for the coordinates of the
+    passer, blockers, and rushers in one frame.
+    """
+    if len(rushers) == 0:
+        raise InvalidPocketError("No rushers in frame.")
+
+    _, distance = find_closest_point(passer, rushers)
+    area = get_circle_area(radius=distance)
+
+    center: Point = (passer[0], passer[1])
     metadata = PocketAreaMetadata(radius=distance, center=center)
     return PocketArea(area, metadata)
+
+
+def get_passer_radius_area_batch(batch: FrameBatch) -> List[PocketArea]:
+    """
+    Batch version of get_passer_radius_area(), which finds the closest rusher
+    in every frame at once.
+    """
+    passers = get_passer_points(batch)
+    rushers = get_role_points(batch, PocketRole.RUSHER)
+    _, distances = find_closest_points(get_distances(rushers, passers))
+    areas = math.pi * (distances * distances)
+
+    pockets = []
+    for passer, distance, area in zip(passers, distances, areas):
+        # Frames without a passer or without rushers have no pocket, like the
+        # errors raised by get_passer_radius_area().
+        if np.isnan(passer[0]) or np.isnan(distance):
+            error = InvalidPocketError("No passer or rushers in frame.")
+            pockets.append(get_failed_pocket_area(error))
+            continue
+        center: Point = (passer[0], passer[1])
+        metadata = PocketAreaMetadata(radius=float(distance), center=center)
+        pockets.append(PocketArea(float(area), metadata))
+    return pockets
@@ -1,7 +1,12 @@
+import numpy as np
 import pytest
 
 from src.metrics.pocket_area.helpers import InvalidPocketError
-from src.metrics.pocket_area.passer_radius_area import get_passer_radius_area
+from src.metrics.pocket_area.passer_radius_area import (
+    find_closest_player,
+    find_closest_points,
+    get_passer_radius_area,
+)
 
 
 def test_get_passer_radius_area():
@@ -24,3 +29,42 @@ def test_get_passer_radius_area_no_rushers():
     expected = "No rushers in frame."
     with pytest.raises(InvalidPocketError, match=expected):
         get_passer_radius_area(frame)
+
+
+def test_get_passer_radius_area_missing_passer_coordinates():
+    frame = [
+        {"role": "passer", "x": None, "y": 0},
+        {"role": "rusher", "x": 0, "y": 2},
+    ]
+
+    expected = "Missing x, y coordinates for passer."
+    with pytest.raises(InvalidPocketError, match=expected):
+        get_passer_radius_area(frame)
+
+
+def test_find_closest_player_tie():
+    players = [
+        {"role": "rusher", "x": 0, "y": 3},
+        {"role": "rusher", "x": 0, "y": -2},
+        {"role": "rusher", "x": 2, "y": 0},
+    ]
+    # If there is a tie, the first of the closest players is returned.
+    actual_player, actual_distance = find_closest_player(
+        {"x": 0, "y": 0}, players
+    )
+    assert actual_player == {"role": "rusher", "x": 0, "y": -2}
+    assert actual_distance == pytest.approx(2)
+
+
+def test_find_closest_points():
+    distances = np.array(
+        [
+            [3.0, 2.0, 2.0],
+            [np.nan, 1.0, np.nan],
+            [np.nan, np.nan, np.nan],
+        ]
+    )
+    actual_indices, actual_distances = find_closest_points(distances)
+    assert actual_indices[:2].tolist() == [1, 1]
+    assert actual_distances[:2].tolist() == [2.0, 1.0]
+    assert np.isnan(actual_distances[2])
@@ -1,50 +1,51 @@
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 from scipy.spatial import ConvexHull
-from shapely import Polygon
 
 from src.metrics.pocket_area.base import (
     InvalidPocketError,
     PocketArea,
     PocketAreaMetadata,
+    get_failed_pocket_area,
 )
+from src.metrics.pocket_area.batch import FrameBatch
 from src.metrics.pocket_area.helpers import (
+    PolygonArrays,
+    clip_polygons,
     get_distance,
     get_location,
-    split_records_by_role,
-    vertices_from_shape,
+    get_polygon_areas,
+    get_polygon_vertices,
+    polygon_arrays_from_vertices,
+    split_points_by_role,
+    split_records_to_points_by_role,
 )
-from src.pipeline.tasks.constants import FIELD_WIDTH
+
+
+def limit_polygons_to_line_of_scrimmage(
+    polygons: PolygonArrays,
+) -> PolygonArrays:
+    """
+    Crops each polygon to the area behind the line of scrimmage (y <= 0), for
+    all polygons at once. A polygon entirely past the line of scrimmage has
+    no vertices left, and so an area of 0, as with the Shapely crop that this
+    replaces.
+    """
+    n_polygons = len(polygons[1])
+    normals = np.tile([0.0, 1.0], (n_polygons, 1))
+    return clip_polygons(polygons, normals, np.zeros(n_polygons))
 
 
 def limit_vertices_to_line_of_scrimmage(
     vertices: List[Tuple[float, float]]
 ) -> List[Tuple[float, float]]:
-    # If y coordinates do not cross line of scrimmage, no changes needed.
-    max_y = max([p[1] for p in vertices])
-    if max_y <= 0:
-        return vertices
-
-    # Create crop box to cut off area above line of scrimmage.
-    # Use double the width of the field to ensure full crop.
-    min_x = -1 * FIELD_WIDTH
-    max_x = FIELD_WIDTH
-    crop = [
-        (min_x, 0),
-        (max_x, 0),
-        (max_x, max_y),
-        (min_x, max_y),
-    ]
-
-    # Crop area past line of scrimmage.
-    crop_rect = Polygon(crop)
-    polygon = Polygon(vertices)
-    pocket = polygon.difference(crop_rect)
-
-    # Return vertices for cropped pocket.
-    cropped_vertices = vertices_from_shape(pocket)
-    return cropped_vertices
+    polygons = polygon_arrays_from_vertices(
+        [np.array(vertices, dtype=float).reshape(-1, 2)]
+    )
+    return get_polygon_vertices(
+        limit_polygons_to_line_of_scrimmage(polygons), 0
+    )
 
 
 def get_convex_hull(
@@ -54,33 +55,202 @@ def get_convex_hull(
     for player in frame:
         pocket.append(get_location(player))
     pocket = np.array(pocket)
-    hull = ConvexHull(pocket)
-    hull_points = pocket[hull.vertices]
-    hull_vertices: List[Tuple[float, float]] = [
-        (p[0], p[1]) for p in hull_points
+    return get_convex_hull_from_points(pocket)
+
+
+# Smallest turn, as the cross product of two edges in square yards, for a
+# reused hull to count as convex and for other points to count as inside, so
+# that points on or near the hull boundary are left to Qhull to resolve.
+HULL_TOLERANCE = 1e-9
+
+
+def is_convex_hull(
+    points: np.ndarray,
+    vertices: np.ndarray,
+    tolerance: float = HULL_TOLERANCE,
+) -> bool:
+    """
+    Checks whether the points at the vertex indices, in counterclockwise
+    order, are the convex hull of all the points: every point, including the
+    other vertices, is strictly to the left of every edge along the hull.
+    Checking only the turns at each vertex is not enough, because the vertices
+    of a star polygon all turn left, but wind around more than once.
+
+    Uses plain Python, which is faster than NumPy for a handful of points.
+    """
+    coordinates = points.tolist()
+    n = len(vertices)
+    if n < 3:
+        return False
+    for i in range(n):
+        a, b = vertices[i], vertices[(i + 1) % n]
+        ax, ay = coordinates[a]
+        bx, by = coordinates[b]
+        ex, ey = bx - ax, by - ay
+        for j, (px, py) in enumerate(coordinates):
+            if j == a or j == b:
+                continue
+            if ex * (py - ay) - ey * (px - ax) <= tolerance:
+                return False
+    return True
+
+
+class IncrementalConvexHull:
+    """
+    Convex hull of points that move a little from one call to the next, such
+    as the players in consecutive frames of a play. Before computing a new
+    hull with Qhull, checks whether the vertices of the previous hull are
+    still the hull of the new points, which is much cheaper.
+
+    The check is exact, so the result does not depend on whether the points
+    are the same players as in the previous call, only the speed does: the
+    hull has the same vertices in the same counterclockwise order as a hull
+    from scratch, starting from the vertex with the lowest index instead of
+    the vertex that Qhull starts from. Reset the hull between plays, since
+    the players of another play are not expected to have the same hull.
+    """
+
+    def __init__(self, tolerance: float = HULL_TOLERANCE):
+        self.tolerance = tolerance
+        self.vertices: Optional[List[int]] = None
+        self.n_points = 0
+        self.reused = 0
+        self.computed = 0
+
+    def reset(self):
+        """Forgets the previous hull, so that the next hull is computed."""
+        self.vertices = None
+        self.n_points = 0
+
+    def get_vertices(self, points: np.ndarray) -> List[int]:
+        """
+        Returns the indices of the points on the convex hull, in
+        counterclockwise order.
+        """
+        if (
+            self.vertices is not None
+            and len(points) == self.n_points
+            and is_convex_hull(points, self.vertices, self.tolerance)
+        ):
+            self.reused += 1
+            return self.vertices
+
+        vertices = ConvexHull(points).vertices.tolist()
+        start = vertices.index(min(vertices))
+        self.vertices = vertices[start:] + vertices[:start]
+        self.n_points = len(points)
+        self.computed += 1
+        return self.vertices
+
+
+def get_convex_hull_points(
+    pocket: np.ndarray,
+    hull: Optional[IncrementalConvexHull] = None,
+) -> np.ndarray:
+    """
+    Returns the vertices of the convex hull of the points, in counterclockwise
+    order. If an incremental hull is given, uses it to reuse the hull from its
+    previous call when possible.
+    """
+    if hull is None:
+        return pocket[ConvexHull(pocket).vertices]
+    return pocket[hull.get_vertices(pocket)]
+
+
+def get_cropped_convex_hulls(
+    hull_points: List[np.ndarray],
+) -> List[Tuple[float, List[Tuple[float, float]]]]:
+    """
+    Returns the area and vertices of each convex hull, given the vertices from
+    get_convex_hull_points(), after cropping all of them to the line of
+    scrimmage at once. Hulls entirely past the line of scrimmage have an area
+    of 0 and no vertices.
+    """
+    polygons = limit_polygons_to_line_of_scrimmage(
+        polygon_arrays_from_vertices(hull_points)
+    )
+    areas = get_polygon_areas(polygons).tolist()
+    return [
+        (area, get_polygon_vertices(polygons, i))
+        for i, area in enumerate(areas)
     ]
 
-    # Make sure the pocket does not extend past the line of scrimmage.
-    vertices = limit_vertices_to_line_of_scrimmage(hull_vertices)
 
-    # For consistency, always use Shapely to compute polygon area, in case the
-    # vertices were cropped.
-    hull_polygon = Polygon(vertices)
-    area = hull_polygon.area
-    return area, vertices
+def get_convex_hull_from_points(
+    pocket: np.ndarray,
+    hull: Optional[IncrementalConvexHull] = None,
+) -> Tuple[float, List[Tuple[float, float]]]:
+    """
+    Returns the area and vertices of the convex hull of the points, cropped
+    to the line of scrimmage. If an incremental hull is given, uses it to
+    reuse the hull from its previous call when possible.
+    """
+    return get_cropped_convex_hulls([get_convex_hull_points(pocket, hull)])[0]
 
 
 def get_passBlocker_convexHull_area(frame: List[Dict]) -> PocketArea:
     """
     Estimates the pocket area as the convex hull of all the pass blockers on the field
     """
-    passer, blockers, rushers = split_records_by_role(frame)
-    if not blockers:
-        raise InvalidPocketError("No blockers in frame to make pocket.")
-    if not passer:
-        raise InvalidPocketError("No passer in frame.")
+    return get_passBlocker_convexHull_area_from_points(
+        *split_records_to_points_by_role(frame)
+    )
 
-    pocket_players = blockers + [passer]
-    area, vertices = get_convex_hull(pocket_players)
+
+def get_passBlocker_convexHull_area_from_points(
+    passer: np.ndarray,
+    blockers: np.ndarray,
+    rushers: np.ndarray,
+    hull: Optional[IncrementalConvexHull] = None,
+) -> PocketArea:
+    """
+    Array version of get_passBlocker_convexHull_area(), for the coordinates of
+    the passer, blockers, and rushers in one frame.
+    """
+    pocket_points = get_passBlocker_pocket_points(passer, blockers)
+    area, vertices = get_convex_hull_from_points(pocket_points, hull)
     metadata = PocketAreaMetadata(vertices=vertices)
     return PocketArea(area, metadata)
+
+
+def get_passBlocker_pocket_points(
+    passer: np.ndarray, blockers: np.ndarray
+) -> np.ndarray:
+    """Returns the points to take the convex hull of for the pocket."""
+    if len(blockers) == 0:
+        raise InvalidPocketError("No blockers in frame to make pocket.")
+    return np.vstack([blockers, passer])
+
+
+def get_passBlocker_convexHull_area_batch(
+    batch: FrameBatch, incremental: bool = False
+) -> List[PocketArea]:
+    """
+    Batch version of get_passBlocker_convexHull_area(), which computes the
+    hull of each frame, then crops all the hulls to the line of scrimmage and
+    computes their areas at once. If incremental, reuses the hull of the
+    previous frame of the same play when it is still the hull, which is the
+    case for most consecutive frames of a play.
+    """
+    hull = IncrementalConvexHull() if incremental else None
+    is_play_start = batch.get_play_starts()
+    pockets = [PocketArea(np.nan) for _ in range(len(batch))]
+    hull_frames = []
+    hull_points = []
+    for i, (x, y, role) in enumerate(batch.iter_frames()):
+        if hull is not None and is_play_start[i]:
+            hull.reset()
+        # Frames where the hull cannot be calculated get a failed pocket.
+        try:
+            passer, blockers, _ = split_points_by_role(x, y, role)
+            pocket_points = get_passBlocker_pocket_points(passer, blockers)
+            hull_points.append(get_convex_hull_points(pocket_points, hull))
+            hull_frames.append(i)
+        except Exception as ex:
+            pockets[i] = get_failed_pocket_area(ex)
+
+    hulls = get_cropped_convex_hulls(hull_points)
+    for i, (area, vertices) in zip(hull_frames, hulls):
+        metadata = PocketAreaMetadata(vertices=vertices)
+        pockets[i] = PocketArea(area, metadata)
+    return pockets
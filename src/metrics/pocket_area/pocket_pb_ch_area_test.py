@@ -1,8 +1,16 @@
+import numpy as np
 import pytest
+from scipy.spatial import ConvexHull
 
+from src.metrics.pocket_area.batch import frame_batch_from_records
 from src.metrics.pocket_area.helpers import InvalidPocketError
 from src.metrics.pocket_area.pocket_pb_ch_area import (
+    IncrementalConvexHull,
+    get_cropped_convex_hulls,
     get_passBlocker_convexHull_area,
+    get_passBlocker_convexHull_area_batch,
+    is_convex_hull,
+    limit_vertices_to_line_of_scrimmage,
 )
 
 
@@ -17,3 +25,139 @@ def test_get_get_passBlocker_convexHull_area():
     actual = get_passBlocker_convexHull_area(frame)
     assert actual.area == pytest.approx(25)
     assert actual.metadata.vertices == [(0, -5), (5, -5), (5, 0), (0, 0)]
+
+
+def test_limit_vertices_to_line_of_scrimmage():
+    vertices = [(0, -2), (2, -2), (2, 2), (0, 2)]
+    assert limit_vertices_to_line_of_scrimmage(vertices) == [
+        (0, -2),
+        (2, -2),
+        (2, 0),
+        (0, 0),
+    ]
+    # Vertices behind the line of scrimmage are unchanged.
+    vertices = [(0, -2), (2, -2), (2, 0)]
+    assert limit_vertices_to_line_of_scrimmage(vertices) == vertices
+    # Vertices entirely past the line of scrimmage are all removed.
+    vertices = [(0, 1), (2, 1), (2, 3), (0, 3)]
+    assert limit_vertices_to_line_of_scrimmage(vertices) == []
+
+
+def test_get_passBlocker_convexHull_area_past_line_of_scrimmage():
+    frame = [
+        {"role": "passer", "x": 0, "y": 1},
+        {"role": "blocker", "x": 0, "y": 3},
+        {"role": "blocker", "x": 2, "y": 2},
+    ]
+    # The pocket has an area of 0 and no vertices, in both versions.
+    actual = get_passBlocker_convexHull_area(frame)
+    assert actual.area == 0
+    assert actual.metadata.vertices == []
+    [actual_batch] = get_passBlocker_convexHull_area_batch(
+        frame_batch_from_records([frame])
+    )
+    assert actual_batch == actual
+
+
+def test_get_cropped_convex_hulls():
+    hulls = get_cropped_convex_hulls(
+        [
+            np.array([(0, -2), (2, -2), (2, 2), (0, 2)], dtype=float),
+            np.array([(0, -1), (3, -1), (0, 1)], dtype=float),
+            np.array([(0, 1), (1, 1), (1, 2)], dtype=float),
+        ]
+    )
+    assert [area for area, _ in hulls] == [4, 2.25, 0]
+    assert hulls[1][1] == [(0, -1), (3, -1), (1.5, 0), (0, 0)]
+    # A hull entirely past the line of scrimmage has no area left.
+    assert hulls[2][1] == []
+
+
+def test_is_convex_hull():
+    points = np.array([(0, 0), (4, 0), (4, 4), (0, 4), (2, 2)], dtype=float)
+    assert is_convex_hull(points, [0, 1, 2, 3])
+    # Same hull from another starting vertex.
+    assert is_convex_hull(points, [2, 3, 0, 1])
+    # Clockwise order.
+    assert not is_convex_hull(points, [3, 2, 1, 0])
+    # Missing a vertex.
+    assert not is_convex_hull(points, [0, 1, 2])
+    # A point on the boundary is left to Qhull.
+    points[4] = (2, 0)
+    assert not is_convex_hull(points, [0, 1, 2, 3])
+
+
+def test_is_convex_hull_star_polygon():
+    # Every turn of a pentagram is to the left, but it is not the hull.
+    angles = np.pi / 2 + 2 * np.pi * np.arange(5) / 5
+    points = np.column_stack([np.cos(angles), np.sin(angles)])
+    assert is_convex_hull(points, [0, 1, 2, 3, 4])
+    assert not is_convex_hull(points, [0, 2, 4, 1, 3])
+
+
+def test_incremental_convex_hull_matches_from_scratch():
+    rng = np.random.default_rng(0)
+    points = rng.normal(size=(8, 2)) * 3
+    velocities = rng.normal(size=(8, 2)) * 0.05
+    hull = IncrementalConvexHull()
+    for _ in range(60):
+        points = points + velocities
+        expected = ConvexHull(points).vertices.tolist()
+        actual = hull.get_vertices(points)
+        # Same vertices in the same order, from the lowest index.
+        start = expected.index(min(expected))
+        assert actual == expected[start:] + expected[:start]
+
+    assert hull.computed + hull.reused == 60
+    assert hull.reused > hull.computed
+
+
+def test_incremental_convex_hull_reset():
+    points = np.array([[0.0, 0.0], [1.0, 0.0], [0.0, 1.0], [0.2, 0.2]])
+    hull = IncrementalConvexHull()
+    hull.get_vertices(points)
+    hull.get_vertices(points)
+    hull.reset()
+    assert hull.get_vertices(points) == [0, 1, 2]
+    assert (hull.computed, hull.reused) == (2, 1)
+
+
+def test_get_passBlocker_convexHull_area_batch_incremental():
+    rng = np.random.default_rng(1)
+    frames = []
+    blockers = rng.uniform(-5, 0, size=(5, 2))
+    for _ in range(30):
+        blockers = blockers + rng.normal(size=(5, 2)) * 0.02
+        frames.append(
+            [{"role": "passer", "x": 0.0, "y": -6.0}]
+            + [{"role": "blocker", "x": x, "y": y} for x, y in blockers]
+        )
+    batch = frame_batch_from_records(frames)
+    expected = get_passBlocker_convexHull_area_batch(batch)
+    actual = get_passBlocker_convexHull_area_batch(batch, incremental=True)
+    for pocket, expected_pocket in zip(actual, expected):
+        assert pocket.area == pytest.approx(expected_pocket.area, rel=1e-12)
+        assert set(pocket.metadata.vertices) == set(
+            expected_pocket.metadata.vertices
+        )
+
+
+def test_get_passBlocker_convexHull_area_batch_resets_each_play(monkeypatch):
+    frame = [
+        {"role": "passer", "x": 0.0, "y": -6.0},
+        {"role": "blocker", "x": -2.0, "y": -1.0},
+        {"role": "blocker", "x": 2.0, "y": -1.0},
+    ]
+    batch = frame_batch_from_records([frame] * 4)
+    batch.is_play_start = np.array([True, False, True, False])
+    resets = []
+    reset = IncrementalConvexHull.reset
+
+    def count_reset(self):
+        resets.append(len(resets))
+        reset(self)
+
+    monkeypatch.setattr(IncrementalConvexHull, "reset", count_reset)
+    actual = get_passBlocker_convexHull_area_batch(batch, incremental=True)
+    assert len(resets) == 2
+    assert [pocket.area for pocket in actual] == [pytest.approx(10)] * 4
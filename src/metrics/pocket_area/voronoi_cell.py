@@ -0,0 +1,159 @@
+from typing import List
+
+import numpy as np
+
+from src.metrics.pocket_area.base import (
+    InvalidPocketError,
+    PocketArea,
+    PocketAreaMetadata,
+    get_failed_pocket_area,
+)
+from src.metrics.pocket_area.helpers import (
+    PolygonArrays,
+    clip_polygons,
+    get_polygon_areas,
+    get_polygon_vertices,
+)
+from src.pipeline.tasks.constants import FIELD_LENGTH, FIELD_WIDTH
+
+# Adjusted for centered coordinates, not exactly correct because of hash marks,
+# but close enough to be approximate.
+FIELD_WIDTH_MIN = -1 * (FIELD_WIDTH / 2.0)
+FIELD_WIDTH_MAX = FIELD_WIDTH / 2.0
+
+# How much pocket depth can be behind the passer.
+POCKET_MAX_DEPTH_BEHIND_PASSER = 1
+# How much pocket width can be to either side of the passer.
+POCKET_MAX_SIDE_WIDTH = 5
+
+# Distance from the passer to the sides of the starting cell that are not
+# bounded by a ghost point. If the final cell still touches one of these sides,
+# the Voronoi region of the passer is unbounded.
+UNBOUNDED_DISTANCE = float(FIELD_LENGTH)
+
+
+def get_ghost_points(passers: np.ndarray) -> np.ndarray:
+    """
+    Returns the fake points that keep the pocket of each passer bounded, as an
+    array of shape (frames, 4, 2), for passers of shape (frames, 2).
+    """
+    px, py = passers[:, 0], passers[:, 1]
+    min_x = np.maximum(FIELD_WIDTH_MIN, px - (2 * POCKET_MAX_SIDE_WIDTH))
+    max_x = np.minimum(FIELD_WIDTH_MAX, px + (2 * POCKET_MAX_SIDE_WIDTH))
+    return np.stack(
+        [
+            # Limit pocket area behind passer. Double the max depth behind
+            # passer so that the pocket boundary will fall at the midpoint.
+            np.column_stack([px, py - (2 * POCKET_MAX_DEPTH_BEHIND_PASSER)]),
+            # Limit pocket area in front of passer to line of scrimmage (y = 0).
+            np.column_stack([px, np.zeros_like(py)]),
+            # Limit pocket area to sides of passer. Double the max side width
+            # so that the pocket boundary will fall at the midpoint.
+            np.column_stack([max_x, py]),
+            np.column_stack([min_x, py]),
+        ],
+        axis=1,
+    )
+
+
+def get_starting_cells(passers: np.ndarray) -> PolygonArrays:
+    """
+    Returns the rectangle around each passer where the passer is closer than
+    to any of the ghost points, which are all directly in front of, behind, or
+    to the side of the passer.
+    """
+    ghosts = get_ghost_points(passers)
+    offsets = ghosts - passers[:, np.newaxis, :]
+    midpoints = (ghosts + passers[:, np.newaxis, :]) / 2
+    bounds = []
+    for axis in [0, 1]:
+        center = passers[:, axis]
+        lower = np.where(offsets[..., axis] < 0, midpoints[..., axis], -np.inf)
+        upper = np.where(offsets[..., axis] > 0, midpoints[..., axis], np.inf)
+        lower = lower.max(axis=1)
+        upper = upper.min(axis=1)
+        bounds.append(
+            (
+                np.where(np.isinf(lower), center - UNBOUNDED_DISTANCE, lower),
+                np.where(np.isinf(upper), center + UNBOUNDED_DISTANCE, upper),
+            )
+        )
+    (min_x, max_x), (min_y, max_y) = bounds
+    vertices = np.stack(
+        [
+            np.column_stack([min_x, min_y]),
+            np.column_stack([max_x, min_y]),
+            np.column_stack([max_x, max_y]),
+            np.column_stack([min_x, max_y]),
+        ],
+        axis=1,
+    )
+    return vertices, np.full(len(passers), 4)
+
+
+def get_passer_cells(passers: np.ndarray, sites: np.ndarray) -> PolygonArrays:
+    """
+    Returns the Voronoi cell of each passer among the other players and the
+    ghost points, for passers of shape (frames, 2) and other players of shape
+    (frames, players, 2), padded with np.nan.
+
+    Only the passer's cell is computed, as the intersection of the rectangle
+    from the ghost points with the half-plane of points closer to the passer
+    than to each player, instead of building the Voronoi diagram of all
+    players. Frames without a passer have an empty cell.
+    """
+    cells = get_starting_cells(passers)
+    for k in range(sites.shape[1]):
+        site = sites[:, k, :]
+        # Points p closer to the passer than to the site satisfy
+        # (site - passer) . p <= (|site|^2 - |passer|^2) / 2.
+        normals = site - passers
+        limits = ((site**2).sum(axis=1) - (passers**2).sum(axis=1)) / 2
+        cells = clip_polygons(cells, normals, limits)
+
+    vertices, counts = cells
+    counts = np.where(np.isnan(passers).any(axis=1), 0, counts)
+    return vertices, counts
+
+
+def get_passer_cell_pockets(
+    passers: np.ndarray, sites: np.ndarray
+) -> List[PocketArea]:
+    """
+    Returns the pocket of each frame as the Voronoi cell of the passer, with
+    the same shapes as get_passer_cells(). Frames without a passer, or where
+    the cell is not bounded by the ghost points and other players, get a
+    failed pocket with an area of np.nan.
+    """
+    vertices, counts = get_passer_cells(passers, sites)
+    areas = get_polygon_areas((vertices, counts))
+    # Cells that still touch the sides of the starting cell that were not
+    # bounded by a ghost point would be unbounded.
+    far = np.abs(vertices - passers[:, np.newaxis, :]) >= UNBOUNDED_DISTANCE
+    is_bounded = ~far.any(axis=2).any(axis=1)
+
+    pockets = []
+    for i, count in enumerate(counts.tolist()):
+        if count < 3 or not is_bounded[i]:
+            error = InvalidPocketError("Passer cell is not bounded.")
+            pockets.append(get_failed_pocket_area(error))
+            continue
+        metadata = PocketAreaMetadata(
+            vertices=get_polygon_vertices((vertices, counts), i)
+        )
+        pockets.append(PocketArea(float(areas[i]), metadata))
+    return pockets
+
+
+def get_passer_cell_pocket(passer: np.ndarray, sites: np.ndarray) -> PocketArea:
+    """
+    Returns the pocket of one frame as the Voronoi cell of the passer among
+    the other players, for a passer of shape (2,) and players of shape (n, 2).
+    """
+    sites = np.asarray(sites, dtype=float).reshape(-1, 2)
+    pocket = get_passer_cell_pockets(
+        np.asarray(passer, dtype=float)[np.newaxis, :], sites[np.newaxis, :, :]
+    )[0]
+    if np.isnan(pocket.area):
+        raise InvalidPocketError("Passer cell is not bounded.")
+    return pocket
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from scipy.spatial import Voronoi
+from shapely import Polygon
+
+from src.metrics.pocket_area.base import InvalidPocketError
+from src.metrics.pocket_area.voronoi_cell import (
+    get_ghost_points,
+    get_passer_cell_pocket,
+    get_passer_cell_pockets,
+)
+
+
+def get_voronoi_area(passer: np.ndarray, sites: np.ndarray) -> float:
+    """Area of the passer's region in the full Voronoi diagram."""
+    ghosts = get_ghost_points(passer[np.newaxis, :])[0]
+    vor = Voronoi(np.vstack([[passer], sites, ghosts]))
+    region = vor.regions[vor.point_region[0]]
+    if -1 in region:
+        return np.nan
+    return Polygon(vor.vertices[region]).area
+
+
+def test_get_passer_cell_pocket():
+    pocket = get_passer_cell_pocket(
+        np.array([15.0, 5.0]),
+        np.array([[11.0, 9.0], [19.0, 9.0], [11.0, 1.0], [19.0, 1.0]]),
+    )
+    assert pocket.area == pytest.approx(23)
+    assert pocket.metadata.vertices == [
+        (12, 4),
+        (18, 4),
+        (19, 5),
+        (15, 9),
+        (11, 5),
+    ]
+
+
+def test_get_passer_cell_pocket_unbounded():
+    # Passer past the line of scrimmage with nobody in front.
+    with pytest.raises(InvalidPocketError):
+        get_passer_cell_pocket(np.array([0.0, 2.0]), np.array([[0.0, -3.0]]))
+
+
+def test_get_passer_cell_pockets_match_voronoi():
+    rng = np.random.default_rng(0)
+    n_frames = 200
+    passers = np.column_stack(
+        [rng.uniform(-20, 20, n_frames), rng.uniform(-10, -1, n_frames)]
+    )
+    sites = rng.uniform(-10, 10, size=(n_frames, 9, 2))
+    sites[..., 0] += passers[:, np.newaxis, 0]
+    sites[..., 1] -= 3
+    # Frames with fewer players are padded with np.nan.
+    sites[rng.random((n_frames, 9)) < 0.1] = np.nan
+    passers[0] = np.nan
+
+    pockets = get_passer_cell_pockets(passers, sites)
+    assert np.isnan(pockets[0].area)
+    for passer, frame_sites, pocket in zip(passers[1:], sites[1:], pockets[1:]):
+        frame_sites = frame_sites[~np.isnan(frame_sites).any(axis=1)]
+        assert pocket.area == pytest.approx(
+            get_voronoi_area(passer, frame_sites), rel=1e-9
+        )
+        # Vertices are in counterclockwise order.
+        assert Polygon(pocket.metadata.vertices).exterior.is_ccw
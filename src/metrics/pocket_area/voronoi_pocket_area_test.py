@@ -17,8 +17,8 @@ def test_voronoi_pocket_area():
     assert pocket_area.area == pytest.approx(23)
     assert pocket_area.metadata.vertices == [
         (12, 4),
-        (11, 5),
-        (15, 9),
-        (19, 5),
         (18, 4),
+        (19, 5),
+        (15, 9),
+        (11, 5),
     ]
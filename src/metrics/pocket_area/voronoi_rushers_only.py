@@ -1,54 +1,42 @@
 from typing import Dict, List
 
-from scipy.spatial import Voronoi
-from shapely import Polygon
+import numpy as np
 
-from src.metrics.pocket_area.base import PocketArea, PocketAreaMetadata
-from src.metrics.pocket_area.helpers import split_records_by_role
-from src.pipeline.tasks.constants import FIELD_WIDTH
-
-# Adjusted for centered coordinates, not exactly correct because of hash marks,
-# but close enough to be approximate.
-FIELD_WIDTH_MIN = -1 * (FIELD_WIDTH / 2.0)
-FIELD_WIDTH_MAX = FIELD_WIDTH / 2.0
+from src.metrics.pocket_area.base import PocketArea, PocketRole
+from src.metrics.pocket_area.batch import (
+    FrameBatch,
+    get_passer_points,
+    get_role_points,
+)
+from src.metrics.pocket_area.helpers import split_records_to_points_by_role
+from src.metrics.pocket_area.voronoi_cell import (
+    get_passer_cell_pocket,
+    get_passer_cell_pockets,
+)
 
 
 def voronoi_rushers_only(players: List[Dict]) -> PocketArea:
-
-    passer, _, rushers = split_records_by_role(players)
-    # How much pocket depth can be behind the passer.
-    pocket_max_depth_behind_passer = 1
-    # How much pocket width can be to either side of the passer.
-    pocket_max_side_width = 5
-    min_x = max(FIELD_WIDTH_MIN, passer["x"] - (2 * pocket_max_side_width))
-    max_x = min(FIELD_WIDTH_MAX, passer["x"] + (2 * pocket_max_side_width))
-    # Add fake points to keep the pocket bounded.
-    ghost_points = [
-        # Limit pocket area behind passer. Double the max depth behind passer
-        # so that the pocket boundary will fall at the midpoint.
-        (passer["x"], passer["y"] - (2 * pocket_max_depth_behind_passer)),
-        # Limit pocket area in front of passer to line of scrimmage (y = 0).
-        (passer["x"], 0),
-        # Limit pocket area to sides of passer. Double the max side width so
-        # that the pocket boundary will fall at the midpoint.
-        (max_x, passer["y"]),
-        (min_x, passer["y"]),
-    ]
-
-    pocket_players = [passer] + rushers
-    passer_idx = 0
-    pocket_points = [(p["x"], p["y"]) for p in pocket_players]
-    all_points = pocket_points + ghost_points
-
-    vor = Voronoi(all_points)
-    region_idx = vor.point_region[passer_idx]
-    region_vertices_indices = vor.regions[region_idx]
-    region_vertices = [
-        (vor.vertices[idx][0], vor.vertices[idx][1])
-        for idx in region_vertices_indices
-    ]
-
-    pocket = Polygon(region_vertices)
-    area = pocket.area
-    metadata = PocketAreaMetadata(vertices=region_vertices)
-    return PocketArea(area, metadata)
+    return voronoi_rushers_only_from_points(
+        *split_records_to_points_by_role(players)
+    )
+
+
+def voronoi_rushers_only_from_points(
+    passer: np.ndarray, blockers: np.ndarray, rushers: np.ndarray
+) -> PocketArea:
+    """
+    Array version of voronoi_rushers_only(), for the coordinates of the passer,
+    blockers, and rushers in one frame. The pocket is the Voronoi cell of the
+    passer among the rushers, bounded by ghost points behind, in front of,
+    and to the sides of the passer.
+    """
+    return get_passer_cell_pocket(passer, rushers)
+
+
+def voronoi_rushers_only_batch(batch: FrameBatch) -> List[PocketArea]:
+    """
+    Batch version of voronoi_rushers_only(), which clips the cell of the passer
+    in every frame at once.
+    """
+    sites = get_role_points(batch, PocketRole.RUSHER)
+    return get_passer_cell_pockets(get_passer_points(batch), sites)
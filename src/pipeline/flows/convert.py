@@ -0,0 +1,11 @@
+import sys
+
+sys.path.append("./")
+
+from src.pipeline.tasks.dataframes import convert_raw_data_to_parquet
+
+DEFAULT_INPATH = "/workspace/nflbigdatabowl2023/data/raw"
+DEFAULT_OUTPATH = "/workspace/nflbigdatabowl2023/data/parquet"
+
+if __name__ == "__main__":
+    convert_raw_data_to_parquet(DEFAULT_INPATH, DEFAULT_OUTPATH)
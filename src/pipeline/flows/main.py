@@ -1,28 +1,61 @@
+import functools
+from typing import Callable, Dict, Iterator, Optional, Sequence, Union
+
+import pandas as pd
 from prefect import flow, task, unmapped
 
-from src.metrics.pocket_area.all import POCKET_AREA_METHODS
+from src.metrics.pocket_area.all import (
+    INCREMENTAL_POCKET_AREA_BATCH_METHODS,
+    POCKET_AREA_BATCH_METHODS,
+    POCKET_AREA_METHODS,
+)
+from src.pipeline.flows.profiling import (
+    RUN_REPORT_FILE,
+    StageProfiler,
+    profile_pocket_area_stage,
+    profile_stage,
+)
 from src.pipeline.tasks import (
-    align_tracking_data,
+    TimeWindowSpec,
     augment_tracking_events,
-    calculate_average_pocket_area_loss_per_second,
     calculate_pocket_area,
+    calculate_pocket_area_loss_rates,
+    calculate_pocket_area_parallel,
     center_tracking_data,
     clean_event_data,
-    get_frames_for_time_windows,
+    filter_by_keys,
     get_passer_out_of_pocket,
-    get_play_pocket_metrics,
+    get_play_window_metrics,
     get_pocket_eligibility,
-    limit_by_child_keys,
-    limit_by_keys,
+    get_pocket_grid_data,
+    get_run_window_type,
+    get_spotlight_data,
+    get_tracking_play_keys,
+    get_weeks,
+    normalize_tracking_data,
     read_csv,
-    read_tracking_data,
-    rotate_tracking_data,
+    read_parquet,
+    read_tracking_parquet,
+    read_tracking_parquet_play_keys,
+    read_tracking_week,
+    select_play_keys,
+    select_spotlight_search_columns,
+    split_play_keys_by_game,
+    transform_to_frame_batch,
     transform_to_frames,
     transform_to_records_per_frame,
     transform_to_tracking_display,
     union_dataframes,
     write_csv,
+    write_pocket_areas,
 )
+from src.pipeline.tasks.cache import (
+    DEFAULT_CACHE_MAX_BYTES,
+    StageCache,
+    cache_stage,
+    cache_stage_by_game,
+)
+from src.pipeline.tasks.constants import PLAY_PRIMARY_KEY, TRACKING_COLUMNS
 
 DEFAULT_INPATH = "/workspace/nflbigdatabowl2023/data/raw"
 DEFAULT_OUTPATH = "/workspace/nflbigdatabowl2023/data/outputs"
@@ -39,87 +72,388 @@ def main_flow(**kwargs):
     max_games = kwargs.get("max_games", None)
     # Maximum number of plays per game to process. If None, process all.
     max_plays = kwargs.get("max_plays", None)
+    # Specific game IDs and play IDs to process. If None, process all.
+    game_ids = kwargs.get("game_ids", None)
+    play_ids = kwargs.get("play_ids", None)
     # How far the passer can go along the field width from the ball snap to be
     # considered in the officiating pocket area.
     max_yards_from_snap = kwargs.get("max_yards_from_snap", 7)
     # How many frames to include in the time windows (e.g. x_after_snap,
     # x_before_pass). For example, 20 frames leads to 2 second windows.
+    # Can be a list of sizes, such as [10, 20, 30], to compare window sizes in
+    # one run, in which case each window type has its size in its name.
     window_size_frames = kwargs.get("window_size_frames", 20)
+    # Specification of each time window, by window type. If None, uses
+    # TIME_WINDOW_TYPES.
+    window_types = kwargs.get("window_types", None)
+    # Format of the input data: "csv" for the raw Kaggle files or "parquet" for
+    # the dataset created by convert_raw_data_to_parquet().
+    input_format = kwargs.get("input_format", "csv")
+    # Engine for the pocket area calculations: "records" to pass each frame to
+    # the methods as a list of records, or "batch" to pass all frames to the
+    # batch methods as flat arrays.
+    engine = kwargs.get("engine", "records")
+    # Number of worker processes for the batch engine, which sends the frames
+    # for each game to a worker. If None, uses one worker per CPU.
+    max_workers = kwargs.get("max_workers", 1)
+    # Whether the batch engine reuses the convex hull of the previous frame
+    # when it is still the hull, instead of computing every hull from scratch.
+    incremental_hulls = kwargs.get("incremental_hulls", False)
+    # Directory to cache stage outputs in across runs, so that reruns only
+    # recompute the stages and games whose inputs changed. If None, no cache.
+    cache_dir = kwargs.get("cache_dir", None)
+    # Maximum size of the cache directory in bytes, before the least recently
+    # used outputs are evicted.
+    cache_max_bytes = kwargs.get("cache_max_bytes", DEFAULT_CACHE_MAX_BYTES)
+    # Number of games to process at a time, from reading the tracking data to
+    # writing the outputs, so that peak memory depends on the number of games
+    # per batch instead of the whole season. If None, process all at once.
+    # With CSV input, each week is read once and its games are split into
+    # batches, so batches do not span weeks.
+    games_per_batch = kwargs.get("games_per_batch", None)
+    # Whether to profile each stage and pocket area method and write the
+    # measurements to {outpath}/{RUN_REPORT_FILE}.
+    profile = kwargs.get("profile", False)
+    # Whether to run the spotlight search on the pocket areas and tracking data
+    # of the run and write it to {outpath}/spotlight_search.csv.
+    spotlight = kwargs.get("spotlight", False)
+    # Smallest fraction of pocket area lost over the spotlight window for a
+    # play to be searched, such as 0.99. If None, search all plays.
+    spotlight_min_percentage_change = kwargs.get(
+        "spotlight_min_percentage_change", None
+    )
+    # Window type to search for spotlight moments, which must be one of the
+    # window types of the run, or the name of one to use the first window size.
+    spotlight_window_type = kwargs.get("spotlight_window_type", "before_end")
+    # Whether to rasterize the pocket of each play once for the heatmaps and
+    # write the grids to {outpath}/pocket_grids.csv.
+    pocket_grids = kwargs.get("pocket_grids", False)
+
+    cache = StageCache(cache_dir, cache_max_bytes) if cache_dir else None
+    profiler = StageProfiler() if profile else None
 
     # Read raw data.
-    df_pff = task(read_csv)(f"{inpath}/pffScoutingData.csv")
-    df_plays = task(read_csv)(f"{inpath}/plays.csv")
-    df_tracking_all = task(read_tracking_data)(
-        f"{inpath}/week", weeks=max_weeks
-    )
+    if input_format == "parquet":
+        read_fn = task(profile_stage(profiler, read_parquet))
+        df_pff = read_fn(f"{inpath}/pffScoutingData.parquet")
+        df_plays = read_fn(f"{inpath}/plays.parquet")
+    else:
+        read_fn = task(profile_stage(profiler, read_csv))
+        df_pff = read_fn(f"{inpath}/pffScoutingData.csv")
+        df_plays = read_fn(f"{inpath}/plays.csv")
 
-    # Limit to max weeks, games, and plays per game, if requested.
-    df_tracking_games = task(limit_by_child_keys)(
-        df_tracking_all,
-        parent_keys=["week"],
-        child_keys=["gameId"],
-        n=max_games,
+    # Select the plays to process. Limit to max weeks, games, and plays per
+    # game, and to the requested game and play IDs, if any, while reading, so
+    # that rows for the other plays are not kept.
+    limits = [max_games, max_plays, game_ids, play_ids]
+    select_keys = None
+    if any(limit is not None for limit in limits):
+        select_keys = functools.partial(
+            task(select_play_keys),
+            max_games=max_games,
+            max_plays=max_plays,
+            game_ids=game_ids,
+            play_ids=play_ids,
+        )
+    process_kwargs = dict(
+        max_yards_from_snap=max_yards_from_snap,
+        window_size_frames=window_size_frames,
+        window_types=window_types,
+        engine=engine,
+        max_workers=max_workers,
+        incremental_hulls=incremental_hulls,
+        cache=cache,
+        profiler=profiler,
+        spotlight=spotlight,
+        spotlight_min_percentage_change=spotlight_min_percentage_change,
+        spotlight_window_type=spotlight_window_type,
+        pocket_grids=pocket_grids,
     )
-    df_tracking_limited = task(limit_by_child_keys)(
-        df_tracking_games,
-        parent_keys=["gameId"],
-        child_keys=["playId"],
-        n=max_plays,
+    # Without games per batch, there is one batch with all the selected plays.
+    # Otherwise, process each batch of games end-to-end and append its
+    # outputs, so that only one batch is in memory at a time.
+    if input_format == "parquet":
+        read_batches = read_tracking_parquet_batches
+    else:
+        read_batches = read_tracking_csv_batches
+    tracking_batches = read_batches(
+        inpath, max_weeks, select_keys, games_per_batch, profiler
     )
+    for part, df_tracking_batch in enumerate(tracking_batches):
+        outputs = process_tracking_data(
+            df_tracking_batch, df_pff, df_plays, **process_kwargs
+        )
+        if games_per_batch is None:
+            profile_stage(profiler, write_outputs)(outputs, outpath)
+        else:
+            profile_stage(profiler, write_outputs)(outputs, outpath, part=part)
+
+    if profiler is not None:
+        profiler.write_report(f"{outpath}/{RUN_REPORT_FILE}")
+
+
+def read_tracking_parquet_batches(
+    inpath: str,
+    weeks: int,
+    select_keys: Optional[Callable[[pd.DataFrame], pd.DataFrame]],
+    games_per_batch: Optional[int],
+    profiler: Optional[StageProfiler],
+) -> Iterator[pd.DataFrame]:
+    """
+    Reads the tracking data of the plays that the select function chooses
+    from the play keys, if any, from the Parquet dataset. Returns all the rows
+    at once or, with games per batch, the rows of each batch of games, only
+    loading the partitions of the games of the batch.
+    """
+    inpath = f"{inpath}/tracking"
+    df_play_keys = None
+    if select_keys is not None or games_per_batch is not None:
+        df_play_keys = task(
+            profile_stage(profiler, read_tracking_parquet_play_keys)
+        )(inpath, weeks=weeks)
+        if select_keys is not None:
+            df_play_keys = select_keys(df_play_keys)
+    play_key_batches = [df_play_keys]
+    if games_per_batch is not None:
+        play_key_batches = task(split_play_keys_by_game)(
+            df_play_keys, games_per_batch
+        )
+    for df_batch_play_keys in play_key_batches:
+        yield task(profile_stage(profiler, read_tracking_parquet))(
+            inpath,
+            weeks=weeks,
+            columns=TRACKING_COLUMNS,
+            play_keys=df_batch_play_keys,
+        )
+
+
+def read_tracking_csv_batches(
+    inpath: str,
+    weeks: int,
+    select_keys: Optional[Callable[[pd.DataFrame], pd.DataFrame]],
+    games_per_batch: Optional[int],
+    profiler: Optional[StageProfiler],
+) -> Iterator[pd.DataFrame]:
+    """
+    Reads each week of tracking data once and keeps the rows of the plays
+    that the select function chooses from the play keys of the week, if any.
+    The limits on plays apply within each week, so selecting the plays of
+    each week gives the same plays as selecting from the keys of all weeks.
+    Returns all the rows at once or, with games per batch, the rows of each
+    batch of games of each week, so that only one week is in memory at a time.
+    """
+    dfs = []
+    for week in get_weeks(weeks):
+        df_week = task(profile_stage(profiler, read_tracking_week))(
+            f"{inpath}/week", week, columns=TRACKING_COLUMNS
+        )
+        if select_keys is None and games_per_batch is None:
+            dfs.append(df_week)
+            continue
+        df_play_keys = task(get_tracking_play_keys)(df_week)
+        if select_keys is not None:
+            df_play_keys = select_keys(df_play_keys)
+        if games_per_batch is None:
+            dfs.append(
+                task(filter_by_keys)(df_week, df_play_keys, PLAY_PRIMARY_KEY)
+            )
+            continue
+        play_key_batches = task(split_play_keys_by_game)(
+            df_play_keys, games_per_batch
+        )
+        for df_batch_play_keys in play_key_batches:
+            df_batch = task(filter_by_keys)(
+                df_week, df_batch_play_keys, PLAY_PRIMARY_KEY
+            )
+            yield df_batch.reset_index(drop=True)
+    if games_per_batch is None:
+        yield task(union_dataframes)(dfs)
 
-    # Align and rotate tracking data.
-    df_tracking_aligned = task(align_tracking_data)(df_tracking_limited)
-    df_tracking_rotated = task(rotate_tracking_data)(df_tracking_aligned)
+
+def process_tracking_data(
+    df_tracking_limited: pd.DataFrame,
+    df_pff: pd.DataFrame,
+    df_plays: pd.DataFrame,
+    max_yards_from_snap: float,
+    window_size_frames: Union[int, Sequence[int]],
+    engine: str,
+    max_workers: Optional[int],
+    cache: Optional[StageCache],
+    profiler: Optional[StageProfiler] = None,
+    window_types: Optional[Dict[str, TimeWindowSpec]] = None,
+    spotlight: bool = False,
+    spotlight_min_percentage_change: Optional[float] = None,
+    spotlight_window_type: str = "before_end",
+    pocket_grids: bool = False,
+    incremental_hulls: bool = False,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Runs the pipeline from raw tracking data to play metrics and returns the
+    outputs to write, by name. If spotlight, also runs the spotlight search.
+    If pocket_grids, also rasterizes the pockets for the heatmaps. If
+    incremental_hulls, the batch engine reuses convex hulls across frames.
+    """
+
+    def stage(fn: Callable) -> Callable:
+        # Profile outside of the cache, so that cache hits are also profiled.
+        return task(profile_stage(profiler, cache_stage(cache, fn)))
+
+    # Find the spotlight window type before running any stage, so that a
+    # window type that the run does not have fails fast.
+    if spotlight:
+        spotlight_window_type = get_run_window_type(
+            spotlight_window_type, window_size_frames, window_types
+        )
+
+    # Align and rotate tracking data, in one pass.
+    df_tracking_rotated = stage(normalize_tracking_data)(df_tracking_limited)
 
     # Find frames where the passer has left the possible pocket area.
     # Requires actual yard lines, which means we must use the aligned and
     # rotated tracking data, before centering is applied.
-    df_passer_out_of_pocket = task(get_passer_out_of_pocket)(
+    df_passer_out_of_pocket = stage(get_passer_out_of_pocket)(
         df_tracking_rotated, df_pff, max_yards_from_snap
     )
 
     # Process event data: clean events, add pocket eligibility data, and join
     # back to tracking data.
-    df_clean_events = task(clean_event_data)(df_tracking_limited)
-    df_events = task(get_pocket_eligibility)(
+    df_clean_events = stage(clean_event_data)(df_tracking_limited)
+    df_events = stage(get_pocket_eligibility)(
         df_clean_events, df_passer_out_of_pocket
     )
-    df_tracking_with_events = task(augment_tracking_events)(
+    df_tracking_with_events = stage(augment_tracking_events)(
         df_tracking_rotated, df_events
     )
 
     # Center tracking data on ball snap point so that all spatial logic has the
     # same origin and coordinate system.
     # Must come after augmenting with event data to get the clean event names.
-    df_tracking = task(center_tracking_data)(df_tracking_with_events)
+    df_tracking = stage(center_tracking_data)(df_tracking_with_events)
 
     # Transform tracking data to display format.
-    df_tracking_display = task(transform_to_tracking_display)(
-        df_tracking, df_plays, df_pff
-    )
+    df_tracking_display = task(
+        profile_stage(profiler, transform_to_tracking_display)
+    )(df_tracking, df_plays, df_pff)
 
-    # Transform raw tracking data to frame records.
-    df_frames = task(transform_to_frames)(df_tracking, df_pff)
-    df_frame_records = task(transform_to_records_per_frame)(df_frames)
+    # Transform raw tracking data to frame records or a frame batch, then run
+    # each pocket area calculation function and combine results.
+    df_frames = stage(transform_to_frames)(df_tracking, df_pff)
+    if engine == "batch":
+        df_frame_keys, frame_batch = stage(transform_to_frame_batch)(df_frames)
+        batch_methods = (
+            INCREMENTAL_POCKET_AREA_BATCH_METHODS
+            if incremental_hulls
+            else POCKET_AREA_BATCH_METHODS
+        )
+        area_methods = list(batch_methods.items())
+        if profiler is None:
+            df_areas = task(calculate_pocket_area_parallel)(
+                df_frame_keys,
+                frame_batch,
+                area_methods,
+                max_workers=max_workers,
+                cache=cache,
+            )
+        else:
+            # Run each method on its own, so that each method is timed.
+            calculate_parallel = functools.partial(
+                calculate_pocket_area_parallel,
+                df_frame_keys,
+                frame_batch,
+                max_workers=max_workers,
+                cache=cache,
+            )
+            calculate_method = profile_pocket_area_stage(
+                profiler, calculate_parallel, "calculate_pocket_area_parallel"
+            )
+            df_area_list = [
+                task(calculate_method)([method]) for method in area_methods
+            ]
+            df_areas = task(union_dataframes)(df_area_list)
+    else:
+        df_frame_records = stage(transform_to_records_per_frame)(df_frames)
+        area_methods = list(POCKET_AREA_METHODS.items())
+        calculate_method = profile_pocket_area_stage(
+            profiler, cache_stage_by_game(cache, calculate_pocket_area)
+        )
+        df_area_list = task(calculate_method).map(
+            unmapped(df_frame_records), area_methods
+        )
+        df_areas = task(union_dataframes)(df_area_list)
 
-    # Run each pocket area calculation function and combine results.
-    area_methods = list(POCKET_AREA_METHODS.items())
-    df_area_list = task(calculate_pocket_area).map(
-        unmapped(df_frame_records), area_methods
+    # Calculate metrics for each time window of each play.
+    df_play_pocket_metrics = task(
+        profile_stage(profiler, get_play_window_metrics)
+    )(
+        df_events,
+        df_areas,
+        window_size_frames=window_size_frames,
+        window_types=window_types,
     )
-    df_areas = task(union_dataframes)(df_area_list)
+    df_play_metrics = task(
+        profile_stage(profiler, calculate_pocket_area_loss_rates)
+    )(df_play_pocket_metrics)
+
+    outputs = {
+        "tracking_display": df_tracking_display,
+        "events": df_events,
+        "pocket_areas": df_areas,
+        "play_metrics": df_play_metrics,
+    }
 
-    # Calculate metrics for each play.
-    df_windows_with_area = task(get_frames_for_time_windows)(
-        df_events, df_areas, window_size_frames=window_size_frames
+    # Search for spotlight moments, from the areas and tracking data of this
+    # run rather than from the written outputs.
+    if spotlight:
+        df_spotlight_search = stage(get_spotlight_data)(
+            df_tracking_display,
+            df_play_metrics,
+            df_areas,
+            df_plays,
+            min_percentage_change=spotlight_min_percentage_change,
+            window_type=spotlight_window_type,
+        )
+        # Only write the columns that the spotlight viewer needs.
+        outputs["spotlight_search"] = task(select_spotlight_search_columns)(
+            df_spotlight_search, df_plays
+        )
+
+    # Rasterize the pocket of each play once, so that heatmaps of any set of
+    # plays are sums of these grids.
+    if pocket_grids:
+        outputs["pocket_grids"] = stage(get_pocket_grid_data)(
+            df_play_metrics, df_areas, window_size_frames
+        )
+
+    return outputs
+
+
+def write_outputs(
+    outputs: Dict[str, pd.DataFrame], outpath: str, part: Optional[int] = None
+):
+    """
+    Writes the outputs to disk. If a part number is given, the outputs are
+    for one batch of games and the parts after the first are appended.
+    """
+    append = part is not None and part > 0
+    task(write_csv)(
+        outputs["tracking_display"],
+        f"{outpath}/tracking_display.csv",
+        append=append,
     )
-    df_play_pocket_metrics = task(get_play_pocket_metrics)(df_windows_with_area)
-    df_play_metrics = task(calculate_average_pocket_area_loss_per_second)(
-        df_play_pocket_metrics
+    task(write_csv)(outputs["events"], f"{outpath}/events.csv", append=append)
+    task(write_pocket_areas)(outputs["pocket_areas"], outpath, part=part)
+    task(write_csv)(
+        outputs["play_metrics"], f"{outpath}/play_metrics.csv", append=append
     )
-
-    # Write outputs to disk.
-    task(write_csv)(df_tracking_display, f"{outpath}/tracking_display.csv")
-    task(write_csv)(df_events, f"{outpath}/events.csv")
-    task(write_csv)(df_areas, f"{outpath}/pocket_areas.csv")
-    task(write_csv)(df_play_metrics, f"{outpath}/play_metrics.csv")
+    if "spotlight_search" in outputs:
+        task(write_csv)(
+            outputs["spotlight_search"],
+            f"{outpath}/spotlight_search.csv",
+            append=append,
+        )
+    if "pocket_grids" in outputs:
+        task(write_csv)(
+            outputs["pocket_grids"],
+            f"{outpath}/pocket_grids.csv",
+            append=append,
+        )
@@ -0,0 +1,161 @@
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.metrics.pocket_area.pocket_pb_ch_area import IncrementalConvexHull
+from src.pipeline.flows import main_no_prefect
+from src.pipeline.flows.main_no_prefect import (
+    process_tracking_data,
+    read_tracking_csv_batches,
+)
+
+ROLES = ["Pass", "Pass Block", "Pass Block", "Pass Block", "Pass Rush"]
+OFFSETS = [(-5, 0), (-1.5, -2), (-1, 0), (-1.5, 2), (0.5, 1)]
+
+
+def get_flow_inputs():
+    """Returns tracking, PFF, and play data for a few frames of one play."""
+    rng = np.random.default_rng(0)
+    events = {2: "ball_snap", 10: "pass_forward"}
+    tracking = []
+    for frame_id in range(1, 13):
+        event = events.get(frame_id, "None")
+        for k, (role, (dx, dy)) in enumerate(zip(ROLES, OFFSETS)):
+            # Rushers move towards the passer and blockers move back a little.
+            speed = 0.1 if role == "Pass Rush" else -0.02
+            tracking.append(
+                {
+                    "gameId": 1,
+                    "playId": 1,
+                    "nflId": 10 + k,
+                    "frameId": frame_id,
+                    "week": 1,
+                    "jerseyNumber": k + 1,
+                    "team": "GB" if role == "Pass Rush" else "CHI",
+                    "playDirection": "right",
+                    "event": event,
+                    "x": 40 + dx + speed * frame_id,
+                    "y": 26 + dy + rng.uniform(-0.1, 0.1),
+                    "o": 90.0,
+                    "dir": 90.0,
+                }
+            )
+        tracking.append(
+            {
+                "gameId": 1,
+                "playId": 1,
+                "nflId": np.nan,
+                "frameId": frame_id,
+                "week": 1,
+                "jerseyNumber": np.nan,
+                "team": "football",
+                "playDirection": "right",
+                "event": event,
+                "x": 40.0,
+                "y": 26.0,
+                "o": np.nan,
+                "dir": np.nan,
+            }
+        )
+    df_pff = pd.DataFrame(
+        {
+            "gameId": 1,
+            "playId": 1,
+            "nflId": [10 + k for k in range(len(ROLES))],
+            "pff_role": ROLES,
+        }
+    )
+    df_plays = pd.DataFrame(
+        {
+            "gameId": [1],
+            "playId": [1],
+            "possessionTeam": ["CHI"],
+            "defensiveTeam": ["GB"],
+            "playDescription": ["desc"],
+            "offenseFormation": ["SHOTGUN"],
+            "dropBackType": ["TRADITIONAL"],
+            "passResult": ["C"],
+        }
+    )
+    return pd.DataFrame(tracking), df_pff, df_plays
+
+
+def run_flow(**kwargs) -> Dict[str, pd.DataFrame]:
+    df_tracking, df_pff, df_plays = get_flow_inputs()
+    flow_kwargs = dict(
+        max_yards_from_snap=7,
+        window_size_frames=4,
+        engine="batch",
+        max_workers=1,
+        cache=None,
+    )
+    flow_kwargs.update(kwargs)
+    return process_tracking_data(df_tracking, df_pff, df_plays, **flow_kwargs)
+
+
+def run_batch_flow(incremental_hulls: bool) -> pd.DataFrame:
+    outputs = run_flow(incremental_hulls=incremental_hulls)
+    return outputs["pocket_areas"]
+
+
+def test_process_tracking_data_incremental_hulls(monkeypatch):
+    calls = []
+    get_vertices = IncrementalConvexHull.get_vertices
+
+    def count_get_vertices(self, points):
+        calls.append(len(points))
+        return get_vertices(self, points)
+
+    monkeypatch.setattr(
+        IncrementalConvexHull, "get_vertices", count_get_vertices
+    )
+
+    expected = run_batch_flow(incremental_hulls=False)
+    assert calls == []
+
+    actual = run_batch_flow(incremental_hulls=True)
+
+    # The flow computes the adaptive pocket hulls incrementally, with the same
+    # areas as computing every hull from scratch.
+    assert len(calls) > 0
+    assert actual[["frameId", "method"]].equals(expected[["frameId", "method"]])
+    assert np.allclose(actual["area"], expected["area"], equal_nan=True)
+
+
+def test_process_tracking_data_spotlight_with_window_sizes():
+    outputs = run_flow(window_size_frames=[4, 6], spotlight=True)
+
+    # The spotlight search uses the before_end window of the first size.
+    df_spotlight_search = outputs["spotlight_search"]
+    assert df_spotlight_search["window_type"].tolist() == ["before_end_4"]
+    assert df_spotlight_search["playId"].tolist() == [1]
+
+    with pytest.raises(ValueError):
+        run_flow(spotlight=True, spotlight_window_type="before_end_6")
+
+
+def test_read_tracking_csv_batches(tmp_path, monkeypatch):
+    df_tracking, _, _ = get_flow_inputs()
+    df_play = df_tracking.drop(columns=["week"])
+    for week, game_ids in [(1, [1, 2, 3]), (2, [4])]:
+        df_week = pd.concat([df_play.assign(gameId=i) for i in game_ids])
+        df_week.to_csv(f"{tmp_path}/week{week}.csv", index=False)
+    weeks_read = []
+    read_tracking_week = main_no_prefect.read_tracking_week
+
+    def count_read_tracking_week(inpath, week, columns=None):
+        weeks_read.append(week)
+        return read_tracking_week(inpath, week, columns=columns)
+
+    monkeypatch.setattr(
+        main_no_prefect, "read_tracking_week", count_read_tracking_week
+    )
+
+    batches = read_tracking_csv_batches(str(tmp_path), 2, None, 2, None)
+    actual = [batch["gameId"].unique().tolist() for batch in batches]
+
+    # Each week is read once, and batches do not span weeks.
+    assert weeks_read == [1, 2]
+    assert actual == [[1, 2], [3], [4]]
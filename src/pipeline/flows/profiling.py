@@ -0,0 +1,216 @@
+import functools
+import json
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from src.pipeline.tasks.pocket_area import is_failed_pocket
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    # The resource module is only available on Unix.
+    resource = None
+
+RUN_REPORT_FILE = "run_report.json"
+
+
+@dataclass
+class StageProfile:
+    """Measurements from one run of a pipeline stage."""
+
+    name: str
+    wall_seconds: float
+    cpu_seconds: float
+    # Increase in the peak resident set size of the process during the stage,
+    # or None if it cannot be measured on this platform.
+    peak_rss_delta_bytes: Optional[int]
+    input_rows: int
+    output_rows: int
+    output_bytes: int
+
+
+@dataclass
+class PocketMethodProfile:
+    """Measurements from one run of a pocket area method."""
+
+    method: str
+    frames: int
+    failures: int
+    seconds: float
+
+
+def get_peak_rss_bytes() -> Optional[int]:
+    """Returns the peak resident set size of the process, if available."""
+    if resource is None:
+        return None
+    # Linux reports the peak resident set size in kilobytes.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def get_dataframes(value: Any) -> List[pd.DataFrame]:
+    """
+    Returns the DataFrames in the value, including in tuples, lists, and
+    dictionaries, such as the outputs of stages that return several tables.
+    """
+    if isinstance(value, pd.DataFrame):
+        return [value]
+    if isinstance(value, (list, tuple)):
+        return [df for item in value for df in get_dataframes(item)]
+    if isinstance(value, dict):
+        return [df for item in value.values() for df in get_dataframes(item)]
+    return []
+
+
+def count_rows(value: Any) -> int:
+    return sum(len(df) for df in get_dataframes(value))
+
+
+def count_bytes(value: Any) -> int:
+    return sum(
+        int(df.memory_usage(index=True, deep=True).sum())
+        for df in get_dataframes(value)
+    )
+
+
+class StageProfiler:
+    """
+    Records the wall time, CPU time, peak memory, row counts, and DataFrame
+    memory of each pipeline stage, and the throughput and failures of each
+    pocket area method, then writes them as a run report in JSON.
+
+    CPU time and peak memory are measured for the whole process, so they
+    include any stages that run at the same time, such as concurrent Prefect
+    tasks, and exclude worker processes.
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now(timezone.utc)
+        self.start_time = time.perf_counter()
+        self.stages: List[StageProfile] = []
+        self.methods: List[PocketMethodProfile] = []
+        self.lock = threading.Lock()
+
+    def stage(self, fn: Callable, name: Optional[str] = None) -> Callable:
+        """Wraps a stage function to profile each call."""
+        stage_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def run_profiled(*args, **kwargs):
+            peak_rss_before = get_peak_rss_bytes()
+            cpu_start = time.process_time()
+            wall_start = time.perf_counter()
+            output = fn(*args, **kwargs)
+            wall_seconds = time.perf_counter() - wall_start
+            cpu_seconds = time.process_time() - cpu_start
+            peak_rss_after = get_peak_rss_bytes()
+
+            peak_rss_delta = None
+            if peak_rss_before is not None and peak_rss_after is not None:
+                peak_rss_delta = peak_rss_after - peak_rss_before
+            profile = StageProfile(
+                name=stage_name,
+                wall_seconds=wall_seconds,
+                cpu_seconds=cpu_seconds,
+                peak_rss_delta_bytes=peak_rss_delta,
+                input_rows=count_rows([args, kwargs]),
+                output_rows=count_rows(output),
+                output_bytes=count_bytes(output),
+            )
+            with self.lock:
+                self.stages.append(profile)
+            return output
+
+        return run_profiled
+
+    def pocket_area_stage(
+        self, fn: Callable, name: Optional[str] = None
+    ) -> Callable:
+        """
+        Wraps a stage function that applies pocket area methods and returns a
+        DataFrame with method and pocket columns, such as
+        calculate_pocket_area(), to also profile the methods. Failures are the
+        frames where the method raised an error. If one call applies several
+        methods, their time cannot be told apart, so they are profiled as one
+        group, named after the methods joined by a plus sign.
+        """
+        profiled_fn = self.stage(fn, name)
+
+        @functools.wraps(fn)
+        def run_profiled(*args, **kwargs):
+            wall_start = time.perf_counter()
+            df_areas = profiled_fn(*args, **kwargs)
+            seconds = time.perf_counter() - wall_start
+
+            methods = pd.unique(df_areas["method"])
+            profile = PocketMethodProfile(
+                method="+".join(methods),
+                frames=len(df_areas),
+                failures=int(df_areas["pocket"].apply(is_failed_pocket).sum()),
+                seconds=seconds,
+            )
+            with self.lock:
+                self.methods.append(profile)
+            return df_areas
+
+        return run_profiled
+
+    def get_report(self) -> Dict:
+        """
+        Returns the run report, with each stage run in order and the totals
+        for each pocket area method across runs.
+        """
+        method_totals: Dict[str, Dict] = {}
+        for profile in self.methods:
+            totals = method_totals.setdefault(
+                profile.method,
+                {"method": profile.method, "frames": 0, "failures": 0},
+            )
+            totals["frames"] += profile.frames
+            totals["failures"] += profile.failures
+            totals["seconds"] = totals.get("seconds", 0.0) + profile.seconds
+        for totals in method_totals.values():
+            seconds = totals["seconds"]
+            totals["frames_per_second"] = (
+                totals["frames"] / seconds if seconds > 0 else None
+            )
+
+        return {
+            "started_at": self.started_at.isoformat(),
+            "wall_seconds": time.perf_counter() - self.start_time,
+            "peak_rss_bytes": get_peak_rss_bytes(),
+            "stages": [asdict(profile) for profile in self.stages],
+            "pocket_area_methods": list(method_totals.values()),
+        }
+
+    def write_report(self, outfile: str):
+        with open(outfile, "w") as file:
+            json.dump(self.get_report(), file, indent=2)
+
+
+def profile_stage(
+    profiler: Optional[StageProfiler], fn: Callable, name: Optional[str] = None
+) -> Callable:
+    """
+    Wraps a stage function to use the profiler. If there is no profiler,
+    returns the function unchanged.
+    """
+    if profiler is None:
+        return fn
+    return profiler.stage(fn, name)
+
+
+def profile_pocket_area_stage(
+    profiler: Optional[StageProfiler], fn: Callable, name: Optional[str] = None
+) -> Callable:
+    """
+    Wraps a pocket area stage function to use the profiler. If there is no
+    profiler, returns the function unchanged.
+    """
+    if profiler is None:
+        return fn
+    return profiler.pocket_area_stage(fn, name)
@@ -0,0 +1,99 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.pipeline.flows.profiling import (
+    StageProfiler,
+    count_bytes,
+    count_rows,
+    profile_stage,
+)
+
+
+def add_column(df: pd.DataFrame) -> pd.DataFrame:
+    return df.assign(b=df["a"] * 2)
+
+
+def test_count_rows():
+    df = pd.DataFrame({"a": [1, 2, 3]})
+    assert count_rows(df) == 3
+    assert count_rows((df, [df], {"x": df}, 5)) == 9
+    assert count_rows(None) == 0
+    assert count_bytes(df) > 0
+
+
+def test_profile_stage_without_profiler():
+    # Without a profiler, the stage function is unchanged.
+    assert profile_stage(None, add_column) is add_column
+
+
+def test_stage_profiler(tmp_path):
+    profiler = StageProfiler()
+    df = pd.DataFrame({"a": [1, 2, 3]})
+    actual = profiler.stage(add_column)(df)
+    assert actual["b"].tolist() == [2, 4, 6]
+
+    [profile] = profiler.stages
+    assert profile.name == "add_column"
+    assert profile.input_rows == 3
+    assert profile.output_rows == 3
+    assert profile.output_bytes == count_bytes(actual)
+    assert profile.wall_seconds >= 0
+
+    outfile = tmp_path / "run_report.json"
+    profiler.write_report(str(outfile))
+    with open(outfile) as file:
+        report = json.load(file)
+    assert [stage["name"] for stage in report["stages"]] == ["add_column"]
+
+
+def test_stage_profiler_pocket_area_methods():
+    def calculate(df_frames: pd.DataFrame, method_name: str) -> pd.DataFrame:
+        # Fail on the first frame and have no area on the second frame.
+        failed = {"area": None, "metadata": {"error": "InvalidPocketError"}}
+        pockets = [failed] + [{"area": None, "metadata": {}}] * (
+            len(df_frames) - 1
+        )
+        areas = [np.nan] * len(df_frames)
+        return pd.DataFrame(
+            {"method": method_name, "pocket": pockets, "area": areas}
+        )
+
+    profiler = StageProfiler()
+    calculate_method = profiler.pocket_area_stage(calculate)
+    df_frames = pd.DataFrame({"frameId": [1, 2, 3, 4]})
+    calculate_method(df_frames, "a")
+    calculate_method(df_frames, "b")
+    calculate_method(df_frames.head(2), "a")
+
+    report = profiler.get_report()
+    assert [stage["name"] for stage in report["stages"]] == ["calculate"] * 3
+    methods = {m["method"]: m for m in report["pocket_area_methods"]}
+    assert methods["a"]["frames"] == 6
+    assert methods["a"]["failures"] == 2
+    assert methods["b"]["frames"] == 4
+    assert methods["b"]["failures"] == 1
+    assert methods["a"]["seconds"] >= 0
+    assert "frames_per_second" in methods["a"]
+
+
+def test_stage_profiler_pocket_area_method_group():
+    def calculate(df_frames: pd.DataFrame) -> pd.DataFrame:
+        pockets = [{"area": 1.0, "metadata": {}}] * len(df_frames)
+        return pd.DataFrame(
+            {
+                "method": ["a"] * len(df_frames) + ["b"] * len(df_frames),
+                "pocket": pockets * 2,
+                "area": 1.0,
+            }
+        )
+
+    profiler = StageProfiler()
+    profiler.pocket_area_stage(calculate)(pd.DataFrame({"frameId": [1, 2]}))
+
+    # Methods applied in one call are profiled together.
+    [method] = profiler.get_report()["pocket_area_methods"]
+    assert method["method"] == "a+b"
+    assert method["frames"] == 4
+    assert method["failures"] == 0
@@ -5,5 +5,7 @@ from src.pipeline.tasks.frames import *
 from src.pipeline.tasks.play_metrics import *
 from src.pipeline.tasks.play_windows import *
 from src.pipeline.tasks.pocket_area import *
+from src.pipeline.tasks.pocket_grids import *
+from src.pipeline.tasks.pocket_store import *
 from src.pipeline.tasks.spotlight import *
 from src.pipeline.tasks.tracking import *
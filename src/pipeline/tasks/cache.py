@@ -0,0 +1,496 @@
+import ast
+import dataclasses
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pickle  # nosec
+import threading
+import weakref
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Default maximum size of the cache directory: 4 GB.
+DEFAULT_CACHE_MAX_BYTES = 4 * 1024**3
+CACHE_FILE_SUFFIX = ".pkl"
+# File in the cache directory with the size of each cached output.
+CACHE_INDEX_FILE = "index.json"
+# Root of the source tree, whose modules are versioned in the cache keys.
+SOURCE_ROOT = Path(__file__).resolve().parents[2]
+
+
+def fingerprint(*values: Any) -> str:
+    """
+    Returns a hash of the values, based on their contents. Supports DataFrames,
+    Series, NumPy arrays, dataclasses, functions, and nested lists, tuples,
+    and dictionaries of these, as well as primitive values.
+    """
+    hasher = hashlib.sha256()
+    for value in values:
+        update_fingerprint(hasher, value)
+    return hasher.hexdigest()
+
+
+def update_fingerprint(hasher, value: Any):
+    """Adds the contents of the value to the hash."""
+    # Include the type, so that values with the same contents but different
+    # types, like a list and a tuple, have different fingerprints.
+    hasher.update(type(value).__name__.encode())
+    if isinstance(value, pd.DataFrame):
+        index_hashes = pd.util.hash_pandas_object(value.index)
+        hasher.update(index_hashes.to_numpy().tobytes())
+        for column in value.columns:
+            update_fingerprint(hasher, value[column])
+    elif isinstance(value, pd.Series):
+        hasher.update(repr((value.name, str(value.dtype))).encode())
+        try:
+            hashes = pd.util.hash_pandas_object(value, index=False)
+            hasher.update(hashes.to_numpy().tobytes())
+        except TypeError:
+            # Columns of lists or dictionaries, like frame records, cannot be
+            # hashed by pandas, so hash their serialized values instead.
+            hasher.update(pickle.dumps(value.tolist(), protocol=4))
+    elif isinstance(value, np.ndarray):
+        hasher.update(repr((value.dtype.str, value.shape)).encode())
+        hasher.update(np.ascontiguousarray(value).tobytes())
+    elif dataclasses.is_dataclass(value) and not isinstance(value, type):
+        for field in dataclasses.fields(value):
+            hasher.update(field.name.encode())
+            update_fingerprint(hasher, getattr(value, field.name))
+    elif isinstance(value, functools.partial):
+        update_fingerprint(hasher, value.func)
+        update_fingerprint(hasher, value.args)
+        update_fingerprint(hasher, value.keywords)
+    elif callable(value):
+        hasher.update(get_function_signature(value).encode())
+    elif isinstance(value, (list, tuple)):
+        hasher.update(str(len(value)).encode())
+        for item in value:
+            update_fingerprint(hasher, item)
+    elif isinstance(value, dict):
+        hasher.update(str(len(value)).encode())
+        for key in sorted(value, key=repr):
+            update_fingerprint(hasher, key)
+            update_fingerprint(hasher, value[key])
+    else:
+        hasher.update(repr(value).encode())
+
+
+def fingerprint_by_game(df: pd.DataFrame) -> Dict[int, str]:
+    """
+    Returns a hash of the rows of each game in a DataFrame with a gameId
+    column, by game ID, based on their contents and order.
+    """
+    header = fingerprint(list(df.columns), [str(t) for t in df.dtypes])
+    try:
+        row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    except TypeError:
+        # Columns of lists or dictionaries cannot be hashed by pandas.
+        row_hashes = None
+
+    game_keys = {}
+    for game_id, indices in df.groupby("gameId", sort=True).indices.items():
+        hasher = hashlib.sha256(header.encode())
+        if row_hashes is not None:
+            hasher.update(row_hashes[indices].tobytes())
+        else:
+            update_fingerprint(hasher, df.iloc[indices].reset_index(drop=True))
+        game_keys[int(game_id)] = hasher.hexdigest()
+    return game_keys
+
+
+def get_module_path(module: str, root: Path = SOURCE_ROOT) -> Optional[Path]:
+    """
+    Returns the path of a module in the source tree, or None if the module is
+    not in the source tree, such as a third-party module or a name imported
+    from a module.
+    """
+    package, *parts = module.split(".")
+    if package != root.name or not parts:
+        return None
+    path = root.joinpath(*parts)
+    for candidate in [path.with_suffix(".py"), path / "__init__.py"]:
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def get_imported_modules(path: Path) -> List[str]:
+    """
+    Returns the names that the module imports, which are either modules or
+    names defined in modules.
+    """
+    modules = []
+    for node in ast.walk(ast.parse(path.read_bytes())):
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module is not None:
+            modules.append(node.module)
+            modules.extend(
+                f"{node.module}.{alias.name}" for alias in node.names
+            )
+    return modules
+
+
+@functools.lru_cache(maxsize=None)
+def get_code_version(module: str, root: Path = SOURCE_ROOT) -> str:
+    """
+    Returns a hash of the path and contents of the module and of every module
+    in the source tree that it imports, directly or through other modules, so
+    that a change to a stage or to the helpers that it calls invalidates its
+    cached outputs, while changes to other modules do not. Returns an empty
+    string for modules outside the source tree. Computed once per module.
+    """
+    paths = set()
+    pending = [module]
+    while pending:
+        path = get_module_path(pending.pop(), root)
+        if path is None or path in paths:
+            continue
+        paths.add(path)
+        pending.extend(get_imported_modules(path))
+    if not paths:
+        return ""
+
+    hasher = hashlib.sha256()
+    for path in sorted(paths):
+        hasher.update(path.relative_to(root).as_posix().encode())
+        hasher.update(path.read_bytes())
+    return hasher.hexdigest()
+
+
+def get_function_signature(fn: Callable) -> str:
+    """
+    Identifies a function by its module, name, and source code, and by the
+    code version of its module, so that the cached outputs of a function are
+    invalidated when its code or the code of the modules it uses changes.
+    """
+    module = getattr(fn, "__module__", None) or ""
+    name = f"{module}.{getattr(fn, '__qualname__', repr(fn))}"
+    try:
+        source = inspect.getsource(fn)
+    except (OSError, TypeError):
+        source = ""
+    return f"{name}\n{source}\n{get_code_version(module)}"
+
+
+@dataclass
+class InputKey:
+    """
+    Stable key of a stage input, which stands in for its contents in the keys
+    of the stages that it is passed to. Inputs with a gameId column also have
+    a key for the rows of each game, by game ID.
+    """
+
+    key: str
+    game_keys: Optional[Dict[int, str]] = None
+
+
+class StageCache:
+    """
+    Caches the outputs of pipeline stages on local disk, keyed by a hash of
+    the stage function, the code version of its module, and its inputs, so
+    that reruns with the same code, inputs, and parameters skip the stage.
+    Evicts the least recently used outputs when the cache directory grows
+    past max_bytes, using an index of the size of each output.
+
+    Each stage output is keyed by the key of the stage, and its rows for each
+    game by the keys of the rows of the same game in the stage inputs, so
+    later stages key their inputs without hashing their contents, and stages
+    cached by game only miss for the games whose inputs changed. This assumes
+    that the rows of each game of a stage output depend only on the rows of
+    the same game of its inputs. Inputs that are not stage outputs are keyed
+    by their contents. A code version can be given to add to every key.
+    """
+
+    def __init__(
+        self,
+        cachedir: str,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+        code_version: Optional[str] = None,
+    ):
+        self.cachedir = cachedir
+        self.max_bytes = max_bytes
+        self.code_version = code_version
+        self.hits = 0
+        self.misses = 0
+        # Guards the index, since Prefect may run stages in several threads.
+        self.lock = threading.Lock()
+        # Keys of the stage outputs that are still in memory, by object ID,
+        # with a weak reference to check that the ID is still for the output.
+        self.output_keys: Dict[int, Tuple[weakref.ref, InputKey]] = {}
+        os.makedirs(cachedir, exist_ok=True)
+        self.index_path = f"{cachedir}/{CACHE_INDEX_FILE}"
+        self.sizes = self.read_index()
+
+    def read_index(self) -> Dict[str, int]:
+        """
+        Returns the size of each cached output, by key, from the index file,
+        or from the cache directory if there is no index yet.
+        """
+        try:
+            with open(self.index_path) as file:
+                return {key: int(size) for key, size in json.load(file).items()}
+        except (OSError, ValueError):
+            pass
+
+        sizes = {}
+        for entry in os.scandir(self.cachedir):
+            if entry.is_file() and entry.name.endswith(CACHE_FILE_SUFFIX):
+                key = entry.name[: -len(CACHE_FILE_SUFFIX)]
+                sizes[key] = entry.stat().st_size
+        return sizes
+
+    def write_index(self):
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump(self.sizes, file)
+        os.replace(temp_path, self.index_path)
+
+    def get_input_key(self, value: Any) -> InputKey:
+        """
+        Returns the stable key of a stage input: the key of the stage output
+        that it is, if any, or else a hash of its contents, with a hash of the
+        rows of each game for DataFrames with a gameId column.
+        """
+        if isinstance(value, InputKey):
+            return value
+        output_key = self.get_output_key(value)
+        if output_key is not None:
+            return output_key
+        if isinstance(value, pd.DataFrame) and "gameId" in value.columns:
+            return InputKey(fingerprint(value), fingerprint_by_game(value))
+        return InputKey(fingerprint(value))
+
+    def get_output_key(self, value: Any) -> Optional[InputKey]:
+        """Returns the key of the stage output, or None if it is not one."""
+        entry = self.output_keys.get(id(value))
+        if entry is None or entry[0]() is not value:
+            return None
+        return entry[1]
+
+    def set_output_key(self, value: Any, output_key: InputKey):
+        """
+        Records the key of a stage output, so that later stages can key it
+        without hashing its contents. Each item of a tuple output gets its own
+        key. Values that cannot be weakly referenced are not recorded.
+        """
+        if isinstance(value, tuple):
+            for i, item in enumerate(value):
+                game_keys = None
+                if output_key.game_keys is not None:
+                    game_keys = {
+                        game_id: fingerprint(game_key, i)
+                        for game_id, game_key in output_key.game_keys.items()
+                    }
+                item_key = InputKey(fingerprint(output_key.key, i), game_keys)
+                self.set_output_key(item, item_key)
+            return
+
+        value_id = id(value)
+
+        def remove_output_key(_):
+            self.output_keys.pop(value_id, None)
+
+        try:
+            ref = weakref.ref(value, remove_output_key)
+        except TypeError:
+            return
+        self.output_keys[value_id] = (ref, output_key)
+
+    def get_keys(self, fn: Callable, *args, **kwargs) -> InputKey:
+        """
+        Returns the key of the function applied to the inputs, with the key
+        of its rows for each game of the inputs.
+        """
+        arg_keys = [self.get_input_key(arg) for arg in args]
+        kwarg_keys = {
+            name: self.get_input_key(value) for name, value in kwargs.items()
+        }
+        input_keys = arg_keys + list(kwarg_keys.values())
+        key = fingerprint(
+            self.code_version,
+            fn,
+            [k.key for k in arg_keys],
+            {name: k.key for name, k in kwarg_keys.items()},
+        )
+
+        game_ids = set()
+        for input_key in input_keys:
+            game_ids.update(input_key.game_keys or {})
+        if not game_ids:
+            return InputKey(key)
+
+        def get_game_input_key(input_key: InputKey, game_id: int):
+            if input_key.game_keys is None:
+                return input_key.key
+            return input_key.game_keys.get(game_id)
+
+        game_keys = {
+            game_id: fingerprint(
+                self.code_version,
+                fn,
+                game_id,
+                [get_game_input_key(k, game_id) for k in arg_keys],
+                {
+                    name: get_game_input_key(k, game_id)
+                    for name, k in kwarg_keys.items()
+                },
+            )
+            for game_id in sorted(game_ids)
+        }
+        return InputKey(key, game_keys)
+
+    def get_key(self, fn: Callable, *args, **kwargs) -> str:
+        return self.get_keys(fn, *args, **kwargs).key
+
+    def get_path(self, key: str) -> str:
+        return f"{self.cachedir}/{key}{CACHE_FILE_SUFFIX}"
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Returns whether the key is in the cache and, if so, the cached value.
+        """
+        path = self.get_path(key)
+        try:
+            with open(path, "rb") as file:
+                value = pickle.load(file)  # nosec
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return False, None
+
+        # Mark the output as recently used.
+        os.utime(path)
+        self.hits += 1
+        return True, value
+
+    def put(self, key: str, value: Any):
+        """
+        Writes the value to the cache, then evicts old outputs if the cache is
+        too large.
+        """
+        path = self.get_path(key)
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        # Write to a temporary file first, so that readers never see a
+        # partially written output.
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(data)
+        os.replace(temp_path, path)
+        with self.lock:
+            self.sizes[key] = len(data)
+            self.evict()
+            self.write_index()
+
+    def evict(self):
+        """
+        Deletes the least recently used outputs until the outputs in the index
+        are at most max_bytes.
+        """
+        total_bytes = sum(self.sizes.values())
+        if total_bytes <= self.max_bytes:
+            return
+
+        entries = []
+        for key, size in self.sizes.items():
+            try:
+                entries.append((os.stat(self.get_path(key)).st_mtime, key))
+            except FileNotFoundError:
+                # The output was deleted outside of this cache.
+                entries.append((float("-inf"), key))
+        for _, key in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(self.get_path(key))
+            except FileNotFoundError:
+                pass
+            total_bytes -= self.sizes.pop(key)
+
+    def run_with_key(self, key: str, fn: Callable, *args, **kwargs) -> Any:
+        """Returns the cached output for the key, or runs the function."""
+        hit, value = self.get(key)
+        if hit:
+            return value
+        value = fn(*args, **kwargs)
+        self.put(key, value)
+        return value
+
+    def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Returns the cached output of the function, or runs it and caches it."""
+        output_key = self.get_keys(fn, *args, **kwargs)
+        value = self.run_with_key(output_key.key, fn, *args, **kwargs)
+        self.set_output_key(value, output_key)
+        return value
+
+
+def copy_inputs(fn: Callable) -> Callable:
+    """
+    Wraps a stage function to pass it copies of its DataFrame arguments. Some
+    stages change their input DataFrames in place, which would otherwise make
+    the inputs of later stages depend on whether this stage was cached.
+    """
+
+    @functools.wraps(fn)
+    def run_with_copies(*args, **kwargs):
+        args = [a.copy() if isinstance(a, pd.DataFrame) else a for a in args]
+        return fn(*args, **kwargs)
+
+    return run_with_copies
+
+
+def cache_stage(cache: Optional[StageCache], fn: Callable) -> Callable:
+    """
+    Wraps a stage function to use the cache. If there is no cache, returns
+    the function unchanged.
+    """
+    if cache is None:
+        return fn
+
+    @functools.wraps(fn)
+    def run_cached(*args, **kwargs):
+        return cache.run(copy_inputs(fn), *args, **kwargs)
+
+    return run_cached
+
+
+def cache_stage_by_game(cache: Optional[StageCache], fn: Callable) -> Callable:
+    """
+    Wraps a stage function that takes a DataFrame with a gameId column as its
+    first argument to run and cache each game separately, then union the
+    outputs in game order. Each game is keyed by the key of its rows in the
+    DataFrame, so games whose input did not change since the last run are not
+    recomputed. If there is no cache, returns the function unchanged.
+    """
+    if cache is None:
+        return fn
+
+    @functools.wraps(fn)
+    def run_cached_by_game(df: pd.DataFrame, *args, **kwargs):
+        df_key = cache.get_input_key(df)
+        df_outputs: List[pd.DataFrame] = []
+        game_keys: Dict[int, str] = {}
+        for game_id, df_game in df.groupby("gameId", sort=True):
+            df_game = df_game.reset_index(drop=True)
+            game_key = (df_key.game_keys or {}).get(int(game_id))
+            game_input = df_game if game_key is None else InputKey(game_key)
+            key = cache.get_key(fn, game_input, *args, **kwargs)
+            game_keys[int(game_id)] = key
+            df_outputs.append(
+                cache.run_with_key(
+                    key, copy_inputs(fn), df_game, *args, **kwargs
+                )
+            )
+        if not df_outputs:
+            return fn(df, *args, **kwargs)
+        df_output = pd.concat(df_outputs, ignore_index=True, copy=False)
+        output_key = InputKey(fingerprint(list(game_keys.values())), game_keys)
+        cache.set_output_key(df_output, output_key)
+        return df_output
+
+    return run_cached_by_game
@@ -0,0 +1,159 @@
+import os
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from src.pipeline.tasks.cache import (
+    CACHE_INDEX_FILE,
+    StageCache,
+    cache_stage,
+    cache_stage_by_game,
+    fingerprint,
+    get_code_version,
+)
+
+
+def add_one(df: pd.DataFrame) -> pd.DataFrame:
+    df["x"] = df["x"] + 1
+    return df
+
+
+def test_fingerprint():
+    df = pd.DataFrame({"gameId": [1, 2], "x": [1.0, 2.0]})
+    assert fingerprint(df) == fingerprint(df.copy())
+    assert fingerprint(df) != fingerprint(df.assign(x=[1.0, 2.5]))
+    assert fingerprint(df, 7) != fingerprint(df, 8)
+    assert fingerprint([1, 2]) != fingerprint((1, 2))
+    assert fingerprint(np.arange(3)) != fingerprint(np.arange(4))
+    records = pd.Series([[{"x": 1}], [{"x": 2}]])
+    assert fingerprint(records) != fingerprint(pd.Series([[{"x": 1}], []]))
+
+
+def test_cache_stage(tmp_path):
+    cache = StageCache(str(tmp_path))
+    df = pd.DataFrame({"gameId": [1, 2], "x": [1.0, 2.0]})
+    actual_first = cache_stage(cache, add_one)(df)
+    actual_second = cache_stage(cache, add_one)(df)
+    assert (cache.hits, cache.misses) == (1, 1)
+    pd.testing.assert_frame_equal(actual_first, actual_second)
+    assert actual_second["x"].tolist() == [2.0, 3.0]
+    # The cached stage does not change its input.
+    assert df["x"].tolist() == [1.0, 2.0]
+
+
+def test_cache_stage_code_version(tmp_path):
+    df = pd.DataFrame({"gameId": [1, 2], "x": [1.0, 2.0]})
+    cache = StageCache(str(tmp_path), code_version="a")
+    cache_stage(cache, add_one)(df)
+    # Outputs from another version of the code are not reused.
+    cache = StageCache(str(tmp_path), code_version="b")
+    cache_stage(cache, add_one)(df)
+    assert (cache.hits, cache.misses) == (0, 1)
+    cache = StageCache(str(tmp_path), code_version="a")
+    cache_stage(cache, add_one)(df)
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_get_code_version(tmp_path):
+    root = tmp_path / "src"
+    root.mkdir()
+    (root / "stage.py").write_text("from src.helpers import f\n")
+    (root / "helpers.py").write_text("import numpy as np\n")
+    (root / "other.py").write_text("x = 1\n")
+    version = get_code_version("src.stage", root)
+    get_code_version.cache_clear()
+    # Modules that the stage does not import are not part of its version.
+    (root / "other.py").write_text("x = 2\n")
+    assert get_code_version("src.stage", root) == version
+    get_code_version.cache_clear()
+    # Modules that the stage imports are.
+    (root / "helpers.py").write_text("import pandas as pd\n")
+    assert get_code_version("src.stage", root) != version
+    assert get_code_version("numpy", root) == ""
+    assert get_code_version(__name__) == get_code_version(__name__)
+
+
+def test_cache_stage_no_cache():
+    assert cache_stage(None, add_one) is add_one
+
+
+def test_cache_stage_by_game(tmp_path):
+    cache = StageCache(str(tmp_path))
+    df = pd.DataFrame({"gameId": [2, 1, 1], "x": [1.0, 2.0, 3.0]})
+    actual = cache_stage_by_game(cache, add_one)(df)
+    assert actual.to_dict(orient="list") == {
+        "gameId": [1, 1, 2],
+        "x": [3.0, 4.0, 2.0],
+    }
+    assert (cache.hits, cache.misses) == (0, 2)
+
+    # Only the game whose input changed is recomputed.
+    df_changed = pd.DataFrame({"gameId": [2, 1, 1], "x": [5.0, 2.0, 3.0]})
+    cache_stage_by_game(cache, add_one)(df_changed)
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_cache_stage_keys_outputs(tmp_path):
+    cache = StageCache(str(tmp_path))
+    df = pd.DataFrame({"gameId": [2, 1, 1], "x": [1.0, 2.0, 3.0]})
+    df_added = cache_stage(cache, add_one)(df)
+    # Later stages key the output by the key of the stage, not its contents.
+    output_key = cache.get_input_key(df_added)
+    assert output_key.key == cache.get_key(add_one, df)
+    assert sorted(output_key.game_keys) == [1, 2]
+    cache_stage_by_game(cache, add_one)(df_added)
+    assert (cache.hits, cache.misses) == (0, 3)
+
+    # Only the game whose input changed is recomputed by the later stage.
+    df_changed = pd.DataFrame({"gameId": [2, 1, 1], "x": [5.0, 2.0, 3.0]})
+    actual = cache_stage_by_game(cache, add_one)(
+        cache_stage(cache, add_one)(df_changed)
+    )
+    assert (cache.hits, cache.misses) == (1, 5)
+    assert actual.to_dict(orient="list") == {
+        "gameId": [1, 1, 2],
+        "x": [4.0, 5.0, 7.0],
+    }
+
+
+def get_cached_files(path) -> List[str]:
+    return sorted(name for name in os.listdir(path) if name.endswith(".pkl"))
+
+
+def test_stage_cache_evicts_least_recently_used(tmp_path):
+    cache = StageCache(str(tmp_path), max_bytes=0)
+    cache.put("a", np.zeros(100))
+    assert get_cached_files(tmp_path) == []
+
+    cache = StageCache(str(tmp_path), max_bytes=2000)
+    cache.put("a", np.zeros(100))
+    os.utime(cache.get_path("a"), (0, 0))
+    cache.put("b", np.zeros(100))
+    cache.put("c", np.zeros(100))
+    assert get_cached_files(tmp_path) == ["b.pkl", "c.pkl"]
+    hit, value = cache.get("b")
+    assert hit
+    np.testing.assert_array_equal(value, np.zeros(100))
+
+
+def test_stage_cache_index(tmp_path):
+    cache = StageCache(str(tmp_path), max_bytes=2000)
+    cache.put("a", np.zeros(100))
+    os.utime(cache.get_path("a"), (0, 0))
+    cache.put("b", np.zeros(100))
+    assert set(cache.sizes) == {"a", "b"}
+
+    # Another cache on the directory reads the sizes from the index.
+    cache = StageCache(str(tmp_path), max_bytes=2000)
+    assert cache.sizes == {
+        "a": os.path.getsize(cache.get_path("a")),
+        "b": os.path.getsize(cache.get_path("b")),
+    }
+    cache.put("c", np.zeros(100))
+    assert get_cached_files(tmp_path) == ["b.pkl", "c.pkl"]
+    assert set(cache.sizes) == {"b", "c"}
+
+    # Without an index, the sizes are read from the directory.
+    os.remove(tmp_path / CACHE_INDEX_FILE)
+    assert set(StageCache(str(tmp_path)).sizes) == {"b", "c"}
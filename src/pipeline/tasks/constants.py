@@ -3,5 +3,18 @@ TRACKING_PRIMARY_KEY = ["gameId", "playId", "frameId", "nflId"]
 FRAME_PRIMARY_KEY = PLAY_PRIMARY_KEY + ["frameId"]
 PFF_PRIMARY_KEY = ["gameId", "playId", "nflId"]
 
+# Tracking columns used by the pipeline, so readers can skip the rest.
+TRACKING_COLUMNS = TRACKING_PRIMARY_KEY + [
+    "week",
+    "jerseyNumber",
+    "team",
+    "playDirection",
+    "event",
+    "x",
+    "y",
+    "o",
+    "dir",
+]
+
 FIELD_LENGTH = 120
 FIELD_WIDTH = 53 + (1.0 / 3.0)
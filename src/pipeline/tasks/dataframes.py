@@ -1,22 +1,56 @@
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 import pandas as pd
 
+# Compact schemas for the raw Big Data Bowl files. Columns not listed here keep
+# the types that Pandas infers. Player and jersey IDs are floats because the
+# football does not have them.
+TRACKING_DTYPES: Dict[str, str] = {
+    "gameId": "int32",
+    "playId": "int32",
+    "nflId": "float32",
+    "frameId": "int32",
+    "jerseyNumber": "float32",
+    "team": "category",
+    "playDirection": "category",
+    "x": "float32",
+    "y": "float32",
+    "s": "float32",
+    "a": "float32",
+    "dis": "float32",
+    "o": "float32",
+    "dir": "float32",
+    "event": "category",
+}
+PLAYS_DTYPES: Dict[str, str] = {"gameId": "int32", "playId": "int32"}
+PFF_DTYPES: Dict[str, str] = {
+    "gameId": "int32",
+    "playId": "int32",
+    "nflId": "int32",
+}
+
+# Tracking data is partitioned on disk so readers can skip whole files.
+TRACKING_PARTITION_COLUMNS = ["week", "gameId"]
+
 
 def read_csv(infile: str) -> pd.DataFrame:
     """Reads a DataFrame from a CSV file path."""
     return pd.read_csv(infile)
 
 
-def write_csv(df: pd.DataFrame, outfile: str):
+def write_csv(df: pd.DataFrame, outfile: str, append: bool = False):
     """
     Writes a DataFrame to a CSV file path and creates parent directories if
-    they do not exist.
+    they do not exist. If append is True, adds the rows to the end of the
+    file, without a header.
     """
     outpath = Path(outfile).parent
     outpath.mkdir(parents=True, exist_ok=True)
-    df.to_csv(outfile, index=False)
+    if append:
+        df.to_csv(outfile, index=False, mode="a", header=False)
+    else:
+        df.to_csv(outfile, index=False)
 
 
 def union_dataframes(df_list: List[pd.DataFrame]) -> pd.DataFrame:
@@ -82,14 +116,113 @@ def get_weeks(weeks: int) -> List[int]:
     return list(week_range)
 
 
-def read_tracking_data(inpath: str, weeks: int) -> pd.DataFrame:
+def filter_by_keys(
+    df: pd.DataFrame, df_keys: pd.DataFrame, keys: List[str]
+) -> pd.DataFrame:
+    """
+    Filters a DataFrame to the rows whose combination of the given keys appears
+    in the keys DataFrame. Unlike a join, this does not copy the keys DataFrame
+    into the output or change the order of the rows.
+    """
+    index = pd.MultiIndex.from_frame(df[keys])
+    index_keys = pd.MultiIndex.from_frame(df_keys[keys])
+    return df[index.isin(index_keys)]
+
+
+def select_play_keys(
+    df_play_keys: pd.DataFrame,
+    max_games: Optional[int] = None,
+    max_plays: Optional[int] = None,
+    game_ids: Optional[List[int]] = None,
+    play_ids: Optional[List[int]] = None,
+) -> pd.DataFrame:
+    """
+    Selects which plays to process from the unique week, game, and play keys.
+    Explicit game and play IDs are applied first, then the limits, which keep
+    the first n games per week and the first n plays per game, using the
+    default sort. Applying the limits to the keys instead of the full tracking
+    data gives the same plays without reading the other columns.
+    """
+    df = df_play_keys
+    if game_ids is not None:
+        df = df[df["gameId"].isin(game_ids)]
+    if play_ids is not None:
+        df = df[df["playId"].isin(play_ids)]
+    df = limit_by_child_keys(
+        df, parent_keys=["week"], child_keys=["gameId"], n=max_games
+    )
+    df = limit_by_child_keys(
+        df, parent_keys=["gameId"], child_keys=["playId"], n=max_plays
+    )
+    return df[df_play_keys.columns].reset_index(drop=True)
+
+
+def split_play_keys_by_game(
+    df_play_keys: pd.DataFrame, games_per_batch: int
+) -> List[pd.DataFrame]:
+    """
+    Splits the play keys into batches of at most the given number of games,
+    keeping the order of the games.
+    """
+    game_ids = pd.unique(df_play_keys["gameId"])
+    batches = []
+    for i in range(0, len(game_ids), games_per_batch):
+        batch_game_ids = game_ids[i : i + games_per_batch]
+        df_batch = df_play_keys[df_play_keys["gameId"].isin(batch_game_ids)]
+        batches.append(df_batch.reset_index(drop=True))
+    return batches
+
+
+def read_tracking_week(
+    inpath: str, week: int, columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Reads one week of tracking data, with the week number as a column. If
+    columns are given, only those columns are parsed, in that order.
+    """
+    usecols = None
+    if columns is not None:
+        usecols = [col for col in columns if col != "week"]
+    df = pd.read_csv(f"{inpath}{week}.csv", usecols=usecols)
+    if usecols is not None:
+        df = df[usecols]
+    df["week"] = week
+    return df
+
+
+def get_tracking_play_keys(df_tracking: pd.DataFrame) -> pd.DataFrame:
+    """Returns the unique week, game, and play keys of the tracking data."""
+    df_play_keys = df_tracking[["week", "gameId", "playId"]].drop_duplicates()
+    return df_play_keys.reset_index(drop=True)
+
+
+def read_tracking_data(
+    inpath: str,
+    weeks: int,
+    columns: Optional[List[str]] = None,
+    play_keys: Optional[pd.DataFrame] = None,
+) -> pd.DataFrame:
     """
     Specialized function to read multiple weeks of tracking data and union them.
+    If columns are given, only those columns are parsed. If play keys are given,
+    only weeks with selected plays are read and each chunk is filtered to the
+    selected plays before it is kept.
     """
     week_range = get_weeks(weeks)
+    if play_keys is not None:
+        selected_weeks = set(play_keys["week"])
+        week_range = [week for week in week_range if week in selected_weeks]
+    # The week column is added after reading, so it is not in the files.
+    usecols = None
+    if columns is not None:
+        usecols = [col for col in columns if col != "week"]
+        # Play keys are needed to filter the chunks, even if not requested.
+        if play_keys is not None:
+            usecols = list(dict.fromkeys(usecols + ["gameId", "playId"]))
     readers = [
         pd.read_csv(
             f"{inpath}{week}.csv",
+            usecols=usecols,
             # Returns an iterator to read input file one chunk at a time. For
             # large datasets, this conserves memory and may reduce runtime.
             # However, for smaller datasets, it may be unnecessary.
@@ -103,8 +236,146 @@ def read_tracking_data(inpath: str, weeks: int) -> pd.DataFrame:
     dfs = []
     for week, reader in zip(week_range, readers):
         for chunk in reader:
+            if play_keys is not None:
+                chunk = filter_by_keys(chunk, play_keys, ["gameId", "playId"])
+                if usecols is not None:
+                    chunk = chunk[[col for col in columns if col != "week"]]
+                # Wrap the filtered rows so the new column can be added.
+                chunk = pd.DataFrame(chunk)
             # Add week number as column to chunk.
             chunk["week"] = week
             dfs.append(chunk)
 
+    # If no weeks have selected plays, return no rows with the same columns.
+    if not dfs:
+        if columns is None:
+            df_header = pd.read_csv(
+                f"{inpath}{get_weeks(weeks)[0]}.csv", nrows=0
+            )
+            columns = list(df_header.columns)
+        return pd.DataFrame(
+            columns=[col for col in columns if col != "week"] + ["week"]
+        )
+
     return union_dataframes(dfs)
+
+
+def read_parquet(
+    infile: str, columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """Reads a DataFrame from a Parquet file path, optionally only some columns."""
+    return pd.read_parquet(infile, columns=columns)
+
+
+def write_parquet(
+    df: pd.DataFrame, outfile: str, partition_cols: Optional[List[str]] = None
+):
+    """
+    Writes a DataFrame to a Parquet path and creates parent directories if they
+    do not exist. If partition columns are given, the path is a directory with
+    one subdirectory per partition value, and the partitions written replace
+    any existing files for the same partition values.
+    """
+    outpath = Path(outfile).parent
+    outpath.mkdir(parents=True, exist_ok=True)
+    if partition_cols is None:
+        df.to_parquet(outfile, index=False)
+        return
+    # Without deleting the existing files of a partition, writing the same
+    # partition again would add a second copy of its rows.
+    df.to_parquet(
+        outfile,
+        index=False,
+        partition_cols=partition_cols,
+        existing_data_behavior="delete_matching",
+    )
+
+
+def convert_csv_to_parquet(
+    infile: str, outfile: str, dtype: Dict[str, str]
+) -> None:
+    """Reads a CSV file with the given schema and writes it as Parquet."""
+    df = pd.read_csv(infile, dtype=dtype)
+    write_parquet(df, outfile)
+
+
+def convert_tracking_data_to_parquet(inpath: str, outpath: str, weeks: int):
+    """
+    Converts the weekly tracking CSV files into one Parquet dataset, partitioned
+    by week and game, with a compact schema. Runs one week at a time so that
+    only one week of tracking data is in memory. Converting again replaces the
+    partitions of the converted weeks.
+    """
+    for week in get_weeks(weeks):
+        df = pd.read_csv(f"{inpath}{week}.csv", dtype=TRACKING_DTYPES)
+        df["week"] = week
+        write_parquet(df, outpath, partition_cols=TRACKING_PARTITION_COLUMNS)
+
+
+def convert_raw_data_to_parquet(inpath: str, outpath: str, weeks: int = 8):
+    """
+    One-time conversion of the raw tracking, play, and PFF scouting CSV files
+    into the Parquet layout expected by read_tracking_parquet().
+    """
+    convert_csv_to_parquet(
+        f"{inpath}/plays.csv", f"{outpath}/plays.parquet", PLAYS_DTYPES
+    )
+    convert_csv_to_parquet(
+        f"{inpath}/pffScoutingData.csv",
+        f"{outpath}/pffScoutingData.parquet",
+        PFF_DTYPES,
+    )
+    convert_tracking_data_to_parquet(
+        f"{inpath}/week", f"{outpath}/tracking", weeks
+    )
+
+
+def read_tracking_parquet(
+    inpath: str,
+    weeks: int,
+    columns: Optional[List[str]] = None,
+    play_keys: Optional[pd.DataFrame] = None,
+) -> pd.DataFrame:
+    """
+    Reads multiple weeks of tracking data from the partitioned Parquet dataset.
+    Only the partitions for the requested weeks and the requested columns, if
+    given, are loaded. If play keys are given, only the partitions for the
+    selected games are loaded and rows are filtered to the selected plays.
+    """
+    week_range = get_weeks(weeks)
+    filters = [("week", "in", week_range)]
+    if play_keys is not None:
+        game_ids = [int(game_id) for game_id in play_keys["gameId"].unique()]
+        play_ids = [int(play_id) for play_id in play_keys["playId"].unique()]
+        filters.append(("gameId", "in", game_ids))
+        filters.append(("playId", "in", play_ids))
+
+    # Play keys are needed to filter the rows, even if not requested.
+    read_columns = columns
+    if columns is not None and play_keys is not None:
+        read_columns = list(dict.fromkeys(columns + ["gameId", "playId"]))
+
+    df = pd.read_parquet(inpath, columns=read_columns, filters=filters)
+    # Partition values are read back as categories, so restore their types.
+    for col in TRACKING_PARTITION_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(TRACKING_DTYPES.get(col, "int32"))
+
+    # The filters above can keep plays from one game with the ID of a play
+    # selected in another game, so filter again to the exact plays.
+    if play_keys is not None:
+        df = filter_by_keys(df, play_keys, ["gameId", "playId"])
+        df = df.reset_index(drop=True)
+    if columns is not None:
+        df = df[columns]
+    return df
+
+
+def read_tracking_parquet_play_keys(inpath: str, weeks: int) -> pd.DataFrame:
+    """
+    Reads the unique week, game, and play keys from the partitioned Parquet
+    dataset, only loading the key columns.
+    """
+    columns = ["week", "gameId", "playId"]
+    df = read_tracking_parquet(inpath, weeks, columns=columns)
+    return df[columns].drop_duplicates().reset_index(drop=True)
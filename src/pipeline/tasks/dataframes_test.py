@@ -1,6 +1,18 @@
 import pandas as pd
 
-from src.pipeline.tasks.dataframes import limit_by_child_keys, limit_by_keys
+from src.pipeline.tasks.dataframes import (
+    convert_tracking_data_to_parquet,
+    filter_by_keys,
+    get_tracking_play_keys,
+    limit_by_child_keys,
+    limit_by_keys,
+    read_tracking_data,
+    read_tracking_parquet,
+    read_tracking_week,
+    select_play_keys,
+    split_play_keys_by_game,
+    write_csv,
+)
 
 
 def test_limit_by_keys():
@@ -54,3 +66,213 @@ def test_limit_by_child_keys():
         {"x": 2, "y": 2, "z": 8},
     ]
     assert actual.to_dict(orient="records") == expected
+
+
+def write_tracking_weeks(inpath: str):
+    """Writes two weeks of tracking data with one game each."""
+    for week, game_id in [(1, 10), (2, 20)]:
+        pd.DataFrame(
+            [
+                {
+                    "gameId": game_id,
+                    "playId": 1,
+                    "nflId": 5.0,
+                    "frameId": 1,
+                    "team": "CHI",
+                    "x": 1.5,
+                    "event": "None",
+                },
+                {
+                    "gameId": game_id,
+                    "playId": 1,
+                    "nflId": None,
+                    "frameId": 1,
+                    "team": "football",
+                    "x": 2.5,
+                    "event": "None",
+                },
+            ]
+        ).to_csv(f"{inpath}{week}.csv", index=False)
+
+
+def test_convert_tracking_data_to_parquet(tmp_path):
+    inpath = f"{tmp_path}/week"
+    outpath = f"{tmp_path}/tracking"
+    write_tracking_weeks(inpath)
+
+    convert_tracking_data_to_parquet(inpath, outpath, weeks=2)
+    # Only read the first week and a subset of columns.
+    columns = ["week", "gameId", "nflId", "team", "x"]
+    actual = read_tracking_parquet(outpath, weeks=1, columns=columns)
+
+    assert sorted(actual.columns) == sorted(columns)
+    assert actual["gameId"].dtype == "int32"
+    assert actual["x"].dtype == "float32"
+    assert actual["team"].dtype == "category"
+    actual_rows = actual[columns].sort_values("x").to_dict(orient="records")
+    assert actual_rows[0] == {
+        "week": 1,
+        "gameId": 10,
+        "nflId": 5.0,
+        "team": "CHI",
+        "x": 1.5,
+    }
+    assert actual_rows[1]["team"] == "football"
+    assert len(actual_rows) == 2
+
+
+def test_convert_tracking_data_to_parquet_twice(tmp_path):
+    inpath = f"{tmp_path}/week"
+    outpath = f"{tmp_path}/tracking"
+    write_tracking_weeks(inpath)
+
+    convert_tracking_data_to_parquet(inpath, outpath, weeks=2)
+    convert_tracking_data_to_parquet(inpath, outpath, weeks=2)
+
+    # Converting again replaces the partitions instead of adding to them.
+    actual = read_tracking_parquet(outpath, weeks=2)
+    assert len(actual) == 4
+    assert actual.groupby("gameId").size().to_dict() == {10: 2, 20: 2}
+
+
+def test_filter_by_keys():
+    df = pd.DataFrame(
+        [
+            {"a": 1, "b": 1, "c": 1},
+            {"a": 1, "b": 2, "c": 2},
+            {"a": 2, "b": 1, "c": 3},
+            {"a": 2, "b": 2, "c": 4},
+        ]
+    )
+    df_keys = pd.DataFrame([{"a": 2, "b": 1}, {"a": 1, "b": 2}])
+    actual = filter_by_keys(df, df_keys, keys=["a", "b"])
+    # Keeps the original order of the rows.
+    expected = [
+        {"a": 1, "b": 2, "c": 2},
+        {"a": 2, "b": 1, "c": 3},
+    ]
+    assert actual.to_dict(orient="records") == expected
+
+
+def test_select_play_keys():
+    df_play_keys = pd.DataFrame(
+        [
+            {"week": 1, "gameId": 1, "playId": 3},
+            {"week": 1, "gameId": 1, "playId": 1},
+            {"week": 1, "gameId": 1, "playId": 2},
+            {"week": 1, "gameId": 2, "playId": 1},
+            {"week": 2, "gameId": 4, "playId": 5},
+            {"week": 2, "gameId": 3, "playId": 4},
+            {"week": 2, "gameId": 3, "playId": 6},
+        ]
+    )
+    actual = select_play_keys(df_play_keys, max_games=1, max_plays=2)
+    expected = [
+        {"week": 1, "gameId": 1, "playId": 1},
+        {"week": 1, "gameId": 1, "playId": 2},
+        {"week": 2, "gameId": 3, "playId": 4},
+        {"week": 2, "gameId": 3, "playId": 6},
+    ]
+    assert actual.to_dict(orient="records") == expected
+
+
+def test_select_play_keys_explicit_ids():
+    df_play_keys = pd.DataFrame(
+        [
+            {"week": 1, "gameId": 1, "playId": 1},
+            {"week": 1, "gameId": 1, "playId": 2},
+            {"week": 1, "gameId": 2, "playId": 2},
+            {"week": 2, "gameId": 3, "playId": 2},
+        ]
+    )
+    actual = select_play_keys(df_play_keys, game_ids=[1, 3], play_ids=[2])
+    expected = [
+        {"week": 1, "gameId": 1, "playId": 2},
+        {"week": 2, "gameId": 3, "playId": 2},
+    ]
+    assert actual.to_dict(orient="records") == expected
+
+
+def test_read_tracking_data_with_play_keys(tmp_path):
+    inpath = f"{tmp_path}/week"
+    pd.DataFrame(
+        [
+            {"gameId": 1, "playId": 1, "frameId": 1, "x": 1.0},
+            {"gameId": 1, "playId": 2, "frameId": 1, "x": 2.0},
+            {"gameId": 2, "playId": 1, "frameId": 1, "x": 3.0},
+        ]
+    ).to_csv(f"{inpath}1.csv", index=False)
+    pd.DataFrame(
+        [{"gameId": 3, "playId": 1, "frameId": 1, "x": 4.0}],
+    ).to_csv(f"{inpath}2.csv", index=False)
+
+    df_play_keys = pd.DataFrame([{"week": 1, "gameId": 1, "playId": 2}])
+    actual = read_tracking_data(
+        inpath, weeks=2, columns=["week", "x"], play_keys=df_play_keys
+    )
+    expected = [{"x": 2.0, "week": 1}]
+    assert actual.to_dict(orient="records") == expected
+
+
+def test_read_tracking_week(tmp_path):
+    inpath = f"{tmp_path}/week"
+    pd.DataFrame(
+        [
+            {"gameId": 1, "playId": 1, "frameId": 1, "x": 1.0},
+            {"gameId": 1, "playId": 1, "frameId": 2, "x": 2.0},
+            {"gameId": 2, "playId": 3, "frameId": 1, "x": 3.0},
+        ]
+    ).to_csv(f"{inpath}2.csv", index=False)
+
+    actual = read_tracking_week(inpath, 2, columns=["x", "week", "gameId"])
+    assert list(actual.columns) == ["x", "gameId", "week"]
+    assert actual["week"].tolist() == [2, 2, 2]
+
+    # The play keys come from the rows that were read.
+    actual = get_tracking_play_keys(read_tracking_week(inpath, 2))
+    expected = [
+        {"week": 2, "gameId": 1, "playId": 1},
+        {"week": 2, "gameId": 2, "playId": 3},
+    ]
+    assert actual.to_dict(orient="records") == expected
+
+
+def test_read_tracking_data_without_play_keys_selected(tmp_path):
+    inpath = f"{tmp_path}/week"
+    pd.DataFrame(
+        [{"gameId": 1, "playId": 1, "frameId": 1, "x": 1.0}],
+    ).to_csv(f"{inpath}1.csv", index=False)
+    df_play_keys = pd.DataFrame(columns=["week", "gameId", "playId"])
+
+    actual = read_tracking_data(
+        inpath, weeks=1, columns=["week", "x"], play_keys=df_play_keys
+    )
+    assert actual.empty
+    assert list(actual.columns) == ["x", "week"]
+
+    actual = read_tracking_data(inpath, weeks=1, play_keys=df_play_keys)
+    assert actual.empty
+    assert list(actual.columns) == ["gameId", "playId", "frameId", "x", "week"]
+
+
+def test_split_play_keys_by_game():
+    df_play_keys = pd.DataFrame(
+        {
+            "week": [1, 1, 1, 1, 2],
+            "gameId": [20, 20, 10, 30, 40],
+            "playId": [1, 2, 1, 1, 1],
+        }
+    )
+    actual = split_play_keys_by_game(df_play_keys, games_per_batch=2)
+    assert [df["gameId"].tolist() for df in actual] == [
+        [20, 20, 10],
+        [30, 40],
+    ]
+
+
+def test_write_csv_append(tmp_path):
+    outfile = f"{tmp_path}/out/data.csv"
+    write_csv(pd.DataFrame({"a": [1], "b": [2]}), outfile)
+    write_csv(pd.DataFrame({"a": [3], "b": [4]}), outfile, append=True)
+    actual = pd.read_csv(outfile)
+    assert actual.to_dict(orient="list") == {"a": [1, 3], "b": [2, 4]}
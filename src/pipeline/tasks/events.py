@@ -1,7 +1,17 @@
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 
+AUTOEVENT_RENAMES = {
+    "autoevent_ballsnap": "ball_snap",
+    "autoevent_passforward": "pass_forward",
+    "autoevent_passinterrupted": "pass_interrupted",
+}
+# For example, a play could have multiple `fumble` events, so we only want to
+# remove redundant events that are non-repeatable.
+NON_REPEATABLE_EVENTS = {"ball_snap", "pass_forward"}
+
 
 def clean_autoevent(raw: str) -> Optional[str]:
     # Replace `None` event with null values.
@@ -9,24 +19,16 @@ def clean_autoevent(raw: str) -> Optional[str]:
         return None
 
     # Rename auto event names to base event names.
-    autoevent_renames = {
-        "autoevent_ballsnap": "ball_snap",
-        "autoevent_passforward": "pass_forward",
-        "autoevent_passinterrupted": "pass_interrupted",
-    }
     # If the raw name is not in the dictionary, fall back
     # to the raw name itself.
-    renamed_event = autoevent_renames.get(raw, raw)
+    renamed_event = AUTOEVENT_RENAMES.get(raw, raw)
     return renamed_event
 
 
 def remove_redundant_event(
     event: Optional[str], is_first: bool
 ) -> Optional[str]:
-    # For example, a play could have multiple `fumble` events, so we only want to
-    # remove redundant events that are non-repeatable.
-    non_repeatable_events = {"ball_snap", "pass_forward"}
-    should_not_repeat = event in non_repeatable_events
+    should_not_repeat = event in NON_REPEATABLE_EVENTS
     is_repeat = not is_first
     if should_not_repeat and is_repeat:
         return None
@@ -54,37 +56,35 @@ def clean_event_data(df_tracking: pd.DataFrame) -> pd.DataFrame:
     # Get only columns for event per frame, also copies the DataFrame.
     base_columns = ["gameId", "playId", "frameId", "event"]
     df = df_tracking[base_columns].drop_duplicates()
-    df["clean_event"] = df["event"].apply(clean_autoevent)
-
-    # Find first frame for each event type.
-    df_event_first_frame = (
-        df.groupby(["gameId", "playId", "clean_event"])
-        .agg(**{"first_frame": ("frameId", min)})
-        .reset_index()
-    )
-    df_with_first = df.merge(
-        df_event_first_frame,
-        left_on=["gameId", "playId", "clean_event", "frameId"],
-        right_on=["gameId", "playId", "clean_event", "first_frame"],
-        how="left",
+    # Events may be read as categories, but cleaning merges some categories.
+    raw_events = df["event"].astype(object)
+
+    # Rename auto event names to base event names and replace `None` event with
+    # null values, the same as clean_autoevent().
+    clean_events = raw_events.replace(AUTOEVENT_RENAMES).to_numpy()
+    clean_events[(raw_events == "None").to_numpy()] = None
+
+    # Set redundant events to a null value, the same as
+    # remove_redundant_event(): non-repeatable events that are not in the
+    # first frame with that event in the play.
+    is_non_repeatable = pd.Series(clean_events).isin(NON_REPEATABLE_EVENTS)
+    candidate_rows = np.flatnonzero(is_non_repeatable.to_numpy())
+    df_candidates = pd.DataFrame(
+        {
+            "gameId": df["gameId"].to_numpy()[candidate_rows],
+            "playId": df["playId"].to_numpy()[candidate_rows],
+            "event": clean_events[candidate_rows],
+            "frameId": df["frameId"].to_numpy()[candidate_rows],
+        }
     )
-    df_with_first["is_first_event_of_type"] = df_with_first[
-        "first_frame"
-    ].notna()
-
-    # Set redundant events to a null value.
-    df_with_first["clean_event"] = df_with_first.apply(
-        lambda row: remove_redundant_event(
-            event=row["clean_event"],
-            is_first=row["is_first_event_of_type"],
-        ),
-        axis=1,
-    )
-
-    # Rename `clean_event` to `event` and drop unnecessary columns.
-    df_with_first["event"] = df_with_first["clean_event"]
-    drop_columns = ["first_frame", "is_first_event_of_type", "clean_event"]
-    df_with_first.drop(columns=drop_columns, inplace=True)
+    first_frame = df_candidates.groupby(["gameId", "playId", "event"])[
+        "frameId"
+    ].transform("min")
+    is_repeat = (df_candidates["frameId"] != first_frame).to_numpy()
+    clean_events[candidate_rows[is_repeat]] = None
+
+    df_with_first = df.reset_index(drop=True)
+    df_with_first["event"] = clean_events
 
     max_frames_before_snap = 5
     df_snap = pd.DataFrame(df_with_first.query("event == 'ball_snap'"))
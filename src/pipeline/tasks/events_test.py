@@ -1,6 +1,15 @@
+import numpy as np
 import pandas as pd
 
-from src.pipeline.tasks.events import clean_event_data
+from src.benchmarks.synthetic import (
+    SyntheticDataConfig,
+    generate_synthetic_data,
+)
+from src.pipeline.tasks.events import (
+    clean_autoevent,
+    clean_event_data,
+    remove_redundant_event,
+)
 
 
 def test_clean_event_data():
@@ -102,3 +111,89 @@ def test_clean_event_data():
         {**p2, "frameId": 9, "event": None, **fbs},
     ]
     assert actual.to_dict(orient="records") == expected
+
+
+def clean_event_data_with_apply(df_tracking: pd.DataFrame) -> pd.DataFrame:
+    """
+    Previous implementation of clean_event_data(), which applies the cleaning
+    functions to each row, kept to check that the outputs are the same.
+    """
+    base_columns = ["gameId", "playId", "frameId", "event"]
+    df = df_tracking[base_columns].drop_duplicates()
+    df["event"] = df["event"].astype(object)
+    df["clean_event"] = df["event"].apply(clean_autoevent)
+    df_event_first_frame = (
+        df.groupby(["gameId", "playId", "clean_event"])
+        .agg(**{"first_frame": ("frameId", min)})
+        .reset_index()
+    )
+    df_with_first = df.merge(
+        df_event_first_frame,
+        left_on=["gameId", "playId", "clean_event", "frameId"],
+        right_on=["gameId", "playId", "clean_event", "first_frame"],
+        how="left",
+    )
+    df_with_first["is_first_event_of_type"] = df_with_first[
+        "first_frame"
+    ].notna()
+    df_with_first["clean_event"] = df_with_first.apply(
+        lambda row: remove_redundant_event(
+            event=row["clean_event"],
+            is_first=row["is_first_event_of_type"],
+        ),
+        axis=1,
+    )
+    df_with_first["event"] = df_with_first["clean_event"]
+    drop_columns = ["first_frame", "is_first_event_of_type", "clean_event"]
+    df_with_first.drop(columns=drop_columns, inplace=True)
+
+    max_frames_before_snap = 5
+    df_snap = pd.DataFrame(df_with_first.query("event == 'ball_snap'"))
+    df_snap["min"] = 1
+    df_snap["before_snap"] = df_snap["frameId"] - max_frames_before_snap
+    df_snap["frame_before_snap"] = df_snap[["before_snap", "min"]].max(axis=1)
+    before_snap_cols = ["gameId", "playId", "frame_before_snap"]
+    df_snap = df_snap[before_snap_cols].drop_duplicates()
+    return df_with_first.merge(df_snap, on=["gameId", "playId"], how="inner")
+
+
+def test_clean_event_data_same_as_apply():
+    config = SyntheticDataConfig(
+        weeks=1, games_per_week=2, plays_per_game=3, frames_per_play=30
+    )
+    df_tracking = generate_synthetic_data(config)["week1"]
+    # Add edge cases: a play without a snap, a missing event, a frame with two
+    # events, a repeated auto event, and a snap after the first frames.
+    df_extra = pd.DataFrame(
+        [
+            {"gameId": 9, "playId": 1, "frameId": 1, "event": "None"},
+            {"gameId": 9, "playId": 1, "frameId": 2, "event": "pass_forward"},
+            {"gameId": 9, "playId": 2, "frameId": 1, "event": np.nan},
+            {"gameId": 9, "playId": 2, "frameId": 9, "event": "ball_snap"},
+            {
+                "gameId": 9,
+                "playId": 2,
+                "frameId": 9,
+                "event": "autoevent_ballsnap",
+            },
+            {
+                "gameId": 9,
+                "playId": 2,
+                "frameId": 10,
+                "event": "autoevent_ballsnap",
+            },
+            {"gameId": 9, "playId": 2, "frameId": 11, "event": "fumble"},
+            {"gameId": 9, "playId": 2, "frameId": 12, "event": "fumble"},
+        ]
+    )
+    df_tracking = pd.concat([df_tracking, df_extra], ignore_index=True)
+
+    for df_input in [df_tracking, df_tracking.astype({"event": "category"})]:
+        expected = clean_event_data_with_apply(df_input)
+        actual = clean_event_data(df_input)
+        pd.testing.assert_frame_equal(actual, expected)
+        # Check null events are the same, since assert_frame_equal treats None
+        # and NaN as equal.
+        actual_is_none = [e is None for e in actual["event"]]
+        expected_is_none = [e is None for e in expected["event"]]
+        assert actual_is_none == expected_is_none
@@ -1,10 +1,15 @@
+from typing import Tuple
+
+import numpy as np
 import pandas as pd
 
-from src.metrics.pocket_area.base import PocketRole
+from src.metrics.pocket_area.base import POCKET_ROLE_CODES, PocketRole
+from src.metrics.pocket_area.batch import FrameBatch
 from src.metrics.pocket_area.helpers import convert_pff_role_to_pocket_role
 from src.pipeline.tasks.constants import (
     FRAME_PRIMARY_KEY,
     PFF_PRIMARY_KEY,
+    PLAY_PRIMARY_KEY,
     TRACKING_PRIMARY_KEY,
 )
 
@@ -50,3 +55,47 @@ def transform_to_records_per_frame(df_frames: pd.DataFrame) -> pd.DataFrame:
     df_grouped = df.groupby(FRAME_PRIMARY_KEY)
     df_out = df_grouped.agg(records=("object", list)).reset_index()
     return df_out
+
+
+def transform_to_frame_batch(
+    df_frames: pd.DataFrame,
+) -> Tuple[pd.DataFrame, FrameBatch]:
+    """
+    Packs the data for each frame into a frame batch of flat arrays, instead of
+    one list of records per frame. Returns the frame keys, with one row per
+    frame in the same order as the frames in the batch, and the batch.
+    """
+    # Sort by frame, keeping the original order of players within each frame,
+    # so that the players of each frame are contiguous.
+    df = df_frames.sort_values(FRAME_PRIMARY_KEY, kind="mergesort")
+    df_keys = df[FRAME_PRIMARY_KEY]
+
+    # A new frame starts at each row where the key differs from the row before.
+    is_new_frame = np.ones(len(df), dtype=bool)
+    if len(df) > 0:
+        key_values = df_keys.to_numpy()
+        is_new_frame[1:] = (key_values[1:] != key_values[:-1]).any(axis=1)
+    starts = np.flatnonzero(is_new_frame)
+    offsets = np.append(starts, len(df)).astype(np.int64)
+
+    # A new play starts at each frame where the game or play differs from the
+    # frame before.
+    is_play_start = np.ones(len(starts), dtype=bool)
+    if len(starts) > 0:
+        play_values = df_keys[PLAY_PRIMARY_KEY].to_numpy()[starts]
+        is_play_start[1:] = (play_values[1:] != play_values[:-1]).any(axis=1)
+
+    # Encode each pocket role as its integer code.
+    role_codes = {role.value: code for role, code in POCKET_ROLE_CODES.items()}
+    unknown_code = POCKET_ROLE_CODES[PocketRole.UNKNOWN]
+    role = df["role"].map(role_codes).fillna(unknown_code)
+
+    batch = FrameBatch(
+        x=df["x"].to_numpy(dtype=float),
+        y=df["y"].to_numpy(dtype=float),
+        role=role.to_numpy(dtype=np.int8),
+        offsets=offsets,
+        is_play_start=is_play_start,
+    )
+    df_frame_keys = df_keys.iloc[starts].reset_index(drop=True)
+    return df_frame_keys, batch
@@ -1,6 +1,7 @@
 import pandas as pd
 
 from src.pipeline.tasks.frames import (
+    transform_to_frame_batch,
     transform_to_frames,
     transform_to_records_per_frame,
 )
@@ -82,3 +83,77 @@ def test_transform_to_records_per_frame():
         }
     ]
     assert actual.to_dict(orient="records") == expected
+
+
+def test_transform_to_frame_batch():
+    df_frames = pd.DataFrame(
+        [
+            {
+                "gameId": 1,
+                "playId": 1,
+                "frameId": 2,
+                "x": 4,
+                "y": 4,
+                "role": "passer",
+            },
+            {
+                "gameId": 1,
+                "playId": 1,
+                "frameId": 1,
+                "x": 1,
+                "y": 1,
+                "role": "passer",
+            },
+            {
+                "gameId": 1,
+                "playId": 1,
+                "frameId": 1,
+                "x": 2,
+                "y": 2,
+                "role": "blocker",
+            },
+            {
+                "gameId": 1,
+                "playId": 1,
+                "frameId": 2,
+                "x": 5,
+                "y": 5,
+                "role": "unknown",
+            },
+            {
+                "gameId": 1,
+                "playId": 1,
+                "frameId": 1,
+                "x": 3,
+                "y": 3,
+                "role": "rusher",
+            },
+        ]
+    )
+    actual_keys, actual_batch = transform_to_frame_batch(df_frames)
+    expected_keys = [
+        {"gameId": 1, "playId": 1, "frameId": 1},
+        {"gameId": 1, "playId": 1, "frameId": 2},
+    ]
+    assert actual_keys.to_dict(orient="records") == expected_keys
+    assert actual_batch.offsets.tolist() == [0, 3, 5]
+    # Each frame keeps the same records as transform_to_records_per_frame().
+    expected_records = transform_to_records_per_frame(df_frames)["records"]
+    assert actual_batch.get_records(0) == expected_records[0]
+    assert actual_batch.get_records(1) == expected_records[1]
+
+
+def test_transform_to_frame_batch_play_starts():
+    keys = [(2, 2, 1), (1, 1, 2), (1, 2, 1), (1, 1, 1)]
+    df_frames = pd.DataFrame(
+        [
+            {"gameId": g, "playId": p, "frameId": f, "x": 0, "y": 0}
+            for g, p, f in keys
+        ]
+    ).assign(role="passer")
+    _, actual_batch = transform_to_frame_batch(df_frames)
+    assert actual_batch.is_play_start.tolist() == [True, False, True, True]
+    assert actual_batch.get_frames(1, 3).is_play_start.tolist() == [
+        False,
+        True,
+    ]
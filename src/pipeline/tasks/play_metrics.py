@@ -1,16 +1,9 @@
+from typing import List
+
 import numpy as np
 import pandas as pd
 
-
-def get_average_pocket_area_loss_per_second(
-    area_start, area_end, time_start, time_end
-):
-    time_delta = time_end - time_start
-    if time_delta == 0:
-        return 0
-
-    area_delta = area_end - area_start
-    return area_delta / time_delta
+FRAMES_PER_SECOND = 10.0
 
 
 def calculate_average_pocket_area_loss_per_second(
@@ -40,18 +33,66 @@ def calculate_average_pocket_area_loss_per_second(
         - average_pocket_area_loss_per_second
     """
     df_metric = pd.DataFrame(df_play_pocket_metrics)
-    df_metric["average_pocket_area_loss_per_second"] = df_metric.apply(
-        lambda df: get_average_pocket_area_loss_per_second(
-            area_start=df["area_start"],
-            area_end=df["area_end"],
-            time_start=df["time_start"],
-            time_end=df["time_end"],
-        ),
-        axis=1,
+    df_metric["average_pocket_area_loss_per_second"] = get_area_rate(
+        area_delta=df_metric["area_end"] - df_metric["area_start"],
+        time_delta=df_metric["time_end"] - df_metric["time_start"],
     )
     return df_metric
 
 
+def calculate_pocket_area_loss_rates(
+    df_play_pocket_metrics: pd.DataFrame,
+) -> pd.DataFrame:
+    """
+    Parameters:
+    df_play_pocket_metrics: DataFrame for every play, pocket area method,
+        and window type, with metrics related to pocket area, as returned by
+        get_play_pocket_metrics().
+
+    Returns:
+        DataFrame with rates of pocket area loss for each primary key,
+        calculated column by column. Rates are 0 for windows with no time.
+    Contains new columns:
+        - average_pocket_area_loss_per_second: Change in area per second from
+          the start to the end of the window, negative if the area decreased.
+        - percent_pocket_area_loss_per_second: Change in area per second as a
+          percent of the area at the start of the window, negative if the area
+          decreased. Null if the area at the start is 0.
+        - max_frame_pocket_area_drop_per_second: Largest decrease in area
+          from one frame to the next, per second, positive if the area
+          decreased. Only added if the input has max_frame_area_drop.
+    """
+    df_metric = calculate_average_pocket_area_loss_per_second(
+        df_play_pocket_metrics
+    )
+    area_start = df_metric["area_start"].to_numpy(dtype=float)
+    area_delta = df_metric["area_end"].to_numpy(dtype=float) - area_start
+    time_delta = (df_metric["time_end"] - df_metric["time_start"]).to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent_delta = np.where(
+            area_start == 0, np.nan, 100 * area_delta / area_start
+        )
+    df_metric["percent_pocket_area_loss_per_second"] = get_area_rate(
+        percent_delta, time_delta
+    )
+    if "max_frame_area_drop" in df_metric.columns:
+        df_metric["max_frame_pocket_area_drop_per_second"] = (
+            df_metric["max_frame_area_drop"] * FRAMES_PER_SECOND
+        )
+    return df_metric
+
+
+def get_area_rate(area_delta, time_delta) -> np.ndarray:
+    """
+    Returns the change in area per second of each window, given the change in
+    area and time of each window. Windows with no time have a rate of 0.
+    """
+    area_delta = np.asarray(area_delta, dtype=float)
+    time_delta = np.asarray(time_delta, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(time_delta == 0, 0.0, area_delta / time_delta)
+
+
 def get_play_pocket_metrics(df_area: pd.DataFrame) -> pd.DataFrame:
     """
     Parameters:
@@ -74,71 +115,135 @@ def get_play_pocket_metrics(df_area: pd.DataFrame) -> pd.DataFrame:
         - window_type (PK)
         - median_area
         - average_area
+        - max_frame_area_drop: Largest decrease in area from one frame to the
+          next in the window, or null if the window has one frame.
         - area_start
         - area_end
         - time_start
         - time_end
     """
-    # Copy input and add columns to mark start and end of time window.
-    df = pd.DataFrame(df_area)
-    # Find the first and last frame of each play.
     play_keys = ["gameId", "playId", "method", "window_type"]
-    aggregations = {
-        "min": ("frameId", min),
-        "max": ("frameId", max),
-        "median_area": ("area", np.median),
-        "average_area": ("area", np.mean),
-    }
-    df_time_window = df.groupby(play_keys).agg(**aggregations).reset_index()
-    """
-    df_time_window =
-    gameId  playId  method	window_type     min     max
-    1       1       A       after_snap      5       25
-    1       2       A       after_snap      2       22
-    1       1       B       after_snap      5       25
-    1       2       B       after_snap      2       22
-    1       1       A       before_pass     ...
-    ...
-    """
-    # Join in the start pocket area for each play.
-    # Note: The join should explode if there are multiple `method` rows, so that we get each of them.
-    # Note: The join columns have different names on each side.
-    window_cols = ["median_area", "average_area"]
-    start_cols = ["frameId", "min", "max", "area_start"]
-    all_start_cols = play_keys + window_cols + start_cols
-    df_with_start = df_time_window.merge(
-        df,
-        left_on=(play_keys + ["min"]),
-        right_on=(play_keys + ["frameId"]),
-        how="left",
-    ).rename(columns={"area": "area_start"})[all_start_cols]
-    # Join in the end pocket area for each play.
-    df_with_both = (
-        df_with_start.merge(
-            df,
-            left_on=(play_keys + ["max"]),
-            right_on=(play_keys + ["frameId"]),
-            how="left",
-        )
-        .rename(columns={"area": "area_end"})
-        .drop(columns=["frameId_x", "frameId_y"])
+    # Sort frames by window, then by frame, as positions into the input, so
+    # that the start and end of each window can be found without joining the
+    # windows back to the frames. Frames with a null key are not in a window.
+    key_codes = [pd.factorize(df_area[key], sort=True)[0] for key in play_keys]
+    has_keys = np.logical_and.reduce([codes >= 0 for codes in key_codes])
+    frame_ids = df_area["frameId"].to_numpy()
+    order = np.lexsort([frame_ids] + key_codes[::-1])
+    order = order[has_keys[order]]
+    window_starts = get_window_starts([codes[order] for codes in key_codes])
+
+    df_metrics = get_window_metrics(
+        frame_ids[order],
+        df_area["area"].to_numpy(dtype=float)[order],
+        window_starts,
     )
     """
-    gameId	playId  method  window_type		min     max     area_start	area_end
-    1       1       A       after_snap		5       25      100         80
-    1       2       A       after_snap		2       22      120         95
-    1       1       B       after_snap		5       25      20          12
-    1       2       B       after_snap		2       22      23          20
-    1       1       A       before_pass		...
+    df_metrics =
+    median_area  average_area  ...  area_start  area_end  time_start  time_end
+    100          100                100         80        0.5         2.5
     ...
     """
-    frames_per_second = 10.0
-    df_with_both["time_start"] = (
-        df_with_both["min"].astype(float) / frames_per_second
+    # Take the keys from the first frame of each window and the other columns
+    # from the last frame of each window.
+    window_ends = get_window_ends(window_starts, len(order))
+    df_keys = df_area[play_keys].take(order[window_starts])
+    end_columns = [
+        column
+        for column in df_area.columns
+        if column not in play_keys + ["frameId"]
+    ]
+    df_end = df_area[end_columns].take(order[window_ends])
+    df_end = df_end.rename(columns={"area": "area_end"})
+
+    return combine_window_metrics(df_keys, df_metrics, df_end)
+
+
+def combine_window_metrics(
+    df_keys: pd.DataFrame, df_metrics: pd.DataFrame, df_end: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Combines the keys of each window, the metrics from get_window_metrics(),
+    and the columns from the last frame of each window into one row per
+    window, in the order of the play pocket metrics.
+    """
+    window_columns = [
+        "median_area",
+        "average_area",
+        "max_frame_area_drop",
+        "area_start",
+    ]
+    time_columns = ["time_start", "time_end"]
+    return pd.concat(
+        [
+            df_keys.reset_index(drop=True),
+            df_metrics[window_columns],
+            df_end.reset_index(drop=True),
+            df_metrics[time_columns],
+        ],
+        axis=1,
     )
-    df_with_both["time_end"] = (
-        df_with_both["max"].astype(float) / frames_per_second
+
+
+def get_window_starts(sorted_keys: List[np.ndarray]) -> np.ndarray:
+    """
+    Returns the position of the first frame of each window, given the keys of
+    each frame, sorted by window.
+    """
+    if len(sorted_keys[0]) == 0:
+        return np.zeros(0, dtype=int)
+    is_new_window = np.zeros(len(sorted_keys[0]), dtype=bool)
+    is_new_window[0] = True
+    for keys in sorted_keys:
+        is_new_window[1:] |= keys[1:] != keys[:-1]
+    return np.flatnonzero(is_new_window)
+
+
+def get_window_ends(window_starts: np.ndarray, n_frames: int) -> np.ndarray:
+    """Returns the position of the last frame of each window."""
+    if len(window_starts) == 0:
+        return window_starts
+    return np.append(window_starts[1:], n_frames) - 1
+
+
+def get_window_metrics(
+    frame_ids: np.ndarray, areas: np.ndarray, window_starts: np.ndarray
+) -> pd.DataFrame:
+    """
+    Calculates the pocket area metrics for each window in one pass over
+    columnar arrays of the frame ID and area of each frame, sorted by window,
+    then by frame, given the position of the first frame of each window.
+
+    Returns one row per window, with columns:
+        - median_area
+        - average_area
+        - max_frame_area_drop
+        - area_start
+        - area_end
+        - time_start
+        - time_end
+    """
+    window_ends = get_window_ends(window_starts, len(areas))
+    window_ids = np.zeros(len(areas), dtype=int)
+    window_ids[window_starts[1:]] = 1
+    window_ids = np.cumsum(window_ids)
+
+    # Drop in area from the previous frame, which is null for the first frame
+    # of each window.
+    area_drops = np.empty(len(areas))
+    area_drops[1:] = areas[:-1] - areas[1:]
+    area_drops[window_starts] = np.nan
+
+    df_frames = pd.DataFrame({"area": areas, "area_drop": area_drops})
+    grouped = df_frames.groupby(window_ids, sort=False)
+    return pd.DataFrame(
+        {
+            "median_area": grouped["area"].median().to_numpy(),
+            "average_area": grouped["area"].mean().to_numpy(),
+            "max_frame_area_drop": grouped["area_drop"].max().to_numpy(),
+            "area_start": areas[window_starts],
+            "area_end": areas[window_ends],
+            "time_start": frame_ids[window_starts] / FRAMES_PER_SECOND,
+            "time_end": frame_ids[window_ends] / FRAMES_PER_SECOND,
+        }
     )
-    drop_cols = ["min", "max"]
-    df_with_both.drop(columns=drop_cols, inplace=True)
-    return df_with_both
@@ -1,9 +1,13 @@
+import numpy as np
 import pandas as pd
 import pytest
 
 from src.pipeline.tasks.play_metrics import (
     calculate_average_pocket_area_loss_per_second,
+    calculate_pocket_area_loss_rates,
     get_play_pocket_metrics,
+    get_window_metrics,
+    get_window_starts,
 )
 from src.pipeline.tasks.test_helpers import row_creator
 
@@ -69,21 +73,24 @@ def test_get_play_pocket_metrics():
         "time_end",
         "median_area",
         "average_area",
+        "max_frame_area_drop",
     ]
     output_row = row_creator(output_columns)
 
     # Compare to expected rows.
     a_20_6 = pytest.approx(20.666666)
+    # fmt: off
     expected = [
-        output_row(1, 1, "A", "after_snap", 100, 80, 0.5, 2.5, 100.0, 100.0),
-        output_row(1, 1, "A", "before_pass", 110, 75, 1.2, 3.2, 92.5, 92.5),
-        output_row(1, 1, "B", "after_snap", 20, 12, 0.5, 2.5, 20.0, a_20_6),
-        output_row(1, 1, "B", "before_pass", 15, 8, 1.2, 3.2, 11.5, 11.5),
-        output_row(2, 2, "A", "after_snap", 110, 85, 0.5, 2.5, 97.5, 87.5),
-        output_row(2, 2, "A", "before_pass", 115, 80, 1.2, 3.2, 97.5, 97.5),
-        output_row(2, 2, "B", "after_snap", 25, 17, 0.5, 2.5, 21.0, 21.0),
-        output_row(2, 2, "B", "before_pass", 18, 12, 1.2, 3.2, 15.0, 15.0),
+        output_row(1, 1, "A", "after_snap", 100, 80, 0.5, 2.5, 100.0, 100.0, 40),
+        output_row(1, 1, "A", "before_pass", 110, 75, 1.2, 3.2, 92.5, 92.5, 35),
+        output_row(1, 1, "B", "after_snap", 20, 12, 0.5, 2.5, 20.0, a_20_6, 18),
+        output_row(1, 1, "B", "before_pass", 15, 8, 1.2, 3.2, 11.5, 11.5, 7),
+        output_row(2, 2, "A", "after_snap", 110, 85, 0.5, 2.5, 97.5, 87.5, 105),
+        output_row(2, 2, "A", "before_pass", 115, 80, 1.2, 3.2, 97.5, 97.5, 35),
+        output_row(2, 2, "B", "after_snap", 25, 17, 0.5, 2.5, 21.0, 21.0, 8),
+        output_row(2, 2, "B", "before_pass", 18, 12, 1.2, 3.2, 15.0, 15.0, 6),
     ]
+    # fmt: on
     assert actual_rows == expected
 
 
@@ -137,3 +144,74 @@ def test_calculate_average_pocket_area_loss_per_second():
         output_row(2, 2, "B", "after_snap", -4.0),
     ]
     assert actual_rows == expected
+
+
+def test_calculate_pocket_area_loss_rates():
+    # Helper function to create input rows.
+    input_columns = [
+        "gameId",
+        "playId",
+        "method",
+        "window_type",
+        "area_start",
+        "area_end",
+        "time_start",
+        "time_end",
+        "max_frame_area_drop",
+    ]
+    input_row = row_creator(input_columns)
+
+    # Create input rows.
+    df = pd.DataFrame(
+        [
+            input_row(1, 1, "A", "after_snap", 100, 80, 0.5, 2.5, 6.0),
+            # Window with no time.
+            input_row(1, 1, "A", "before_pass", 110, 75, 1.2, 1.2, np.nan),
+            # Window that starts with no area.
+            input_row(1, 1, "B", "after_snap", 0, 12, 0.5, 2.5, -1.5),
+        ]
+    )
+
+    # Run actual transformation.
+    actual = calculate_pocket_area_loss_rates(df)
+
+    assert actual["average_pocket_area_loss_per_second"].tolist() == [
+        -10.0,
+        0.0,
+        6.0,
+    ]
+    percent = actual["percent_pocket_area_loss_per_second"].tolist()
+    assert percent[:2] == [-10.0, 0.0]
+    assert np.isnan(percent[2])
+    drop = actual["max_frame_pocket_area_drop_per_second"].tolist()
+    assert drop[0] == 60.0
+    assert np.isnan(drop[1])
+    assert drop[2] == -15.0
+
+
+def test_get_window_metrics():
+    methods = np.array(["a", "a", "a", "b", "b"])
+    frame_ids = np.array([10, 11, 12, 10, 11])
+    areas = np.array([8.0, 5.0, 6.0, 4.0, np.nan])
+    window_starts = get_window_starts([methods])
+    assert window_starts.tolist() == [0, 3]
+    actual = get_window_metrics(frame_ids, areas, window_starts)
+    expected = pd.DataFrame(
+        {
+            "median_area": [6.0, 4.0],
+            "average_area": [19.0 / 3, 4.0],
+            "max_frame_area_drop": [3.0, np.nan],
+            "area_start": [8.0, 4.0],
+            "area_end": [6.0, np.nan],
+            "time_start": [1.0, 1.0],
+            "time_end": [1.2, 1.1],
+        }
+    )
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_get_play_pocket_metrics_empty():
+    columns = ["gameId", "playId", "frameId", "method", "window_type", "area"]
+    actual = get_play_pocket_metrics(pd.DataFrame(columns=columns))
+    assert len(actual) == 0
+    assert "area_end" in actual.columns
@@ -1,10 +1,280 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
 import pandas as pd
 
+from src.pipeline.tasks.play_metrics import (
+    combine_window_metrics,
+    get_window_metrics,
+)
+
+ANCHOR_DIRECTIONS = ("after", "before")
+
+
+@dataclass(frozen=True)
+class TimeWindowSpec:
+    """
+    Time window of a play, relative to an anchor frame.
+
+    The anchor is a column of the event data with a frame ID for each play,
+    such as frame_start (snap of the ball) or frame_end (end of the pocket),
+    or an event, such as pass_forward, for the first frame with that event.
+
+    The window covers size frames after or before the anchor, moved by the
+    offset. If the size is None, the window uses each window size of the run.
+    If within_pocket is True, plays only have the window if it fits in the
+    pocket: windows after the anchor must end by frame_end, and windows
+    before the anchor must start at or after frame_start.
+
+    If end_anchor is given, the window goes from the anchor to the end
+    anchor instead, without a size.
+    """
+
+    anchor: str
+    direction: str = "after"
+    offset_frames: int = 0
+    size_frames: Optional[int] = None
+    end_anchor: Optional[str] = None
+    within_pocket: bool = True
+
+    def __post_init__(self):
+        if self.direction not in ANCHOR_DIRECTIONS:
+            raise ValueError(
+                f"Window direction must be one of {ANCHOR_DIRECTIONS}, "
+                f"not {self.direction}."
+            )
+
+    @property
+    def anchors(self) -> List[str]:
+        if self.end_anchor is None:
+            return [self.anchor]
+        return [self.anchor, self.end_anchor]
+
+    @property
+    def uses_window_sizes(self) -> bool:
+        return self.end_anchor is None and self.size_frames is None
+
+    def get_sizes(self, window_sizes: Sequence[int]) -> List[Optional[int]]:
+        """Returns the sizes of this window for the window sizes of a run."""
+        if self.uses_window_sizes:
+            return list(window_sizes)
+        return [self.size_frames]
+
+    def get_window(
+        self, df_plays: pd.DataFrame, size_frames: Optional[int]
+    ) -> Tuple[pd.Series, pd.Series]:
+        """
+        Returns the first and last frame of the window for each play, given
+        the frame of each anchor and the pocket frames of each play, which are
+        null for plays without the window.
+        """
+        anchor = df_plays[self.anchor] + self.offset_frames
+        if self.end_anchor is not None:
+            start, end = anchor, df_plays[self.end_anchor]
+        elif self.direction == "after":
+            start, end = anchor, anchor + size_frames
+        else:
+            start, end = anchor - size_frames, anchor
+
+        if not self.within_pocket:
+            return start, end
+        if self.direction == "after":
+            fits_pocket = end <= df_plays["frame_end"]
+        else:
+            fits_pocket = start >= df_plays["frame_start"]
+        return start.where(fits_pocket), end.where(fits_pocket)
+
+
+TIME_WINDOW_TYPES: Dict[str, TimeWindowSpec] = {
+    "after_snap": TimeWindowSpec("frame_start", "after"),
+    "before_pass": TimeWindowSpec("pass_forward", "before"),
+    "before_end": TimeWindowSpec("frame_end", "before"),
+    "entire_pocket": TimeWindowSpec("frame_start", end_anchor="frame_end"),
+}
+
+
+def get_window_size_list(
+    window_size_frames: Union[int, Sequence[int]]
+) -> List[int]:
+    if isinstance(window_size_frames, (int, np.integer)):
+        return [int(window_size_frames)]
+    return [int(size) for size in window_size_frames]
+
+
+def get_window_type_name(
+    name: str,
+    spec: TimeWindowSpec,
+    size_frames: Optional[int],
+    window_sizes: Sequence[int],
+) -> str:
+    """
+    Returns the window type for a window of the given size. The size is only
+    added to the name if the window uses the window sizes of the run and the
+    run has several window sizes.
+    """
+    if not spec.uses_window_sizes or len(window_sizes) <= 1:
+        return name
+    return f"{name}_{size_frames}"
+
+
+def get_run_window_type(
+    name: str,
+    window_size_frames: Union[int, Sequence[int]],
+    window_types: Optional[Dict[str, TimeWindowSpec]] = None,
+) -> str:
+    """
+    Returns the window type of a run with the given window sizes and window
+    types, given either a window type of the run or the name of a window
+    type, for the first window size if there are several. Raises an error if
+    the run has no such window type.
+    """
+    if window_types is None:
+        window_types = TIME_WINDOW_TYPES
+    window_sizes = get_window_size_list(window_size_frames)
+    run_window_types = [
+        get_window_type_name(window_name, spec, size_frames, window_sizes)
+        for window_name, spec in window_types.items()
+        for size_frames in spec.get_sizes(window_sizes)
+    ]
+    if name in run_window_types:
+        return name
+    if name in window_types:
+        return get_window_type_name(
+            name, window_types[name], window_sizes[0], window_sizes
+        )
+    message = f"Window type {name} is not one of the window types of the run: {run_window_types}."
+    raise ValueError(message)
+
+
+def get_interval_positions(
+    groups: np.ndarray,
+    values: np.ndarray,
+    interval_groups: np.ndarray,
+    lows: np.ndarray,
+    highs: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Given group codes and values sorted by group, then by value, returns the
+    first position and the position after the last of the values in each
+    group and closed interval, so that the values of interval i are at
+    positions starts[i]:stops[i].
+    """
+    if len(values) == 0:
+        empty = np.zeros(len(interval_groups), dtype=int)
+        return empty, empty
+    # Search one sorted key instead of each group, with room for the bounds
+    # of the intervals to fall outside of the values.
+    low_bound = values.min() - 1
+    high_bound = values.max() + 1
+    scale = high_bound - low_bound + 1
+    keys = groups * scale + (values - low_bound)
+    lows = np.clip(lows, low_bound, high_bound) - low_bound
+    highs = np.clip(highs, low_bound, high_bound) - low_bound
+    starts = np.searchsorted(keys, interval_groups * scale + lows, "left")
+    stops = np.searchsorted(keys, interval_groups * scale + highs, "right")
+    return starts, np.maximum(starts, stops)
+
+
+def get_play_time_windows(
+    df_events: pd.DataFrame,
+    window_size_frames: Union[int, Sequence[int]],
+    window_types: Optional[Dict[str, TimeWindowSpec]] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Finds the first and last frame of each time window of each play, as an
+    interval of frame IDs, instead of filtering the frames for each window.
+    The anchors of all windows are found in one pass over the event data.
+
+    Returns a tuple of:
+        - One row per frame of the event data, sorted by play and frame,
+          without the event column.
+        - One row per play and window type, for the windows that each play
+          has, sorted by window type in the order of window_types and window
+          sizes, then by play, with columns:
+            - play (position of the play in the order of the frames)
+            - window_type
+            - window_start (first frame ID)
+            - window_end (last frame ID)
+            - frame_position_start (position of the first frame in the
+              window in the frames)
+            - frame_position_stop (position after the last frame in the
+              window in the frames)
+    """
+    if window_types is None:
+        window_types = TIME_WINDOW_TYPES
+    window_sizes = get_window_size_list(window_size_frames)
+    frame_keys = ["gameId", "playId", "frameId"]
+    df_frames = (
+        df_events.drop_duplicates(frame_keys)
+        .sort_values(frame_keys, kind="stable")
+        .drop(columns=["event"])
+        .reset_index(drop=True)
+    )
+    df_play_keys = df_frames[["gameId", "playId"]]
+    play_codes = pd.factorize(pd.MultiIndex.from_frame(df_play_keys))[0]
+    is_first_frame = np.ones(len(df_frames), dtype=bool)
+    is_first_frame[1:] = play_codes[1:] != play_codes[:-1]
+    df_plays = df_frames[is_first_frame].reset_index(drop=True)
+
+    # Add the first frame of each event that is an anchor, if any.
+    anchors = {
+        anchor for spec in window_types.values() for anchor in spec.anchors
+    }
+    anchor_events = sorted(anchors - set(df_plays.columns))
+    df_anchor_frames = (
+        df_events.loc[df_events["event"].isin(anchor_events)]
+        .groupby(["gameId", "playId", "event"], observed=True)["frameId"]
+        .min()
+        .unstack("event")
+        .reindex(columns=anchor_events)
+    )
+    df_plays = df_plays.join(df_anchor_frames, on=["gameId", "playId"])
+
+    df_window_list = []
+    for name, spec in window_types.items():
+        for size_frames in spec.get_sizes(window_sizes):
+            window_start, window_end = spec.get_window(df_plays, size_frames)
+            df_window = pd.DataFrame(
+                {
+                    "play": np.arange(len(df_plays)),
+                    "window_type": get_window_type_name(
+                        name, spec, size_frames, window_sizes
+                    ),
+                    "window_start": np.asarray(window_start, dtype=float),
+                    "window_end": np.asarray(window_end, dtype=float),
+                }
+            )
+            has_window = df_window["window_start"].notna()
+            has_window &= df_window["window_end"].notna()
+            df_window_list.append(df_window[has_window])
+    df_windows = pd.concat(df_window_list, ignore_index=True)
+
+    starts, stops = get_interval_positions(
+        play_codes,
+        df_frames["frameId"].to_numpy(dtype=float),
+        df_windows["play"].to_numpy(),
+        df_windows["window_start"].to_numpy(),
+        df_windows["window_end"].to_numpy(),
+    )
+    df_windows["frame_position_start"] = starts
+    df_windows["frame_position_stop"] = stops
+    return df_frames, df_windows
+
+
+def get_ranges(starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """Returns the concatenated ranges from each start to each stop."""
+    lengths = stops - starts
+    offsets = np.repeat(stops - lengths.cumsum(), lengths)
+    return np.arange(lengths.sum()) + offsets
+
 
 def get_frames_for_time_windows(
-    df_events: pd.DataFrame, df_areas: pd.DataFrame, window_size_frames: int
+    df_events: pd.DataFrame,
+    df_areas: pd.DataFrame,
+    window_size_frames: Union[int, Sequence[int]],
+    window_types: Optional[Dict[str, TimeWindowSpec]] = None,
 ) -> pd.DataFrame:
-    # This method will apply all the area algorithms to the dataframe and filter out plays
     """
     Parameters:
     df_events:
@@ -27,11 +297,15 @@ def get_frames_for_time_windows(
         - pocket
         - area
 
-    second_factor:
-        -X seconds factor after snap/before snap
+    window_size_frames:
+        X frames for the windows after the snap or before the pass or end.
+        If several sizes are given, such as [10, 20, 30], each window type
+        is computed for each size, with the size added to the window type,
+        such as `after_snap_20`.
 
-    The input can contain as many types of time window as needed.
-    For example:
+    window_types:
+        Specification of each window, by window type. Defaults to
+        TIME_WINDOW_TYPES:
     - window_type = `after_snap`:
         - Already filtered out frames before the snap.
         - Already filtered out any plays that end less than X seconds after snap.
@@ -41,6 +315,8 @@ def get_frames_for_time_windows(
         - Already filtered out any plays where the pass is less than X seconds after the snap
     - window_type = `before_end`:
         - Frames between the end of the pocket and X seconds before that.
+    - window_type = `entire_pocket`:
+        - Frames between the snap and the end of the pocket.
 
     Returns:
     Contains columns:
@@ -51,85 +327,117 @@ def get_frames_for_time_windows(
         - window_type (PK)
         - pocket
         - area
+
+    To calculate the metrics of each window without copying the frames of
+    each window, use get_play_window_metrics() instead.
     """
-    df = pd.DataFrame(df_events)
-
-    # join to add frame where pass happened
-    df_pass = df.query("event == 'pass_forward'")[
-        ["gameId", "playId", "frameId"]
-    ].rename(columns={"frameId": "pass_frame"})
-    df = df.merge(df_pass, how="left", on=["gameId", "playId"])
-    df["pass_frame"] = df["pass_frame"].fillna(-1)
-    df["frame_start"] = df["frame_start"].fillna(-1)
-    df["frame_end"] = df["frame_end"].fillna(-1)
-
-    df["frames_elapsed"] = df["frameId"] - df["frame_start"]
-    df["window_size"] = window_size_frames
-    df["total_frames"] = df["frame_end"] - df["frame_start"]
-
-    # Find the frame that is X frames before the end of the pocket.
-    df["frame_x_before_end"] = df["frame_end"] - window_size_frames
-
-    # this is not the frame immediately before the pass, this is the frame factor before the pass frame
-    df["frame_before_pass"] = df["pass_frame"] - window_size_frames
-
-    # Bandit thinks that strings with "pass" are passwords, so we have to tell
-    # it that these queries are safe with `nosec`.
-    query_x_before_pass = (  # nosec
-        "frame_start > -1 "
-        "and pass_frame > -1 "
-        "and frame_before_pass > -1 "
-        "and frameId <= pass_frame "
-        "and frameId >= frame_before_pass "
-        "and frame_before_pass >= frame_start "
+    df_frames, df_windows = get_play_time_windows(
+        df_events, window_size_frames, window_types
+    )
+    # Take the frames of each window by position, then add the areas.
+    positions = get_ranges(
+        df_windows["frame_position_start"].to_numpy(),
+        df_windows["frame_position_stop"].to_numpy(),
     )
-    df_before_pass = pd.DataFrame(df.query(query_x_before_pass))
-    df_before_pass["window_type"] = "before_pass"  # nosec
-
-    query_x_after_snap = (
-        "frame_start > -1 "
-        "and frameId >= frame_start "
-        "and frames_elapsed <= window_size "
-        "and total_frames >= window_size "
+    window_lengths = (
+        df_windows["frame_position_stop"] - df_windows["frame_position_start"]
     )
-    df_after_snap = pd.DataFrame(df.query(query_x_after_snap))
-    df_after_snap["window_type"] = "after_snap"
+    df_windows_frames = df_frames.take(positions).reset_index(drop=True)
+    df_windows_frames["window_type"] = np.repeat(
+        df_windows["window_type"].to_numpy(), window_lengths.to_numpy()
+    )
+    return df_windows_frames.merge(
+        df_areas, on=["gameId", "playId", "frameId"], how="left"
+    )
+
+
+def get_play_window_metrics(
+    df_events: pd.DataFrame,
+    df_areas: pd.DataFrame,
+    window_size_frames: Union[int, Sequence[int]],
+    window_types: Optional[Dict[str, TimeWindowSpec]] = None,
+) -> pd.DataFrame:
+    """
+    Calculates the same play pocket metrics as get_play_pocket_metrics() on
+    the output of get_frames_for_time_windows(), without copying the frames
+    and areas of each window. Instead, the areas are sorted by method and
+    frame once, and each window of each method is a slice of the sorted
+    areas, found from the first and last frame of the window.
+
+    Parameters are the same as get_frames_for_time_windows().
 
-    query_entire_pocket = (
-        "frame_start > -1 "
-        "and frameId >= frame_start "
-        "and frameId <= frame_end "
+    Returns the same columns as get_play_pocket_metrics().
+    """
+    frame_keys = ["gameId", "playId", "frameId"]
+    df_frames, df_windows = get_play_time_windows(
+        df_events, window_size_frames, window_types
     )
-    df_entire_pocket = pd.DataFrame(df.query(query_entire_pocket))
-    df_entire_pocket["window_type"] = "entire_pocket"
-
-    query_x_before_end = (
-        "frame_start > -1 "
-        "and frame_end > -1 "
-        "and frame_x_before_end > -1 "
-        "and frameId <= frame_end "
-        "and frameId >= frame_x_before_end "
-        "and frame_x_before_end >= frame_start "
+
+    # Find the frame of each area and sort the areas by method, then frame.
+    # Areas for frames that are not in the event data are not in a window.
+    frame_index = pd.MultiIndex.from_frame(df_frames[frame_keys])
+    area_frames = frame_index.get_indexer(
+        pd.MultiIndex.from_frame(df_areas[frame_keys])
     )
-    df_before_end = pd.DataFrame(df.query(query_x_before_end))
-    df_before_end["window_type"] = "before_end"
+    method_codes, methods = pd.factorize(df_areas["method"], sort=True)
+    order = np.lexsort([area_frames, method_codes])
+    order = order[(area_frames[order] >= 0) & (method_codes[order] >= 0)]
 
-    df_windows = pd.concat(
-        [df_after_snap, df_before_pass, df_before_end, df_entire_pocket]
+    # Find the areas for each window and method.
+    n_windows = len(df_windows)
+    window_ids = np.repeat(np.arange(n_windows), len(methods))
+    window_methods = np.tile(np.arange(len(methods)), n_windows)
+    frame_starts = df_windows["frame_position_start"].to_numpy()[window_ids]
+    frame_stops = df_windows["frame_position_stop"].to_numpy()[window_ids]
+    starts, stops = get_interval_positions(
+        method_codes[order],
+        area_frames[order],
+        window_methods,
+        frame_starts,
+        frame_stops - 1,
     )
 
-    df_out = df_windows.merge(
-        df_areas, on=["gameId", "playId", "frameId"], how="left"
+    # Sort the windows by play, method, and window type, like the output of
+    # get_play_pocket_metrics(), and skip windows without areas.
+    window_types = df_windows["window_type"].to_numpy()[window_ids]
+    window_type_codes = pd.factorize(window_types, sort=True)[0]
+    plays = df_windows["play"].to_numpy()[window_ids]
+    window_order = np.lexsort([window_type_codes, window_methods, plays])
+    window_order = window_order[stops[window_order] > starts[window_order]]
+    starts = starts[window_order]
+    stops = stops[window_order]
+
+    area_rows = order[get_ranges(starts, stops)]
+    lengths = stops - starts
+    window_starts = np.cumsum(lengths) - lengths
+    window_ends = window_starts + lengths - 1
+    df_metrics = get_window_metrics(
+        df_frames["frameId"].to_numpy()[area_frames[area_rows]],
+        df_areas["area"].to_numpy(dtype=float)[area_rows],
+        window_starts,
     )
-    drop_cols = [
-        "frames_elapsed",
-        "window_size",
-        "total_frames",
-        "frame_x_before_end",
-        "frame_before_pass",
-        "pass_frame",
-        "event",
-    ]
-    df_out.drop(columns=drop_cols, inplace=True)
 
-    return df_out
+    # Take the keys and the other columns from the last frame of each window.
+    end_area_rows = area_rows[window_ends]
+    end_frames = area_frames[end_area_rows]
+    df_keys = df_frames[["gameId", "playId"]].take(end_frames)
+    df_keys = df_keys.reset_index(drop=True)
+    df_keys["method"] = df_areas["method"].to_numpy()[end_area_rows]
+    df_keys["window_type"] = window_types[window_order]
+    frame_columns = [
+        column for column in df_frames.columns if column not in frame_keys
+    ]
+    area_columns = [
+        column
+        for column in df_areas.columns
+        if column not in frame_keys + ["method"]
+    ]
+    df_end = pd.concat(
+        [
+            df_frames[frame_columns].take(end_frames).reset_index(drop=True),
+            df_areas[area_columns].take(end_area_rows).reset_index(drop=True),
+        ],
+        axis=1,
+    )
+    df_end = df_end.rename(columns={"area": "area_end"})
+    return combine_window_metrics(df_keys, df_metrics, df_end)
@@ -1,6 +1,16 @@
+import numpy as np
 import pandas as pd
+import pytest
 
-from src.pipeline.tasks.play_windows import get_frames_for_time_windows
+from src.pipeline.tasks.play_metrics import get_play_pocket_metrics
+from src.pipeline.tasks.play_windows import (
+    TIME_WINDOW_TYPES,
+    TimeWindowSpec,
+    get_frames_for_time_windows,
+    get_interval_positions,
+    get_play_window_metrics,
+    get_run_window_type,
+)
 from src.pipeline.tasks.test_helpers import row_creator
 
 
@@ -132,3 +142,186 @@ def test_get_frames_for_time_windows():
         output_row(2, 2, 4, "entire_pocket", "B", "(pocket b)", 77, 1, 4),
     ]
     assert actual_rows == expected
+
+
+def test_get_interval_positions():
+    groups = np.array([0, 0, 0, 1, 1, 2])
+    values = np.array([1, 3, 5, 2, 4, 9])
+    starts, stops = get_interval_positions(
+        groups,
+        values,
+        interval_groups=np.array([0, 0, 1, 1, 2, 2]),
+        lows=np.array([2, -10, 2, 5, 9, 20]),
+        highs=np.array([5, 0, 2, 3, 100, 30]),
+    )
+    assert starts.tolist() == [1, 0, 3, 5, 5, 6]
+    assert stops.tolist() == [3, 0, 4, 5, 6, 6]
+
+
+def test_get_play_window_metrics():
+    event_columns = [
+        "gameId",
+        "playId",
+        "frameId",
+        "event",
+        "frame_start",
+        "frame_end",
+    ]
+    event_row = row_creator(event_columns)
+    events = [event_row(1, 1, f, None, 2, 12) for f in range(1, 14)]
+    events[4] = event_row(1, 1, 5, "pass_forward", 2, 12)
+    # No pass, and a frame without areas.
+    events += [event_row(1, 2, f, None, 1, 6) for f in range(1, 8)]
+    # No snap.
+    events += [event_row(2, 1, f, None, None, None) for f in range(1, 4)]
+    df_events = pd.DataFrame(events).sample(frac=1, random_state=0)
+
+    area_columns = ["gameId", "playId", "frameId", "method", "pocket", "area"]
+    area_row = row_creator(area_columns)
+    areas = []
+    for _, event in df_events.iterrows():
+        if (event["playId"], event["frameId"]) == (2, 4):
+            continue
+        for method, factor in [("A", 1), ("B", 2)]:
+            area = factor * (100.0 - event["frameId"])
+            pocket = f"({method} {event['frameId']})"
+            keys = [event["gameId"], event["playId"], event["frameId"]]
+            areas.append(area_row(*keys, method, pocket, area))
+    df_areas = pd.DataFrame(areas)
+
+    for window_size_frames in [1, 3, 5, 20]:
+        df_windows = get_frames_for_time_windows(
+            df_events, df_areas, window_size_frames
+        )
+        expected = get_play_pocket_metrics(df_windows)
+        actual = get_play_window_metrics(
+            df_events, df_areas, window_size_frames
+        )
+        pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_get_play_window_metrics_custom_window():
+    event_row = row_creator(
+        ["gameId", "playId", "frameId", "event", "frame_start", "frame_end"]
+    )
+    df_events = pd.DataFrame(
+        [event_row(1, 1, f, None, 2, 8) for f in range(1, 10)]
+    )
+    area_row = row_creator(
+        ["gameId", "playId", "frameId", "method", "pocket", "area"]
+    )
+    df_areas = pd.DataFrame(
+        [area_row(1, 1, f, "A", "(pocket)", 10 * f) for f in range(1, 10)]
+    )
+
+    window_types = {
+        **TIME_WINDOW_TYPES,
+        "before_snap": TimeWindowSpec(
+            "frame_start", "before", offset_frames=-1, within_pocket=False
+        ),
+    }
+    actual = get_play_window_metrics(
+        df_events, df_areas, 5, window_types=window_types
+    )
+    actual_rows = actual[
+        ["window_type", "area_start", "area_end", "time_start", "time_end"]
+    ].to_dict(orient="records")
+    expected = [
+        {
+            "window_type": "after_snap",
+            "area_start": 20,
+            "area_end": 70,
+            "time_start": 0.2,
+            "time_end": 0.7,
+        },
+        {
+            "window_type": "before_end",
+            "area_start": 30,
+            "area_end": 80,
+            "time_start": 0.3,
+            "time_end": 0.8,
+        },
+        # Window before the snap, which only has the first frame.
+        {
+            "window_type": "before_snap",
+            "area_start": 10,
+            "area_end": 10,
+            "time_start": 0.1,
+            "time_end": 0.1,
+        },
+        {
+            "window_type": "entire_pocket",
+            "area_start": 20,
+            "area_end": 80,
+            "time_start": 0.2,
+            "time_end": 0.8,
+        },
+    ]
+    assert actual_rows == expected
+
+
+def test_get_play_window_metrics_multiple_sizes():
+    event_row = row_creator(
+        ["gameId", "playId", "frameId", "event", "frame_start", "frame_end"]
+    )
+    df_events = pd.DataFrame(
+        [event_row(1, 1, f, None, 2, 8) for f in range(1, 10)]
+    )
+    area_row = row_creator(
+        ["gameId", "playId", "frameId", "method", "pocket", "area"]
+    )
+    df_areas = pd.DataFrame(
+        [area_row(1, 1, f, "A", "(pocket)", 10.0 * f) for f in range(1, 10)]
+    )
+    window_types = {
+        "after_snap": TimeWindowSpec("frame_start", "after"),
+        "entire_pocket": TimeWindowSpec("frame_start", end_anchor="frame_end"),
+        # Fixed size, from one frame after the snap.
+        "after_first_frame": TimeWindowSpec(
+            "frame_start", "after", offset_frames=1, size_frames=2
+        ),
+    }
+    actual = get_play_window_metrics(
+        df_events, df_areas, [2, 4, 8], window_types=window_types
+    )
+    actual_rows = actual[["window_type", "area_start", "area_end"]].to_dict(
+        orient="records"
+    )
+    expected = [
+        {"window_type": "after_first_frame", "area_start": 30, "area_end": 50},
+        {"window_type": "after_snap_2", "area_start": 20, "area_end": 40},
+        {"window_type": "after_snap_4", "area_start": 20, "area_end": 60},
+        # No window for 8 frames, since the pocket is only 6 frames long.
+        {"window_type": "entire_pocket", "area_start": 20, "area_end": 80},
+    ]
+    assert actual_rows == expected
+
+    # Each window of each size is the same as running with that size.
+    for size in [2, 4]:
+        df_size = get_play_window_metrics(
+            df_events, df_areas, size, window_types=window_types
+        )
+        df_size = df_size.query("window_type == 'after_snap'")
+        df_sizes = actual.query(f"window_type == 'after_snap_{size}'")
+        df_sizes = df_sizes.assign(window_type="after_snap")
+        pd.testing.assert_frame_equal(
+            df_size.reset_index(drop=True), df_sizes.reset_index(drop=True)
+        )
+
+
+def test_time_window_spec_direction():
+    with pytest.raises(ValueError):
+        TimeWindowSpec("frame_start", "during")
+
+
+def test_get_run_window_type():
+    assert get_run_window_type("before_end", 20) == "before_end"
+    # The first window size is used if there are several.
+    assert get_run_window_type("before_end", [10, 20]) == "before_end_10"
+    assert get_run_window_type("before_end_20", [10, 20]) == "before_end_20"
+    # Windows without a size of the run keep their name.
+    assert get_run_window_type("entire_pocket", [10, 20]) == "entire_pocket"
+    with pytest.raises(ValueError):
+        get_run_window_type("before_end_30", [10, 20])
+    with pytest.raises(ValueError):
+        get_run_window_type("before_end", 20, {"a": TimeWindowSpec("b")})
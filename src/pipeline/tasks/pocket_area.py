@@ -1,10 +1,18 @@
-from typing import Callable, Dict, List, Tuple
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
-from src.metrics.pocket_area.base import PocketArea, PocketAreaFunction
+from src.metrics.pocket_area.base import (
+    PocketArea,
+    PocketAreaFunction,
+    get_failed_pocket_area,
+)
+from src.metrics.pocket_area.batch import FrameBatch, PocketAreaBatchFunction
 from src.metrics.pocket_area.helpers import pocket_to_json
+from src.pipeline.tasks.cache import InputKey, StageCache
 from src.pipeline.tasks.frames import FRAME_PRIMARY_KEY
 
 
@@ -12,9 +20,9 @@ def calculate_pocket_safely(
     calculate_fn: PocketAreaFunction,
 ) -> Callable[[List[Dict]], Dict]:
     """
-    Wraps a pocket area calculation function to return a null value if the
-    calculation function raises an exception. Returns the pocket area and any
-    metadata as a dictionary.
+    Wraps a pocket area calculation function to return a failed pocket with a
+    null area if the calculation function raises an exception. Returns the
+    pocket area and any metadata as a dictionary.
     """
     function_name = f"{calculate_fn.__name__}()"
 
@@ -24,7 +32,7 @@ def calculate_pocket_safely(
             pocket_area = calculate_fn(records)
         except Exception as ex:
             # print(f"Exception in {function_name}: {ex}")
-            pocket_area = PocketArea(area=np.nan)
+            pocket_area = get_failed_pocket_area(ex)
 
         if not isinstance(pocket_area, PocketArea):
             actual_type = type(pocket_area).__name__
@@ -46,6 +54,14 @@ def get_area_from_dict(pocket: Dict) -> float:
     return pocket.get("area", np.nan)
 
 
+def is_failed_pocket(pocket: Dict) -> bool:
+    """
+    Returns whether the pocket dictionary is for a frame where the pocket area
+    calculation raised an error, as opposed to a frame without an area.
+    """
+    return pocket.get("metadata", {}).get("error") is not None
+
+
 def calculate_pocket_area(
     df_frame_records: pd.DataFrame, method: Tuple[str, PocketAreaFunction]
 ) -> pd.DataFrame:
@@ -59,3 +75,152 @@ def calculate_pocket_area(
     df_keys = df_frame_records[FRAME_PRIMARY_KEY]
     df_output = pd.concat([df_keys, df_area], axis=1)
     return df_output
+
+
+def calculate_pocket_area_batch(
+    df_frame_keys: pd.DataFrame,
+    frame_batch: FrameBatch,
+    method: Tuple[str, PocketAreaBatchFunction],
+) -> pd.DataFrame:
+    """
+    Applies a batch pocket area calculation method to all the frames in the
+    batch, with the same output as calculate_pocket_area().
+    """
+    method_name, _ = method
+    [pockets] = calculate_pocket_area_shard(frame_batch, [method])
+    return get_pocket_area_dataframe(df_frame_keys, method_name, pockets)
+
+
+def calculate_pocket_area_shard(
+    frame_batch: FrameBatch, methods: List[Tuple[str, PocketAreaBatchFunction]]
+) -> List[List[Dict]]:
+    """
+    Applies each batch pocket area calculation method to all the frames in the
+    batch and returns the pocket dictionaries for each method. Defined at the
+    top level so that it can run in a worker process.
+    """
+    pockets_per_method = []
+    for method_name, calculate_fn in methods:
+        pockets = calculate_fn(frame_batch)
+        if len(pockets) != len(frame_batch):
+            message = f"Method {method_name} returned {len(pockets)} pockets for {len(frame_batch)} frames."
+            raise ValueError(message)
+        pockets_per_method.append([pocket_to_json(p) for p in pockets])
+    return pockets_per_method
+
+
+def get_pocket_area_dataframe(
+    df_frame_keys: pd.DataFrame, method_name: str, pockets: List[Dict]
+) -> pd.DataFrame:
+    """Combines the frame keys with the pocket dictionaries for a method."""
+    ser_method = [method_name] * len(pockets)
+    df_area = pd.DataFrame({"method": ser_method, "pocket": pockets})
+    df_area["area"] = df_area["pocket"].apply(get_area_from_dict)
+    df_keys = df_frame_keys[FRAME_PRIMARY_KEY].reset_index(drop=True)
+    df_output = pd.concat([df_keys, df_area], axis=1)
+    return df_output
+
+
+def shard_frame_batch_by_game(
+    df_frame_keys: pd.DataFrame, frame_batch: FrameBatch
+) -> List[Tuple[int, int]]:
+    """
+    Splits the frames into one shard per game and returns the (start, end)
+    frame positions of each shard, in order. Assumes the frames are sorted by
+    game, as returned by transform_to_frame_batch().
+    """
+    game_ids = df_frame_keys["gameId"].to_numpy()
+    if len(game_ids) == 0:
+        return []
+    starts = np.flatnonzero(np.diff(game_ids)) + 1
+    bounds = np.concatenate([[0], starts, [len(game_ids)]])
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+def calculate_pocket_area_parallel(
+    df_frame_keys: pd.DataFrame,
+    frame_batch: FrameBatch,
+    methods: List[Tuple[str, PocketAreaBatchFunction]],
+    max_workers: Optional[int] = 1,
+    cache: Optional[StageCache] = None,
+) -> pd.DataFrame:
+    """
+    Applies each batch pocket area calculation method to all the frames, with
+    the frames for each game sent to a pool of worker processes. Results are
+    combined in method order, then frame order, the same as a union of
+    calculate_pocket_area_batch() for each method. If max_workers is None,
+    uses one worker per CPU. If there is only one worker or one game, runs in
+    the current process. If a cache is given, the pockets for each game and
+    method are cached, and only the games and methods that miss the cache are
+    calculated.
+    """
+    shards = shard_frame_batch_by_game(df_frame_keys, frame_batch)
+    shard_batches = [
+        frame_batch.get_frames(start, end) for start, end in shards
+    ]
+
+    # Look up the pockets for each game and method in the cache, and collect
+    # the methods to calculate for each game.
+    shard_results: List[List[Optional[List[Dict]]]] = [
+        [None] * len(methods) for _ in shard_batches
+    ]
+    cache_keys: Dict[Tuple[int, int], str] = {}
+    shard_tasks: List[Tuple[int, List[int]]] = []
+    # If the frame batch is the output of a cached stage, key each shard by
+    # the key of its game in the batch instead of hashing its arrays.
+    shard_inputs: List[Any] = list(shard_batches)
+    batch_key = None if cache is None else cache.get_output_key(frame_batch)
+    if batch_key is not None and batch_key.game_keys is not None:
+        game_ids = df_frame_keys["gameId"].to_numpy()
+        for i, (start, _) in enumerate(shards):
+            game_key = batch_key.game_keys.get(int(game_ids[start]))
+            if game_key is not None:
+                shard_inputs[i] = InputKey(game_key)
+    for i, shard_input in enumerate(shard_inputs):
+        missing_methods = []
+        for j, method in enumerate(methods):
+            if cache is not None:
+                key = cache.get_key(
+                    calculate_pocket_area_shard, shard_input, [method]
+                )
+                hit, pockets = cache.get(key)
+                if hit:
+                    shard_results[i][j] = pockets
+                    continue
+                cache_keys[(i, j)] = key
+            missing_methods.append(j)
+        if missing_methods:
+            shard_tasks.append((i, missing_methods))
+
+    task_batches = [shard_batches[i] for i, _ in shard_tasks]
+    task_methods = [[methods[j] for j in js] for _, js in shard_tasks]
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(shard_tasks))
+
+    if max_workers <= 1:
+        task_results = [
+            calculate_pocket_area_shard(shard_batch, shard_methods)
+            for shard_batch, shard_methods in zip(task_batches, task_methods)
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            task_results = list(
+                executor.map(
+                    calculate_pocket_area_shard, task_batches, task_methods
+                )
+            )
+
+    for (i, method_indices), result in zip(shard_tasks, task_results):
+        for j, pockets in zip(method_indices, result):
+            shard_results[i][j] = pockets
+            if cache is not None:
+                cache.put(cache_keys[(i, j)], pockets)
+
+    df_area_list = []
+    for j, (method_name, _) in enumerate(methods):
+        pockets = [p for result in shard_results for p in result[j]]
+        df_area = get_pocket_area_dataframe(df_frame_keys, method_name, pockets)
+        df_area_list.append(df_area)
+
+    return pd.concat(df_area_list, ignore_index=True, copy=False)
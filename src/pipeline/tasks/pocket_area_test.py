@@ -6,9 +6,17 @@ import pandas as pd
 import pytest
 
 from src.metrics.pocket_area.base import PocketArea, PocketAreaMetadata
+from src.metrics.pocket_area.batch import frame_batch_from_records
+from src.metrics.pocket_area.passer_radius_area import (
+    get_passer_radius_area_batch,
+)
 from src.pipeline.tasks.pocket_area import (
     calculate_pocket_area,
+    calculate_pocket_area_batch,
+    calculate_pocket_area_parallel,
     calculate_pocket_safely,
+    is_failed_pocket,
+    shard_frame_batch_by_game,
 )
 
 
@@ -66,8 +74,9 @@ def test_calculate_pocket_safely_with_exception():
 
     df = pd.DataFrame()
     actual = actual_fn(df)
-    expected = {"area": None}
+    expected = {"area": None, "metadata": {"error": "Exception"}}
     assert actual == expected
+    assert is_failed_pocket(actual)
 
 
 def test_calculate_pocket_safely_with_invalid_function():
@@ -82,3 +91,76 @@ def test_calculate_pocket_safely_with_invalid_function():
     with pytest.raises(TypeError, match=expected):
         df = pd.DataFrame()
         actual_fn(df)
+
+
+def test_calculate_pocket_area_batch():
+    df_keys = pd.DataFrame(
+        [
+            {"gameId": 1, "playId": 1, "frameId": 1},
+            {"gameId": 1, "playId": 1, "frameId": 2},
+        ]
+    )
+    frames = [
+        [
+            {"x": 0, "y": 0, "role": "passer"},
+            {"x": 3, "y": 4, "role": "rusher"},
+        ],
+        [{"x": 1, "y": 1, "role": "rusher"}],
+    ]
+    batch = frame_batch_from_records(frames)
+    method = ("passer_radius", get_passer_radius_area_batch)
+    actual = calculate_pocket_area_batch(df_keys, batch, method)
+    assert actual["method"].tolist() == ["passer_radius", "passer_radius"]
+    assert actual["frameId"].tolist() == [1, 2]
+    assert actual["area"].iloc[0] == pytest.approx(np.pi * 25)
+    assert actual["pocket"].iloc[0]["metadata"]["radius"] == pytest.approx(5)
+    assert np.isnan(actual["area"].iloc[1])
+    assert actual["pocket"].iloc[1] == {
+        "area": None,
+        "metadata": {"error": "InvalidPocketError"},
+    }
+    assert actual["pocket"].apply(is_failed_pocket).tolist() == [False, True]
+
+
+def test_shard_frame_batch_by_game():
+    df_keys = pd.DataFrame(
+        {"gameId": [1, 1, 2, 3, 3], "playId": 1, "frameId": [1, 2, 1, 1, 2]}
+    )
+    batch = frame_batch_from_records([[]] * 5)
+    actual = shard_frame_batch_by_game(df_keys, batch)
+    assert actual == [(0, 2), (2, 3), (3, 5)]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_calculate_pocket_area_parallel(max_workers):
+    df_keys = pd.DataFrame(
+        {"gameId": [1, 1, 2], "playId": 1, "frameId": [1, 2, 1]}
+    )
+    frames = [
+        [
+            {"x": 0, "y": 0, "role": "passer"},
+            {"x": 3, "y": 4, "role": "rusher"},
+        ],
+        [{"x": 1, "y": 1, "role": "rusher"}],
+        [
+            {"x": 0, "y": 0, "role": "passer"},
+            {"x": 0, "y": 2, "role": "rusher"},
+        ],
+    ]
+    batch = frame_batch_from_records(frames)
+    methods = [
+        ("passer_radius", get_passer_radius_area_batch),
+        ("passer_radius_copy", get_passer_radius_area_batch),
+    ]
+    actual = calculate_pocket_area_parallel(
+        df_keys, batch, methods, max_workers=max_workers
+    )
+    expected = pd.concat(
+        [calculate_pocket_area_batch(df_keys, batch, m) for m in methods],
+        ignore_index=True,
+    )
+    pd.testing.assert_frame_equal(actual, expected)
+    assert (
+        actual["method"].tolist()
+        == ["passer_radius"] * 3 + ["passer_radius_copy"] * 3
+    )
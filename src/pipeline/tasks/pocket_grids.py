@@ -0,0 +1,160 @@
+from typing import Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from src.pipeline.tasks.spotlight import get_pocket_vertices, get_polygons
+from src.visualization.rasterize import get_covered_cells, get_sample_centers
+
+# Grid of the pocket heatmaps, in yards from the ball snap.
+POCKET_GRID_BIN_START = -10
+POCKET_GRID_BIN_END = 10
+POCKET_GRID_BIN_SIZE = 0.5
+
+
+def get_play_pockets(
+    df_play_metrics: pd.DataFrame,
+    df_areas: pd.DataFrame,
+    window_size_frames: int,
+) -> pd.DataFrame:
+    """
+    Chooses one frame per play, half of a time window before the pocket ends,
+    and returns the vertices of the pocket of each area method in that frame,
+    for the methods with polygon-shaped pockets.
+
+    Returns:
+      Contains columns:
+        - gameId (PK)
+        - playId (PK)
+        - method (PK)
+        - frame_start
+        - frame_end
+        - frameId
+        - vertices
+    """
+    # Find the frame X seconds before the pocket ends.
+    half_window = window_size_frames // 2.0
+    df = pd.DataFrame(df_play_metrics)
+    df = df[df["window_type"] == "entire_pocket"]
+    df["pocket_frame"] = (df["frame_end"] - half_window).astype(int)
+
+    # Restrict the left side to one row per play, then
+    # explode it with the right to get one row per play
+    # and area type.
+    left_cols = [
+        "gameId",
+        "playId",
+        "pocket_frame",
+        "frame_start",
+        "frame_end",
+    ]
+    df = df[left_cols].drop_duplicates()
+
+    # Extract vertices from pocket object, if any.
+    pocket_cols = [
+        "gameId",
+        "playId",
+        "frameId",
+        "method",
+    ]
+    df_vertices = pd.DataFrame(df_areas[pocket_cols])
+    df_vertices["vertices"] = get_pocket_vertices(df_areas)
+
+    # Drop plays without a polygon-shaped pocket.
+    df_vertices = df_vertices[df_vertices["vertices"].notna()]
+
+    # Inner join to keep only plays that have a window before
+    # the pocket ends (left side) AND have a polygon-shaped
+    # pocket (right side).
+    df_pocket = df.merge(
+        df_vertices,
+        left_on=["gameId", "playId", "pocket_frame"],
+        right_on=["gameId", "playId", "frameId"],
+        how="inner",
+    )
+    df_pocket.drop(columns=["pocket_frame"], inplace=True)
+    return df_pocket
+
+
+def get_pocket_grids(
+    df_play_pockets: pd.DataFrame,
+    bin_start: float = POCKET_GRID_BIN_START,
+    bin_end: float = POCKET_GRID_BIN_END,
+    bin_size: float = POCKET_GRID_BIN_SIZE,
+) -> pd.DataFrame:
+    """
+    Rasterizes the pocket of each play and method once, as the cells of the
+    heatmap grid whose midpoint is in the pocket, so that the heatmap of any
+    set of plays is the sum of their grids.
+
+    Parameters:
+    df_play_pockets: DataFrame returned by get_play_pockets().
+
+    Returns:
+    Sparse grid of each pocket, with one row per cell in the pocket. Pockets
+    that do not cover any cell have one row with null coordinates, so that
+    they still count towards the total number of pockets.
+      Contains columns:
+        - gameId
+        - playId
+        - method
+        - x: Left edge of the cell, where it is displayed in the heatmap.
+        - y: Bottom edge of the cell.
+    """
+    pocket_keys = ["gameId", "playId", "method"]
+    df_pockets = df_play_pockets[pocket_keys].reset_index(drop=True)
+    shapes = get_polygons(df_play_pockets["vertices"])
+    sample_range = np.arange(bin_start, bin_end + bin_size, bin_size)
+    sample_centers = get_sample_centers(bin_start, bin_end, bin_size)
+    pocket_indices, rows, cols = get_covered_cells(
+        shapes, sample_centers, sample_centers
+    )
+
+    # Add one row without a cell for each pocket that does not cover any.
+    is_empty = np.bincount(pocket_indices, minlength=len(df_pockets)) == 0
+    empty_indices = np.flatnonzero(is_empty)
+    nulls = np.full(len(empty_indices), np.nan)
+    pocket_indices = np.concatenate([pocket_indices, empty_indices])
+    x = np.concatenate([sample_range[cols], nulls])
+    y = np.concatenate([sample_range[rows], nulls])
+
+    # Keep the cells of each pocket together, in the order of the pockets.
+    order = np.argsort(pocket_indices, kind="stable")
+    df_grids = df_pockets.take(pocket_indices[order]).reset_index(drop=True)
+    df_grids["x"] = x[order]
+    df_grids["y"] = y[order]
+    return df_grids
+
+
+def filter_pocket_grids(
+    df_pocket_grids: pd.DataFrame,
+    df_play_keys: pd.DataFrame,
+    method: str,
+) -> pd.DataFrame:
+    """
+    Filters the pocket grids to one area method and to the plays with the
+    given gameId and playId, such as the plays from a query on plays.csv.
+    """
+    play_keys = ["gameId", "playId"]
+    df = df_pocket_grids[df_pocket_grids["method"] == method]
+    # Semi-join on the distinct play keys, which is faster than isin() on a
+    # MultiIndex for millions of cells.
+    df_keys = df_play_keys[play_keys].drop_duplicates()
+    return df.merge(df_keys, on=play_keys, how="inner")
+
+
+def get_pocket_grid_data(
+    df_play_metrics: pd.DataFrame,
+    df_areas: pd.DataFrame,
+    window_size_frames: Union[int, Sequence[int]],
+) -> pd.DataFrame:
+    """
+    Rasterizes the pocket of each play and method that the heatmaps show, for
+    the first window size if there are several, into the pocket grids.
+    """
+    if not isinstance(window_size_frames, int):
+        window_size_frames = window_size_frames[0]
+    df_play_pockets = get_play_pockets(
+        df_play_metrics, df_areas, window_size_frames
+    )
+    return get_pocket_grids(df_play_pockets)
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+from src.pipeline.tasks.pocket_grids import (
+    filter_pocket_grids,
+    get_play_pockets,
+    get_pocket_grids,
+)
+from src.pipeline.tasks.spotlight import get_polygons
+from src.pipeline.tasks.test_helpers import row_creator
+from src.visualization.rasterize import get_sample_centers, rasterize_shapes
+
+
+def test_get_play_pockets():
+    metrics_row = row_creator(
+        ["gameId", "playId", "window_type", "frame_start", "frame_end"]
+    )
+    df_play_metrics = pd.DataFrame(
+        [
+            metrics_row(1, 1, "entire_pocket", 5, 30),
+            metrics_row(1, 1, "before_end", 10, 30),
+            metrics_row(1, 2, "entire_pocket", 5, 25),
+        ]
+    )
+    area_row = row_creator(["gameId", "playId", "frameId", "method", "pocket"])
+    square = [(0, -2), (2, -2), (2, 0), (0, 0)]
+    df_areas = pd.DataFrame(
+        [
+            area_row(1, 1, 20, "a", {"metadata": {"vertices": square}}),
+            # Pocket without vertices.
+            area_row(1, 1, 20, "b", {"metadata": {}}),
+            # Not half of the window before the pocket ends.
+            area_row(1, 1, 21, "a", {"metadata": {"vertices": square}}),
+            area_row(1, 2, 15, "a", {"metadata": {"vertices": square}}),
+        ]
+    )
+
+    actual = get_play_pockets(df_play_metrics, df_areas, 20)
+
+    assert actual["playId"].tolist() == [1, 2]
+    assert actual["frameId"].tolist() == [20, 15]
+    assert actual["method"].tolist() == ["a", "a"]
+    assert actual["vertices"].tolist() == [square, square]
+
+
+def test_get_pocket_grids():
+    pocket_row = row_creator(["gameId", "playId", "method", "vertices"])
+    df_play_pockets = pd.DataFrame(
+        [
+            pocket_row(1, 1, "a", [(0, -1), (1, -1), (1, 0), (0, 0)]),
+            # Pocket between the midpoints of the cells.
+            pocket_row(1, 2, "a", [(0, 0), (0.2, 0), (0.2, 0.2)]),
+            pocket_row(1, 3, "a", [(-1, 0), (0, 0), (0, 1)]),
+        ]
+    )
+
+    actual = get_pocket_grids(df_play_pockets, -2, 2, 0.5)
+
+    assert actual["playId"].tolist() == [1, 1, 1, 1, 2, 3, 3, 3]
+    assert actual["x"].tolist()[:4] == [0, 0.5, 0, 0.5]
+    assert actual["y"].tolist()[:4] == [-1, -1, -0.5, -0.5]
+    assert actual[["x", "y"]].iloc[4].isna().all()
+    # Midpoints on the border are covered.
+    assert actual["x"].tolist()[5:] == [-1, -0.5, -0.5]
+    assert actual["y"].tolist()[5:] == [0, 0, 0.5]
+
+
+def test_get_pocket_grids_matches_rasterized_pockets():
+    rng = np.random.default_rng(0)
+    pocket_row = row_creator(["gameId", "playId", "method", "vertices"])
+    df_play_pockets = pd.DataFrame(
+        [
+            pocket_row(1, i, "a", rng.uniform(-12, 4, (4, 2)).tolist())
+            for i in range(20)
+        ]
+    )
+    centers = get_sample_centers(-10, 10, 0.5)
+
+    actual = get_pocket_grids(df_play_pockets, -10, 10, 0.5)
+
+    # Summing the grids gives the same counts as rasterizing the pockets.
+    sample_range = np.arange(-10, 10.5, 0.5)
+    df_cells = actual.dropna(subset=["x", "y"])
+    cols = np.searchsorted(sample_range, df_cells["x"])
+    rows = np.searchsorted(sample_range, df_cells["y"])
+    counts = np.zeros((len(centers), len(centers)), dtype=int)
+    np.add.at(counts, (rows, cols), 1)
+    expected = rasterize_shapes(
+        get_polygons(df_play_pockets["vertices"]), centers, centers
+    )
+    assert counts.tolist() == expected.tolist()
+    assert actual["playId"].nunique() == 20
+
+
+def test_filter_pocket_grids():
+    grid_row = row_creator(["gameId", "playId", "method", "x", "y"])
+    df_pocket_grids = pd.DataFrame(
+        [
+            grid_row(1, 1, "a", 0, 0),
+            grid_row(1, 1, "b", 0, 0),
+            grid_row(1, 2, "a", 0, 0),
+            grid_row(2, 1, "a", 0, 0),
+        ]
+    )
+    df_plays = pd.DataFrame({"gameId": [1, 2], "playId": [1, 1]})
+
+    actual = filter_pocket_grids(df_pocket_grids, df_plays, "a")
+
+    assert actual[["gameId", "playId", "method"]].values.tolist() == [
+        [1, 1, "a"],
+        [2, 1, "a"],
+    ]
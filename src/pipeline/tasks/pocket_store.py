@@ -0,0 +1,241 @@
+import glob
+import json
+import os
+import shutil
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.metrics.pocket_area.base import PocketArea, PocketAreaMetadata, Point
+from src.metrics.pocket_area.helpers import pocket_to_json
+from src.pipeline.tasks.constants import FRAME_PRIMARY_KEY
+from src.pipeline.tasks.dataframes import write_csv
+
+# Names of the array files in a pocket store directory.
+POCKET_STORE_ARRAYS = [
+    "keys",
+    "method_codes",
+    "area",
+    "radius",
+    "center",
+    "vertex_offsets",
+    "vertices",
+]
+POCKET_STORE_METHODS_FILE = "methods.json"
+POCKET_STORE_PART_PREFIX = "part-"
+
+
+@dataclass
+class PocketStore:
+    """
+    Pocket geometry for many frames and methods, stored as flat typed arrays
+    instead of one dictionary per pocket. Row i of the store has:
+
+    - keys[i]: the gameId, playId, and frameId of the frame.
+    - methods[method_codes[i]]: the name of the pocket area method.
+    - area[i], radius[i], center[i]: the area, radius, and (x, y) center of the
+      pocket, with np.nan where the pocket does not have that value.
+    - vertices[vertex_offsets[i]:vertex_offsets[i + 1]]: the (x, y) vertices of
+      the pocket, which is empty if the pocket does not have vertices.
+    """
+
+    keys: np.ndarray
+    methods: List[str]
+    method_codes: np.ndarray
+    area: np.ndarray
+    radius: np.ndarray
+    center: np.ndarray
+    vertex_offsets: np.ndarray
+    vertices: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def get_vertices(self, i: int) -> Optional[List[Point]]:
+        start, end = self.vertex_offsets[i], self.vertex_offsets[i + 1]
+        if start == end:
+            return None
+        return [(x, y) for x, y in self.vertices[start:end].tolist()]
+
+    def get_pocket(self, i: int) -> PocketArea:
+        radius = self.radius[i]
+        cx, cy = self.center[i]
+        metadata = PocketAreaMetadata(
+            vertices=self.get_vertices(i),
+            radius=None if np.isnan(radius) else float(radius),
+            center=None if np.isnan(cx) else (float(cx), float(cy)),
+        )
+        return PocketArea(float(self.area[i]), metadata)
+
+    def get_all_vertices(self) -> List[Optional[List[Point]]]:
+        """Returns the vertices of every pocket, splitting the array once."""
+        vertex_lists = np.split(
+            np.asarray(self.vertices), np.asarray(self.vertex_offsets)[1:-1]
+        )
+        return [
+            [(x, y) for x, y in vertices.tolist()] if len(vertices) else None
+            for vertices in vertex_lists
+        ]
+
+    def to_dataframe(
+        self, with_pockets: bool = False, with_vertices: bool = False
+    ) -> pd.DataFrame:
+        """
+        Returns one row per pocket with the key columns, method, and area. If
+        requested, adds the pocket column of dictionaries, in the same format
+        as the output of calculate_pocket_area(), and the vertices column,
+        which is None for pockets without vertices.
+        """
+        df = pd.DataFrame(np.asarray(self.keys), columns=FRAME_PRIMARY_KEY)
+        df["method"] = np.array(self.methods, dtype=object)[self.method_codes]
+        if with_pockets:
+            df["pocket"] = [
+                pocket_to_json(self.get_pocket(i)) for i in range(len(self))
+            ]
+        df["area"] = np.asarray(self.area)
+        if with_vertices:
+            df["vertices"] = self.get_all_vertices()
+        return df
+
+
+def pocket_store_from_dataframe(df_areas: pd.DataFrame) -> PocketStore:
+    """
+    Creates a pocket store from the output of calculate_pocket_area(), which
+    has a pocket column of dictionaries.
+    """
+    methods = list(pd.unique(df_areas["method"]))
+    method_codes = pd.Categorical(df_areas["method"], categories=methods).codes
+
+    n = len(df_areas)
+    radius = np.full(n, np.nan)
+    center = np.full((n, 2), np.nan)
+    vertex_counts = np.zeros(n, dtype=np.int64)
+    vertex_list = []
+    for i, pocket in enumerate(df_areas["pocket"]):
+        metadata: Dict = pocket.get("metadata", {})
+        if metadata.get("radius") is not None:
+            radius[i] = metadata["radius"]
+        if metadata.get("center") is not None:
+            center[i] = metadata["center"]
+        vertices = metadata.get("vertices")
+        if vertices:
+            vertex_counts[i] = len(vertices)
+            vertex_list.extend(vertices)
+
+    vertex_offsets = np.concatenate([[0], np.cumsum(vertex_counts)])
+    vertices = np.array(vertex_list, dtype=float).reshape(-1, 2)
+    return PocketStore(
+        keys=df_areas[FRAME_PRIMARY_KEY].to_numpy(dtype=np.int64),
+        methods=methods,
+        method_codes=method_codes.astype(np.int16),
+        area=df_areas["area"].to_numpy(dtype=float),
+        radius=radius,
+        center=center,
+        vertex_offsets=vertex_offsets.astype(np.int64),
+        vertices=vertices,
+    )
+
+
+def write_pocket_store(store: PocketStore, outpath: str):
+    """
+    Writes a pocket store to a directory with one .npy file per array, and
+    creates the directory if it does not exist.
+    """
+    os.makedirs(outpath, exist_ok=True)
+    for name in POCKET_STORE_ARRAYS:
+        np.save(f"{outpath}/{name}.npy", getattr(store, name))
+    with open(f"{outpath}/{POCKET_STORE_METHODS_FILE}", "w") as file:
+        json.dump(store.methods, file)
+
+
+def read_pocket_store(inpath: str, mmap: bool = True) -> PocketStore:
+    """
+    Reads a pocket store from a directory. By default, memory maps the arrays
+    so that only the pockets that are accessed are read from disk. If the
+    store was written in parts, reads and concatenates all the parts, which
+    copies them into memory, so memory mapping only applies to stores that
+    were written in one piece.
+    """
+    if not os.path.exists(f"{inpath}/{POCKET_STORE_METHODS_FILE}"):
+        part_paths = sorted(glob.glob(f"{inpath}/{POCKET_STORE_PART_PREFIX}*"))
+        if part_paths:
+            parts = [read_pocket_store(path, mmap) for path in part_paths]
+            return concat_pocket_stores(parts)
+
+    mmap_mode = "r" if mmap else None
+    arrays = {
+        name: np.load(f"{inpath}/{name}.npy", mmap_mode=mmap_mode)
+        for name in POCKET_STORE_ARRAYS
+    }
+    with open(f"{inpath}/{POCKET_STORE_METHODS_FILE}") as file:
+        methods = json.load(file)
+    return PocketStore(methods=methods, **arrays)
+
+
+def concat_pocket_stores(stores: List[PocketStore]) -> PocketStore:
+    """Concatenates pocket stores, in order, into one pocket store."""
+    methods: List[str] = []
+    for store in stores:
+        methods.extend(m for m in store.methods if m not in methods)
+
+    method_codes = []
+    vertex_offsets = [np.zeros(1, dtype=np.int64)]
+    vertex_count = 0
+    for store in stores:
+        # Map the method codes of each store to the combined list of methods.
+        code_map = np.array([methods.index(m) for m in store.methods])
+        method_codes.append(code_map[store.method_codes].astype(np.int16))
+        vertex_offsets.append(store.vertex_offsets[1:] + vertex_count)
+        vertex_count += store.vertex_offsets[-1]
+
+    return PocketStore(
+        keys=np.concatenate([store.keys for store in stores]),
+        methods=methods,
+        method_codes=np.concatenate(method_codes),
+        area=np.concatenate([store.area for store in stores]),
+        radius=np.concatenate([store.radius for store in stores]),
+        center=np.concatenate([store.center for store in stores]),
+        vertex_offsets=np.concatenate(vertex_offsets),
+        vertices=np.concatenate([store.vertices for store in stores]),
+    )
+
+
+def read_pocket_areas(inpath: str, with_vertices: bool = False) -> pd.DataFrame:
+    """
+    Reads a pocket store from a directory and returns it in the same format
+    as the output of calculate_pocket_area(), with the pocket column. If
+    requested, also adds the vertices column, so that functions that only
+    need the vertices do not take them from each pocket.
+    """
+    store = read_pocket_store(inpath, mmap=False)
+    return store.to_dataframe(with_pockets=True, with_vertices=with_vertices)
+
+
+def write_pocket_areas(
+    df_areas: pd.DataFrame, outpath: str, part: Optional[int] = None
+):
+    """
+    Writes the pocket areas to pocket_areas.csv, with the key columns, method,
+    and area, and writes the pocket geometry to the pocket_store directory.
+    If a part number is given, the pocket areas are for one batch of games:
+    the parts after the first are appended to the CSV and each part is written
+    to its own directory in the pocket store.
+    """
+    store_path = f"{outpath}/pocket_store"
+    # Remove the pocket store from a previous run, so that its parts are not
+    # read with the parts of this run.
+    if (part is None or part == 0) and os.path.exists(store_path):
+        shutil.rmtree(store_path)
+
+    append = part is not None and part > 0
+    write_csv(
+        df_areas.drop(columns=["pocket"]),
+        f"{outpath}/pocket_areas.csv",
+        append=append,
+    )
+    store = pocket_store_from_dataframe(df_areas)
+    if part is not None:
+        store_path = f"{store_path}/{POCKET_STORE_PART_PREFIX}{part:05d}"
+    write_pocket_store(store, store_path)
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+from src.pipeline.tasks.pocket_store import (
+    pocket_store_from_dataframe,
+    read_pocket_areas,
+    read_pocket_store,
+    write_pocket_areas,
+    write_pocket_store,
+)
+
+
+def get_areas():
+    return pd.DataFrame(
+        [
+            {
+                "gameId": 1,
+                "playId": 1,
+                "frameId": 1,
+                "method": "hull",
+                "pocket": {
+                    "area": 0.5,
+                    "metadata": {
+                        "vertices": [(0.0, -1.0), (1.0, -1.0), (1.0, 0.0)]
+                    },
+                },
+                "area": 0.5,
+            },
+            {
+                "gameId": 1,
+                "playId": 1,
+                "frameId": 1,
+                "method": "circle",
+                "pocket": {
+                    "area": 12.5,
+                    "metadata": {"radius": 2.0, "center": (4.0, 5.0)},
+                },
+                "area": 12.5,
+            },
+            {
+                "gameId": 1,
+                "playId": 1,
+                "frameId": 2,
+                "method": "hull",
+                "pocket": {"area": None},
+                "area": np.nan,
+            },
+        ]
+    )
+
+
+def test_pocket_store_from_dataframe():
+    store = pocket_store_from_dataframe(get_areas())
+    assert len(store) == 3
+    assert store.methods == ["hull", "circle"]
+    assert store.method_codes.tolist() == [0, 1, 0]
+    assert store.vertex_offsets.tolist() == [0, 3, 3, 3]
+    assert store.get_vertices(0) == [(0.0, -1.0), (1.0, -1.0), (1.0, 0.0)]
+    assert store.get_vertices(1) is None
+    assert store.get_pocket(1).metadata.center == (4.0, 5.0)
+    assert np.isnan(store.get_pocket(2).area)
+
+
+def test_write_and_read_pocket_store(tmp_path):
+    df_areas = get_areas()
+    outpath = f"{tmp_path}/pocket_store"
+    write_pocket_store(pocket_store_from_dataframe(df_areas), outpath)
+    store = read_pocket_store(outpath)
+    actual = store.to_dataframe(with_pockets=True)
+    pd.testing.assert_frame_equal(actual, df_areas)
+
+
+def test_write_pocket_areas(tmp_path):
+    df_areas = get_areas()
+    write_pocket_areas(df_areas, str(tmp_path))
+    df_csv = pd.read_csv(f"{tmp_path}/pocket_areas.csv")
+    assert list(df_csv.columns) == [
+        "gameId",
+        "playId",
+        "frameId",
+        "method",
+        "area",
+    ]
+    actual = read_pocket_areas(f"{tmp_path}/pocket_store")
+    pd.testing.assert_frame_equal(actual, df_areas)
+
+
+def test_write_pocket_areas_in_parts(tmp_path):
+    df_areas = get_areas()
+    write_pocket_areas(df_areas.iloc[:1], str(tmp_path), part=0)
+    write_pocket_areas(df_areas.iloc[1:], str(tmp_path), part=1)
+    df_csv = pd.read_csv(f"{tmp_path}/pocket_areas.csv")
+    assert df_csv["method"].tolist() == ["hull", "circle", "hull"]
+    actual = read_pocket_areas(f"{tmp_path}/pocket_store")
+    pd.testing.assert_frame_equal(actual, df_areas)
+
+
+def test_read_pocket_areas_with_vertices(tmp_path):
+    df_areas = get_areas()
+    write_pocket_areas(df_areas, str(tmp_path))
+    actual = read_pocket_areas(f"{tmp_path}/pocket_store", with_vertices=True)
+    assert actual["vertices"].tolist() == [
+        [(0.0, -1.0), (1.0, -1.0), (1.0, 0.0)],
+        None,
+        None,
+    ]
@@ -1,12 +1,40 @@
+from typing import Optional
+
 import numpy as np
 import pandas as pd
-from shapely import Point, Polygon
+import shapely
+
+# Columns of the spotlight search that are written out, for the spotlight
+# viewer, followed by the columns of the plays. The shapely polygons and the
+# pocket metadata are left out, since they can be rebuilt from the vertices
+# with get_polygons().
+SPOTLIGHT_SEARCH_COLUMNS = [
+    "gameId",
+    "playId",
+    "method",
+    "window_type",
+    "window_start",
+    "window_end",
+    "time_start",
+    "time_end",
+    "area_start",
+    "area_end",
+    "percentage_change",
+    "vertices_start",
+    "vertices_end",
+    "count_blockers",
+    "all_blockers",
+    "count_rushers",
+    "all_rushers",
+]
 
 
-def get_spotlight_plays(df_play_metrics: pd.DataFrame) -> pd.DataFrame:
+def get_spotlight_plays(
+    df_play_metrics: pd.DataFrame, window_type: str = "before_end"
+) -> pd.DataFrame:
     df = pd.DataFrame(df_play_metrics)
     # 1. Filter play_metrics to only the before_end time window
-    df = df[df["window_type"] == "before_end"]
+    df = df[df["window_type"] == window_type]
     # 2. Augment play_metrics with the percentage change of the area between the window start and end
     df["percentage_change"] = (df["area_start"] - df["area_end"]) / df[
         "area_start"
@@ -20,18 +48,69 @@ def get_spotlight_plays(df_play_metrics: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+def get_spotlight_window_areas(
+    df_spotlight_plays: pd.DataFrame, df_areas: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Filters the pocket areas to the frames at the start and end of each
+    spotlight window, which are the only frames whose vertices are used.
+    """
+    frame_keys = ["gameId", "playId", "frameId"]
+    df_window_frames = pd.concat(
+        [
+            df_spotlight_plays[["gameId", "playId", column]].set_axis(
+                frame_keys, axis=1
+            )
+            for column in ["window_start", "window_end"]
+        ]
+    )
+    is_window_frame = pd.MultiIndex.from_frame(df_areas[frame_keys]).isin(
+        pd.MultiIndex.from_frame(df_window_frames)
+    )
+    return df_areas[is_window_frame]
+
+
+def get_pocket_vertices(df_areas: pd.DataFrame) -> pd.Series:
+    """
+    Returns the vertices of each pocket, if any. Uses the vertices column if
+    the pocket areas have one, such as from read_pocket_areas(), instead of
+    taking the vertices from the metadata of each pocket.
+    """
+    if "vertices" in df_areas.columns:
+        return df_areas["vertices"]
+    return df_areas["pocket"].apply(
+        lambda p: p.get("metadata", {}).get("vertices")
+    )
+
+
 def get_frame_vertices(df_areas: pd.DataFrame) -> pd.DataFrame:
     df = pd.DataFrame(df_areas)
     # 4. Augment pocket_areas with a column that contains the vertices from the pocket metadata, if any
-    df["vertices"] = df["pocket"].apply(
-        lambda p: p.get("metadata", {}).get("vertices")
-    )
+    df["vertices"] = get_pocket_vertices(df)
     # 5. Filter pocket_areas to only frames with vertices in the pocket metadata
     df = df[df["vertices"].notna()]
     df = df[["gameId", "playId", "frameId", "vertices"]]
     return df.reset_index()
 
 
+def get_polygons(vertices: pd.Series) -> np.ndarray:
+    """
+    Creates a shapely polygon from each list of vertices, all at once. Lists
+    without vertices get an empty polygon.
+    """
+    rings = [np.array(v, dtype=float).reshape(-1, 2) for v in vertices]
+    counts = np.array([len(ring) for ring in rings], dtype=int)
+    polygons = np.array([shapely.Polygon()] * len(rings), dtype=object)
+    has_vertices = counts > 0
+    if has_vertices.any():
+        coords = np.concatenate([ring for ring in rings if len(ring) > 0])
+        indices = np.repeat(np.arange(has_vertices.sum()), counts[has_vertices])
+        polygons[has_vertices] = shapely.polygons(
+            shapely.linearrings(coords, indices=indices)
+        )
+    return polygons
+
+
 def get_spotlight_windows(
     df_spotlight_plays: pd.DataFrame, df_frame_vertices: pd.DataFrame
 ) -> pd.DataFrame:
@@ -58,15 +137,11 @@ def get_spotlight_windows(
     # 7. Filter the join result to only windows that have vertices for both their start and end frames
     df = df[df["vertices_start"].notna() & df["vertices_end"].notna()]
     # 8. Augment the join result with shapely polygons from the vertices
-    df["polygon_start"] = df["vertices_start"].apply(lambda v: Polygon(v))
-    df["polygon_end"] = df["vertices_end"].apply(lambda v: Polygon(v))
+    df["polygon_start"] = get_polygons(df["vertices_start"])
+    df["polygon_end"] = get_polygons(df["vertices_end"])
     # 9. Augment the join result the polygon difference between the start and end polygons
-    def get_polygon_difference(polygon_start, polygon_end):
-        return polygon_start.difference(polygon_end)
-
-    vec_polygon_difference = np.vectorize(get_polygon_difference)
-    df["polygon_difference"] = vec_polygon_difference(
-        df["polygon_start"], df["polygon_end"]
+    df["polygon_difference"] = shapely.difference(
+        df["polygon_start"].to_numpy(), df["polygon_end"].to_numpy()
     )
     # 10. This result provides spotlight_windows, the spotlight area for each selected play window
     return df
@@ -100,14 +175,17 @@ def get_spotlight_players(
     )
     # 13. This result provides spotlight_players, the players that could be in the spotlight area
     # 14. Augment the join result with an indicator column for whether or not each player is in the spotlight area
-    def is_in_spotlight(polygon, x, y):
-        point = Point(x, y)
-        return polygon.contains(point)
-
-    vec_is_in_spotlight = np.vectorize(is_in_spotlight)
-    df["in_spotlight"] = vec_is_in_spotlight(
-        df["polygon_difference"], df["x"], df["y"]
-    )
+    # Rows for the same window share the same polygon, so preparing it once
+    # speeds up the containment tests for all of its players. Empty spotlights
+    # contain no players.
+    polygons = df["polygon_difference"].to_numpy()
+    shapely.prepare(polygons)
+    with np.errstate(invalid="ignore"):
+        df["in_spotlight"] = shapely.contains_xy(
+            polygons,
+            df["x"].to_numpy(dtype=float),
+            df["y"].to_numpy(dtype=float),
+        )
     # 15. Filter the join result to players who are in the spotlight area
     df = df[df["in_spotlight"]]
     return df
@@ -173,7 +251,15 @@ def get_spotlight_data(
     df_play_metrics: pd.DataFrame,
     df_areas: pd.DataFrame,
     df_plays: pd.DataFrame,
+    min_percentage_change: Optional[float] = None,
+    window_type: str = "before_end",
 ) -> pd.DataFrame:
+    """
+    Runs the spotlight search for each play, from the tracking display data,
+    play metrics, pocket areas with their pocket metadata, and plays. If a
+    minimum percentage change is given, only plays whose pocket lost at least
+    that fraction of its area over the window are searched.
+    """
     # The spotlight algorithm only works with area algorithms where the defender
     # can be in the pocket, and the adaptive pocket area algorithm is our best
     # algorithm in that category.
@@ -182,9 +268,19 @@ def get_spotlight_data(
     df_play_metrics_default = df_play_metrics.query(query_area)
     df_areas_default = df_areas.query(query_area)
     # Run steps of algorithm.
-    df_spotlight_plays = get_spotlight_plays(df_play_metrics_default)
-    # Optional: We can pre-filter plays to reduce spatial computation below, or we can leave this for the end.
-    # df_spotlight_plays = df_spotlight_plays[df_spotlight_plays["percentage_change"] >= 0.99]
+    df_spotlight_plays = get_spotlight_plays(
+        df_play_metrics_default, window_type
+    )
+    # Pre-filter plays to reduce spatial computation below. The caller can
+    # also filter the returned DataFrame.
+    if min_percentage_change is not None:
+        df_spotlight_plays = df_spotlight_plays[
+            df_spotlight_plays["percentage_change"] >= min_percentage_change
+        ]
+    # Only read the vertices of the frames at the start and end of windows.
+    df_areas_default = get_spotlight_window_areas(
+        df_spotlight_plays, df_areas_default
+    )
     df_frame_vertices = get_frame_vertices(df_areas_default)
     df_spotlight_windows = get_spotlight_windows(
         df_spotlight_plays, df_frame_vertices
@@ -199,3 +295,16 @@ def get_spotlight_data(
         df_spotlight_windows, df_spotlight_metrics, df_plays
     )
     return df_spotlight_search
+
+
+def select_spotlight_search_columns(
+    df_spotlight_search: pd.DataFrame, df_plays: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Selects the columns of the spotlight search to write out: the columns in
+    SPOTLIGHT_SEARCH_COLUMNS, then the play metadata from the plays.
+    """
+    play_cols = [
+        col for col in df_plays.columns if col not in SPOTLIGHT_SEARCH_COLUMNS
+    ]
+    return df_spotlight_search[SPOTLIGHT_SEARCH_COLUMNS + play_cols]
@@ -0,0 +1,174 @@
+import pandas as pd
+import pytest
+import shapely
+
+from src.pipeline.tasks.spotlight import (
+    SPOTLIGHT_SEARCH_COLUMNS,
+    get_pocket_vertices,
+    get_polygons,
+    get_spotlight_players,
+    get_spotlight_window_areas,
+    get_spotlight_windows,
+    select_spotlight_search_columns,
+)
+from src.pipeline.tasks.test_helpers import row_creator
+
+
+def test_get_polygons():
+    vertices = pd.Series(
+        [
+            [(0, 0), (2, 0), (2, 2), (0, 2)],
+            [],
+            # Closed rings are not closed again.
+            [(0, 0), (1, 0), (0, 1), (0, 0)],
+        ]
+    )
+    polygons = get_polygons(vertices)
+    assert shapely.area(polygons).tolist() == [4, 0, 0.5]
+    assert polygons[0].equals(shapely.Polygon(vertices[0]))
+    assert polygons[1].is_empty
+    assert len(polygons[2].exterior.coords) == 4
+
+
+def test_get_pocket_vertices():
+    square = [(0, 0), (1, 0), (1, 1)]
+    df_areas = pd.DataFrame(
+        {"pocket": [{"metadata": {"vertices": square}}, {"metadata": {}}]}
+    )
+    assert get_pocket_vertices(df_areas).tolist() == [square, None]
+
+    # The vertices column is used instead of the pockets, if any.
+    df_areas["vertices"] = [None, square]
+    assert get_pocket_vertices(df_areas).tolist() == [None, square]
+
+
+def test_get_spotlight_window_areas():
+    play_row = row_creator(["gameId", "playId", "window_start", "window_end"])
+    df_plays = pd.DataFrame([play_row(1, 1, 10, 20), play_row(1, 2, 12, 22)])
+    area_row = row_creator(["gameId", "playId", "frameId", "area"])
+    df_areas = pd.DataFrame(
+        [
+            area_row(1, 1, 10, 1.0),
+            area_row(1, 1, 11, 2.0),
+            area_row(1, 1, 20, 3.0),
+            # Window frames of another play.
+            area_row(1, 2, 10, 4.0),
+            area_row(1, 2, 22, 5.0),
+            # Play without a spotlight window.
+            area_row(1, 3, 10, 6.0),
+        ]
+    )
+
+    actual = get_spotlight_window_areas(df_plays, df_areas)
+
+    # Rows keep their index, which is carried through to the spotlight search.
+    assert actual.index.tolist() == [0, 2, 4]
+    assert actual["area"].tolist() == [1.0, 3.0, 5.0]
+
+
+def test_get_spotlight_windows():
+    play_row = row_creator(["gameId", "playId", "window_start", "window_end"])
+    df_plays = pd.DataFrame(
+        [
+            play_row(1, 1, 10, 20),
+            play_row(1, 2, 10, 20),
+            # Window without vertices at its end frame.
+            play_row(1, 3, 10, 20),
+        ]
+    )
+    vertices_row = row_creator(["gameId", "playId", "frameId", "vertices"])
+    square = [(0, -4), (4, -4), (4, 0), (0, 0)]
+    df_vertices = pd.DataFrame(
+        [
+            vertices_row(1, 1, 10, square),
+            vertices_row(1, 1, 20, [(0, -4), (4, -4), (4, -2), (0, -2)]),
+            vertices_row(1, 2, 10, square),
+            vertices_row(1, 2, 20, square),
+            vertices_row(1, 3, 10, square),
+        ]
+    )
+
+    actual = get_spotlight_windows(df_plays, df_vertices)
+
+    assert actual["playId"].tolist() == [1, 2]
+    assert shapely.area(actual["polygon_start"]).tolist() == [16, 16]
+    assert shapely.area(actual["polygon_end"]).tolist() == [8, 16]
+    # The spotlight is the part of the pocket that was lost.
+    spotlight = actual["polygon_difference"].iloc[0]
+    assert spotlight.area == pytest.approx(8)
+    assert spotlight.bounds == (0, -2, 4, 0)
+    assert actual["polygon_difference"].iloc[1].is_empty
+
+
+def test_get_spotlight_players():
+    df_windows = pd.DataFrame(
+        {
+            "gameId": [1, 1],
+            "playId": [1, 2],
+            "window_start": [10, 10],
+            "polygon_difference": [
+                shapely.box(0, -2, 4, 0),
+                shapely.Polygon(),
+            ],
+        }
+    )
+    player_row = row_creator(
+        [
+            "gameId",
+            "playId",
+            "frameId",
+            "nflId",
+            "jerseyNumber",
+            "pff_role",
+            "x",
+            "y",
+        ]
+    )
+    df_tracking = pd.DataFrame(
+        [
+            # Inside the spotlight.
+            player_row(1, 1, 10, 1, 70, "Pass Block", 1.0, -1.0),
+            player_row(1, 1, 10, 2, 90, "Pass Rush", 3.0, -0.5),
+            # Outside the spotlight.
+            player_row(1, 1, 10, 3, 71, "Pass Block", 1.0, -3.0),
+            # Not a blocker or rusher.
+            player_row(1, 1, 10, 4, 12, "Pass", 2.0, -1.0),
+            # Not at the start of the window.
+            player_row(1, 1, 11, 2, 90, "Pass Rush", 2.0, -1.0),
+            # Window with an empty spotlight.
+            player_row(1, 2, 10, 5, 91, "Pass Rush", 2.0, -1.0),
+        ]
+    )
+
+    actual = get_spotlight_players(df_windows, df_tracking)
+
+    assert actual["nflId"].tolist() == [1, 2]
+    assert actual["in_spotlight"].all()
+
+
+def test_select_spotlight_search_columns():
+    df_plays = pd.DataFrame(
+        {
+            "gameId": [1],
+            "playId": [1],
+            "passResult": ["S"],
+            "playResult": [-7],
+        }
+    )
+    internal_cols = [
+        "index_x",
+        "index_y",
+        "pocket",
+        "polygon_start",
+        "polygon_end",
+        "polygon_difference",
+    ]
+    columns = SPOTLIGHT_SEARCH_COLUMNS + internal_cols + ["passResult"]
+    df_search = pd.DataFrame([[0] * len(columns)], columns=columns)
+    df_search["playResult"] = -7
+
+    actual = select_spotlight_search_columns(df_search, df_plays)
+
+    # Internal columns are dropped, and the play metadata comes last.
+    expected = SPOTLIGHT_SEARCH_COLUMNS + ["passResult", "playResult"]
+    assert actual.columns.tolist() == expected
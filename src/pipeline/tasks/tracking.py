@@ -1,3 +1,6 @@
+from typing import Tuple
+
+import numpy as np
 import pandas as pd
 
 from src.pipeline.tasks.constants import (
@@ -15,32 +18,7 @@ def align_tracking_data(df_tracking: pd.DataFrame) -> pd.DataFrame:
     """
     Aligns tracking data so that all plays have `playDirection = right`.
     """
-    # Copy input DataFrame.
-    df = pd.DataFrame(df_tracking)
-
-    # Create series with 1 if play needs to be aligned, 0 otherwise.
-    is_unaligned_mask = (df["playDirection"] == "left").astype(int)
-
-    # Align coordinates.
-    # Returns reverse factor of -1 if unaligned, otherwise 1.
-    reverse_if_unaligned = (-2 * is_unaligned_mask) + 1
-    added_length_if_unaligned = FIELD_LENGTH * is_unaligned_mask
-    added_width_if_unaligned = FIELD_WIDTH * is_unaligned_mask
-    # Rotate coordinates by 180 degrees, then shift by the length and width of
-    # the football field.
-    df["x"] = (reverse_if_unaligned * df["x"]) + added_length_if_unaligned
-    df["y"] = (reverse_if_unaligned * df["y"]) + added_width_if_unaligned
-
-    # Align angles.
-    # Adds 180 degrees if unaligned, otherwise 0 degrees.
-    added_angle_if_unaligned = 180 * is_unaligned_mask
-    # Rotate angle clockwise by 180 degrees and clip to range [0, 360].
-    df["o"] = (df["o"] + added_angle_if_unaligned) % MAX_DEGREES
-    df["dir"] = (df["dir"] + added_angle_if_unaligned) % MAX_DEGREES
-
-    # Now, all plays move towards the right.
-    df["playDirection"] = "right"
-    return df
+    return normalize_tracking_data(df_tracking, align=True, rotate=False)
 
 
 def rotate_tracking_data(df_tracking: pd.DataFrame) -> pd.DataFrame:
@@ -52,25 +30,7 @@ def rotate_tracking_data(df_tracking: pd.DataFrame) -> pd.DataFrame:
 
     Tracking data should already be aligned.
     """
-    # Copy input DataFrame.
-    df = pd.DataFrame(df_tracking)
-
-    # Rotate coordinates.
-    # Save copy of original x coordinates before swapping and transforming.
-    original_x = df["x"].copy()
-    # x-coordinate takes the value of the y-coordinate, but also needs to reset
-    # the axis to run from 0 to 53.333 instead of from 53.333 to 0.
-    df["x"] = FIELD_WIDTH - df["y"]
-    # y-coordinate just takes the original value of the x-coordinate.
-    df["y"] = original_x
-
-    # Rotate angles.
-    # Rotate angle counterclockwise by 90 degrees (which is the same as 270
-    # degrees clockwise) and clip to range [0, 360].
-    df["o"] = (df["o"] + 270) % MAX_DEGREES
-    df["dir"] = (df["dir"] + 270) % MAX_DEGREES
-
-    return df
+    return normalize_tracking_data(df_tracking, align=False, rotate=True)
 
 
 def center_tracking_data(df_tracking: pd.DataFrame) -> pd.DataFrame:
@@ -79,33 +39,125 @@ def center_tracking_data(df_tracking: pd.DataFrame) -> pd.DataFrame:
 
     Tracking data should already be aligned and rotated.
     """
-    # Copy input DataFrame.
-    df = pd.DataFrame(df_tracking)
-
-    # Get ball coordinates at snap (technically a few frames before snap).
-    play_keys = ["gameId", "playId"]
-    snap_columns = ["x", "y"]
-    snap_filter_columns = ["frameId", "frame_before_snap", "team"]
-    df_ball_snap = (
-        df[play_keys + snap_columns + snap_filter_columns]
-        .query("frameId == frame_before_snap and team == 'football'")
-        .drop_duplicates()
-        .drop(columns=snap_filter_columns)
-        .rename(columns={"x": "ball_snap_x", "y": "ball_snap_y"})
+    return normalize_tracking_data(
+        df_tracking, align=False, rotate=False, center=True
     )
 
-    # Join ball snap coordinates back to tracking data.
-    # Use inner join to filter out plays that do not have a snap.
-    df = df.merge(df_ball_snap, on=play_keys, how="inner")
 
-    # Shift coordinates so that ball snap is at (0, 0).
-    # Angles are not affected, only position coordinates.
-    df["x"] = df["x"] - df["ball_snap_x"]
-    df["y"] = df["y"] - df["ball_snap_y"]
+def normalize_tracking_data(
+    df_tracking: pd.DataFrame,
+    align: bool = True,
+    rotate: bool = True,
+    center: bool = False,
+) -> pd.DataFrame:
+    """
+    Normalizes the coordinates and angles of tracking data in one pass over the
+    x, y, o, and dir columns as arrays, instead of one pass per step:
+
+    - align: all plays have `playDirection = right`.
+    - rotate: the x-axis is the width of the football field and the y-axis is
+      the length of the football field.
+    - center: the origin is where the ball was snapped. Adds the ball_snap_x
+      and ball_snap_y columns and removes plays that do not have a snap.
+      Requires the frame_before_snap column from the event data.
+    """
+    # Copy input DataFrame, since assigning the columns below can write to the
+    # arrays that back it.
+    df = df_tracking.copy()
+
+    # Copy the coordinates too, since rotating swaps them, so assigning one
+    # column could overwrite the array of the other.
+    x = df["x"].to_numpy(dtype=float, copy=True)
+    y = df["y"].to_numpy(dtype=float, copy=True)
+
+    if align or rotate:
+        o = df["o"].to_numpy(dtype=float, copy=True)
+        direction = df["dir"].to_numpy(dtype=float, copy=True)
+
+    if align:
+        # Rotate coordinates by 180 degrees, then shift by the length and width
+        # of the football field, for plays that move towards the left.
+        is_unaligned = (df["playDirection"] == "left").to_numpy()
+        reverse_if_unaligned = np.where(is_unaligned, -1, 1)
+        x = (reverse_if_unaligned * x) + (FIELD_LENGTH * is_unaligned)
+        y = (reverse_if_unaligned * y) + (FIELD_WIDTH * is_unaligned)
+        # Rotate angle clockwise by 180 degrees and clip to range [0, 360].
+        added_angle_if_unaligned = 180 * is_unaligned
+        o = add_degrees(o, added_angle_if_unaligned)
+        direction = add_degrees(direction, added_angle_if_unaligned)
+
+    if rotate:
+        # x-coordinate takes the value of the y-coordinate, but also needs to
+        # reset the axis to run from 0 to 53.333 instead of from 53.333 to 0.
+        # y-coordinate just takes the original value of the x-coordinate.
+        x, y = FIELD_WIDTH - y, x
+        # Rotate angle counterclockwise by 90 degrees (which is the same as 270
+        # degrees clockwise) and clip to range [0, 360].
+        o = add_degrees(o, 270)
+        direction = add_degrees(direction, 270)
+
+    if align or rotate:
+        df["x"] = x
+        df["y"] = y
+        df["o"] = o
+        df["dir"] = direction
+    if align:
+        # Now, all plays move towards the right.
+        df["playDirection"] = "right"
+
+    if center:
+        # Shift coordinates so that ball snap is at (0, 0).
+        # Angles are not affected, only position coordinates.
+        ball_snap_x, ball_snap_y = get_ball_snap_coordinates(df, x, y)
+        df["x"] = x - ball_snap_x
+        df["y"] = y - ball_snap_y
+        df["ball_snap_x"] = ball_snap_x
+        df["ball_snap_y"] = ball_snap_y
+
+        # Filter out plays that do not have a snap.
+        has_snap = ~np.isnan(ball_snap_x)
+        if not has_snap.all():
+            df = df[has_snap]
+        df = df.reset_index(drop=True)
 
     return df
 
 
+def add_degrees(angles: np.ndarray, degrees) -> np.ndarray:
+    """
+    Rotates angles clockwise by the given degrees and clips to range [0, 360].
+    Missing angles, such as for the football, stay missing.
+    """
+    with np.errstate(invalid="ignore"):
+        return (angles + degrees) % MAX_DEGREES
+
+
+def get_ball_snap_coordinates(
+    df_tracking: pd.DataFrame, x: np.ndarray, y: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the coordinates of the ball at snap (technically a few frames
+    before snap) for the play of each row, given the x and y coordinates of
+    each row, or np.nan if the play does not have a snap. Looks up the snap of
+    each play by its position in an array, instead of joining on the play keys.
+    """
+    play_codes = df_tracking.groupby(PLAY_PRIMARY_KEY, sort=False).ngroup()
+    play_codes = play_codes.to_numpy()
+    is_ball_snap = (
+        df_tracking["frameId"] == df_tracking["frame_before_snap"]
+    ) & (df_tracking["team"] == "football")
+    snap_rows = np.flatnonzero(is_ball_snap.to_numpy())
+
+    n_plays = play_codes.max() + 1 if len(play_codes) > 0 else 0
+    play_snap_x = np.full(n_plays, np.nan)
+    play_snap_y = np.full(n_plays, np.nan)
+    # Assign in reverse, so that the first snap row of each play is kept.
+    snap_rows = snap_rows[::-1]
+    play_snap_x[play_codes[snap_rows]] = x[snap_rows]
+    play_snap_y[play_codes[snap_rows]] = y[snap_rows]
+    return play_snap_x[play_codes], play_snap_y[play_codes]
+
+
 def transform_to_tracking_display(
     df_tracking: pd.DataFrame, df_plays: pd.DataFrame, df_pff: pd.DataFrame
 ) -> pd.DataFrame:
@@ -141,6 +193,8 @@ def transform_to_tracking_display(
     # Transform columns for final dataframe
     df_join["jerseyNumber"] = df_join["jerseyNumber"].fillna(0).astype(int)
     df_join["jerseyNumber"] = df_join["jerseyNumber"].astype(str)
-    df_join["object_id"] = df_join["team"] + " " + df_join["jerseyNumber"]
+    df_join["object_id"] = (
+        df_join["team"].astype(str) + " " + df_join["jerseyNumber"]
+    )
     df_join["pff_role"] = df_join["pff_role"].fillna("Football")
     return df_join
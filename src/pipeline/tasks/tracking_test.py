@@ -3,6 +3,8 @@ import pytest
 
 from src.pipeline.tasks.tracking import (
     align_tracking_data,
+    center_tracking_data,
+    normalize_tracking_data,
     rotate_tracking_data,
 )
 
@@ -64,3 +66,87 @@ def test_rotate_tracking_data():
         },
     ]
     assert actual.to_dict(orient="records") == expected
+
+
+def test_center_tracking_data():
+    df_tracking = pd.DataFrame(
+        [
+            {
+                "gameId": 1,
+                "playId": 1,
+                "frameId": 1,
+                "team": "home",
+                "x": 5,
+                "y": 8,
+            },
+            {
+                "gameId": 1,
+                "playId": 1,
+                "frameId": 1,
+                "team": "football",
+                "x": 2,
+                "y": 3,
+            },
+            {
+                "gameId": 1,
+                "playId": 1,
+                "frameId": 2,
+                "team": "football",
+                "x": 4,
+                "y": 5,
+            },
+            # Play without a ball snap frame is removed.
+            {
+                "gameId": 1,
+                "playId": 2,
+                "frameId": 1,
+                "team": "football",
+                "x": 2,
+                "y": 3,
+            },
+        ]
+    )
+    df_tracking["frame_before_snap"] = [1, 1, 1, 3]
+    actual = center_tracking_data(df_tracking)
+    assert actual[["frameId", "x", "y"]].to_dict(orient="records") == [
+        {"frameId": 1, "x": 3, "y": 5},
+        {"frameId": 1, "x": 0, "y": 0},
+        {"frameId": 2, "x": 2, "y": 2},
+    ]
+    assert actual["ball_snap_x"].tolist() == [2, 2, 2]
+    assert actual["ball_snap_y"].tolist() == [3, 3, 3]
+
+
+def test_normalize_tracking_data():
+    df_tracking = pd.DataFrame(
+        [
+            {"playDirection": "right", "x": 30, "y": 50, "o": 90, "dir": 0},
+            {"playDirection": "left", "x": 80, "y": 10, "o": 270, "dir": 180},
+        ]
+    )
+    actual = normalize_tracking_data(df_tracking.copy())
+    expected = rotate_tracking_data(align_tracking_data(df_tracking.copy()))
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_normalize_tracking_data_does_not_change_input():
+    df_tracking = pd.DataFrame(
+        [
+            {
+                "gameId": 1,
+                "playId": 1,
+                "frameId": 1,
+                "team": "football",
+                "playDirection": "left",
+                "x": 80.0,
+                "y": 10.0,
+                "o": 270.0,
+                "dir": 180.0,
+                "frame_before_snap": 1,
+            },
+        ]
+    )
+    df_expected = df_tracking.copy()
+    normalize_tracking_data(df_tracking, center=True)
+    center_tracking_data(df_tracking)
+    pd.testing.assert_frame_equal(df_tracking, df_expected)
@@ -1,17 +1,30 @@
 import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
 import seaborn as sns
 from matplotlib.patches import Polygon as PolygonPatch
 from matplotlib.ticker import MultipleLocator
 from mpl_toolkits.axes_grid1 import make_axes_locatable
-from shapely import Point as ShapelyPoint
 from shapely import Polygon as ShapelyPolygon
 
 from src.metrics.pocket_area.helpers import vertices_from_shape
-
-
-def heatmap_from_points(points, total, bin_start, bin_end, bin_size):
+from src.pipeline.tasks.pocket_grids import (
+    POCKET_GRID_BIN_END,
+    POCKET_GRID_BIN_SIZE,
+    POCKET_GRID_BIN_START,
+    filter_pocket_grids,
+    get_play_pockets,
+)
+from src.visualization.rasterize import get_sample_centers, rasterize_shapes
+
+
+def heatmap_from_points(
+    points, total, bin_start, bin_end, bin_size, weights=None
+):
+    """
+    Bins the points into a heatmap, scaled by the total number of observations
+    the points were sampled from. If weights are given, each point counts as
+    its weight, such as the number of shapes it was sampled in.
+    """
     x = [p[0] for p in points]
     y = [p[1] for p in points]
 
@@ -25,6 +38,7 @@ def heatmap_from_points(points, total, bin_start, bin_end, bin_size):
         x=y,
         y=x,
         bins=[bins, bins],
+        weights=weights,
         # Actually we need to use bin_count / play_count, which
         # would be shape count in this case. So turn density off.
         # Density = bin_count / total_count / bin_area
@@ -43,44 +57,43 @@ def heatmap_from_points(points, total, bin_start, bin_end, bin_size):
     return scaled_heatmap, extent
 
 
-def sample_points_in_shapes(shapes, bin_start, bin_end, bin_size, progress):
+def get_sample_coverage(shapes, bin_start, bin_end, bin_size, progress):
+    """
+    Returns the display point on the edge of each cell of the grid, and how
+    many shapes contain the midpoint of the cell, including on their border.
+    """
     sample_range = np.arange(bin_start, bin_end + bin_size, bin_size)
-    half_bin = bin_size / 2.0
-    points_in_pocket = []
-    # This triple for-loop is inefficient, optimize with vector operations.
-    sample_points = [(x, y) for x in sample_range for y in sample_range]
-
-    # Show progress bar, if requested.
-    if progress:
-        from tqdm.notebook import tqdm
-
-        progress_bar = tqdm(sample_points)
-    else:
-        progress_bar = sample_points
-
-    for x, y in progress_bar:
-        # Sample point should be in the midpoint of the cell.
-        sample_point = (x + half_bin, y + half_bin)
-        # Display point for heatmap should be on the cell edge.
-        display_point = (x, y)
-        # Convert sample point to a shapely point to compare to polygon.
-        shape_point = ShapelyPoint(*sample_point)
-        for shape in shapes:
-            # Also use the exterior so that both points inside the shape
-            # use on the border are considered inside the shape.
-            is_in_cell = shape.contains(shape_point) or shape.exterior.contains(
-                shape_point
-            )
-            # Check the sample point, but save the display point.
-            if is_in_cell:
-                points_in_pocket.append(display_point)
-    return points_in_pocket
+    # Sample point should be in the midpoint of the cell.
+    sample_centers = get_sample_centers(bin_start, bin_end, bin_size)
+    coverage = rasterize_shapes(
+        shapes, sample_centers, sample_centers, progress=progress
+    )
+    # Display point for heatmap should be on the cell edge.
+    display_y, display_x = np.meshgrid(
+        sample_range, sample_range, indexing="ij"
+    )
+    display_points = np.column_stack([display_x.ravel(), display_y.ravel()])
+    return display_points, coverage.ravel()
+
+
+def sample_points_in_shapes(shapes, bin_start, bin_end, bin_size, progress):
+    """
+    Returns the display point of a cell once for each shape that contains the
+    midpoint of the cell.
+    """
+    display_points, coverage = get_sample_coverage(
+        shapes, bin_start, bin_end, bin_size, progress
+    )
+    points_in_pocket = np.repeat(display_points, coverage, axis=0)
+    return [(x, y) for x, y in points_in_pocket.tolist()]
 
 
 def get_heatmap_from_pocket_shapes(
     pocket_shapes, bin_start, bin_end, bin_size, progress=False
 ):
-    points_in_pocket = sample_points_in_shapes(
+    # Weight each cell by its number of shapes, rather than repeating the
+    # cell for each shape.
+    display_points, coverage = get_sample_coverage(
         pocket_shapes,
         bin_start,
         bin_end,
@@ -89,11 +102,12 @@ def get_heatmap_from_pocket_shapes(
     )
     total = len(pocket_shapes)
     heatmap, extent = heatmap_from_points(
-        points_in_pocket,
+        display_points,
         total,
         bin_start,
         bin_end,
         bin_size,
+        weights=coverage,
     )
     return heatmap, extent
 
@@ -103,53 +117,7 @@ def get_play_pocket(df_play_metrics, df_areas, df_plays, window_size_frames):
     Choose one frame per play and area method and get
     the pocket object for that frame.
     """
-    # Find the frame X seconds before the pocket ends.
-    frames_per_second = 10
-    half_window = window_size_frames // 2.0
-    df = pd.DataFrame(df_play_metrics)
-    df = df[df["window_type"] == "entire_pocket"]
-    df["pocket_frame"] = (df["frame_end"] - half_window).astype(int)
-
-    # Restrict the left side to one row per play, then
-    # explode it with the right to get one row per play
-    # and area type.
-    left_cols = [
-        "gameId",
-        "playId",
-        "pocket_frame",
-        "frame_start",
-        "frame_end",
-    ]
-    df = df[left_cols].drop_duplicates()
-
-    # Extract vertices from pocket object, if any.
-    def get_vertices(pocket):
-        return pocket.get("metadata", {}).get("vertices")
-
-    pocket_cols = [
-        "gameId",
-        "playId",
-        "frameId",
-        "method",
-        "pocket",
-    ]
-    df_vertices = pd.DataFrame(df_areas[pocket_cols])
-    df_vertices["vertices"] = df_vertices["pocket"].apply(get_vertices)
-    df_vertices.drop(columns=["pocket"], inplace=True)
-
-    # Drop plays without a polygon-shaped pocket.
-    df_vertices = df_vertices[df_vertices["vertices"].notna()]
-
-    # Inner join to keep only plays that have a window before
-    # the pocket ends (left side) AND have a polygon-shaped
-    # pocket (right side).
-    df_pocket = df.merge(
-        df_vertices,
-        left_on=["gameId", "playId", "pocket_frame"],
-        right_on=["gameId", "playId", "frameId"],
-        how="inner",
-    )
-    df_pocket.drop(columns=["pocket_frame"], inplace=True)
+    df_pocket = get_play_pockets(df_play_metrics, df_areas, window_size_frames)
 
     # Left join to plays to get metadata for these plays.
     df_out = df_pocket.merge(
@@ -171,16 +139,33 @@ def get_pocket_shapes_for_area(df_pocket, default_area):
     return pocket_shapes
 
 
-def plot_heatmap(df_pocket_query, area_method, bin_start, bin_end, bin_size):
-    pocket_shapes = get_pocket_shapes_for_area(df_pocket_query, area_method)
-    heatmap, extent = get_heatmap_from_pocket_shapes(
-        pocket_shapes,
+def get_heatmap_from_pocket_grids(
+    df_pocket_grids, bin_start, bin_end, bin_size
+):
+    """
+    Sums the precomputed grids of a set of pockets into a heatmap, which is
+    the same as rasterizing the shapes of those pockets again.
+
+    Parameters:
+    df_pocket_grids: DataFrame returned by get_pocket_grids(), filtered to
+      the pockets to include, such as with filter_pocket_grids().
+    """
+    pocket_keys = ["gameId", "playId", "method"]
+    total = len(df_pocket_grids[pocket_keys].drop_duplicates())
+    df_cells = df_pocket_grids.dropna(subset=["x", "y"])
+    df_counts = df_cells.groupby(["x", "y"]).size().reset_index(name="count")
+    heatmap, extent = heatmap_from_points(
+        df_counts[["x", "y"]].to_numpy(),
+        total,
         bin_start,
         bin_end,
         bin_size,
-        progress=True,
+        weights=df_counts["count"].to_numpy(),
     )
+    return heatmap, extent
+
 
+def show_heatmap(heatmap, extent, bin_start, bin_end):
     fig, ax = plt.subplots(1, 1)
 
     im = ax.imshow(
@@ -203,3 +188,37 @@ def plot_heatmap(df_pocket_query, area_method, bin_start, bin_end, bin_size):
     ax.axvline(0, linestyle="--", color="gray")
     ax.grid(which="both", linestyle="--", color="lightgray")
     fig.set_size_inches(8, 8)
+
+
+def plot_heatmap(df_pocket_query, area_method, bin_start, bin_end, bin_size):
+    pocket_shapes = get_pocket_shapes_for_area(df_pocket_query, area_method)
+    heatmap, extent = get_heatmap_from_pocket_shapes(
+        pocket_shapes,
+        bin_start,
+        bin_end,
+        bin_size,
+        progress=True,
+    )
+    show_heatmap(heatmap, extent, bin_start, bin_end)
+
+
+def plot_heatmap_from_pocket_grids(
+    df_pocket_grids,
+    df_plays,
+    area_method,
+    query=None,
+    bin_start=POCKET_GRID_BIN_START,
+    bin_end=POCKET_GRID_BIN_END,
+    bin_size=POCKET_GRID_BIN_SIZE,
+):
+    """
+    Plots the heatmap of the plays that match a query on plays, such as
+    "possessionTeam == 'KC' and dropBackType == 'TRADITIONAL'", from the
+    pocket grids written by the pipeline, without rasterizing any pockets.
+    """
+    df_query = df_plays if query is None else df_plays.query(query)
+    df_grids = filter_pocket_grids(df_pocket_grids, df_query, area_method)
+    heatmap, extent = get_heatmap_from_pocket_grids(
+        df_grids, bin_start, bin_end, bin_size
+    )
+    show_heatmap(heatmap, extent, bin_start, bin_end)
@@ -1,4 +1,4 @@
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Union
 
 import ipywidgets as widgets
 import pandas as pd
@@ -7,12 +7,13 @@ from IPython.display import HTML, display
 from src.visualization.interactive_pocket_area import (
     create_interactive_pocket_area,
 )
+from src.visualization.play_store import PlayTable, get_play_table
 
 
 def create_interactive_play_selector(
-    df_plays_all: pd.DataFrame,
-    df_tracking_display_all: pd.DataFrame,
-    df_areas_all: pd.DataFrame,
+    df_plays_all: Union[pd.DataFrame, PlayTable],
+    df_tracking_display_all: Union[pd.DataFrame, PlayTable],
+    df_areas_all: Union[pd.DataFrame, PlayTable],
     **kwargs,
 ):
     """
@@ -26,22 +27,44 @@ def create_interactive_play_selector(
         df_areas_all: DataFrame that includes pocket area data by frame
             and by method, for all available plays.
 
+    Each dataset can also be a play table from play_table_from_dataframe(),
+    such as one shared with other visualizations, so that it is not indexed
+    again.
+
     For additional visualization parameters in kwargs, see the docstring of the
     create_interactive_play() function.
     """
 
+    # Index datasets by play once, so that selecting a play does not scan them.
+    plays = get_play_table(df_plays_all)
+    tracking_display = get_play_table(df_tracking_display_all)
+    areas = get_play_table(df_areas_all)
+
+    # Store the games of each week and the plays of each game for the options.
+    df_week_games = tracking_display.df[["week", "gameId"]].drop_duplicates()
+    game_ids_by_week = df_week_games.groupby("week", sort=False)["gameId"]
+    game_options_by_week = game_ids_by_week.unique().to_dict()
+    play_options_by_game: Dict[int, List[int]] = {}
+    for game_id, play_id in tracking_display.get_play_keys():
+        if game_id not in play_options_by_game:
+            play_options_by_game[game_id] = []
+        play_options_by_game[game_id].append(play_id)
+
     def select_play(week: str, game_id: str, play_id: str):
         """Update visualization for the given play."""
+        if game_id is None or play_id is None:
+            display(HTML("<p>No results.</p>"))
+            return
+
         # Filter datasets to the given play.
-        query = f"gameId == {game_id} and playId == {play_id}"
-        df_play_results = df_plays_all.query(query)
+        df_play_results = plays.get_play(game_id, play_id)
         if len(df_play_results) == 0:
             display(HTML("<p>No results.</p>"))
             return
 
         df_play = df_play_results.iloc[0]
-        df_tracking_display = df_tracking_display_all.query(query)
-        df_areas = df_areas_all.query(query)
+        df_tracking_display = tracking_display.get_play(game_id, play_id)
+        df_areas = areas.get_play(game_id, play_id)
 
         # Display the play description and another interactive plot.
         play_description = df_play["playDescription"]
@@ -49,7 +72,7 @@ def create_interactive_play_selector(
         create_interactive_pocket_area(df_tracking_display, df_areas, **kwargs)
 
     # Create week, game, and play dropdowns, that depend on the previous values.
-    week_options = df_tracking_display_all["week"].unique()
+    week_options = list(game_options_by_week.keys())
     week_dropdown = widgets.Dropdown(
         options=week_options, value=week_options[0], description="Week"
     )
@@ -69,9 +92,7 @@ def create_interactive_play_selector(
         if week is None:
             return
 
-        week_query = f"week == {week}"
-        df_week_only = df_tracking_display_all.query(week_query)
-        game_options = df_week_only["gameId"].unique()
+        game_options = game_options_by_week[week]
         game_dropdown.options = game_options
         game_dropdown.value = game_options[0]
 
@@ -84,9 +105,7 @@ def create_interactive_play_selector(
         if game_id is None:
             return
 
-        game_query = f"gameId == {game_id}"
-        df_game_only = df_tracking_display_all.query(game_query)
-        play_options = df_game_only["playId"].unique()
+        play_options = play_options_by_game[game_id]
         play_dropdown.options = play_options
         play_dropdown.value = play_options[0]
 
@@ -1,5 +1,5 @@
 import math
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 
 import ipywidgets as widgets
 import matplotlib.pyplot as plt
@@ -13,10 +13,10 @@ from shapely import Polygon as ShapelyPolygon
 
 from src.metrics.pocket_area.base import InvalidPocketError, PocketArea
 from src.metrics.pocket_area.helpers import pocket_from_json
+from src.visualization.play_store import PlayTable, get_play_table
 from src.visualization.pocket_area import (
     POCKET_KWARGS,
-    PocketAreaNestedMap,
-    get_pocket_area_nested_map,
+    PocketAreaLookup,
     get_pocket_patch,
 )
 
@@ -62,15 +62,20 @@ ROLE_TO_COLOR = {
 }
 
 
-def get_frame_plotter(df_tracking, df_areas):
+def get_frame_plotter(
+    df_tracking: Union[pd.DataFrame, PlayTable],
+    df_areas: Union[pd.DataFrame, PlayTable],
+):
+    # Index tracking and area data by play once, for all plots.
+    tracking = get_play_table(df_tracking)
+    areas = get_play_table(df_areas)
+
     def plot(game_id, play_id, frame_ids):
-        # Get tracking and area data for play.
-        query_play = f"gameId == {game_id} and playId == {play_id}"
-        df_tracking_play = df_tracking.query(query_play)
-        df_areas_play = df_areas.query(query_play)
+        # Get tracking data for play.
+        df_tracking_play = tracking.get_play(game_id, play_id)
 
         def get_patch(frame_id):
-            row = df_areas_play[df_areas_play["frameId"] == frame_id].iloc[0]
+            row = areas.get_frame(game_id, play_id, frame_id).iloc[0]
             pocket = pocket_from_json(row["pocket"])
             patch = get_pocket_patch(pocket)
             area_value = row["area"]
@@ -111,12 +116,19 @@ def get_spotlight_patches(spotlight):
     return [start_patch, end_patch]
 
 
-def get_spotlight_plotter(df_tracking, df_spotlight_search):
+def get_spotlight_plotter(
+    df_tracking: Union[pd.DataFrame, PlayTable],
+    df_spotlight_search: Union[pd.DataFrame, PlayTable],
+):
+    # Index tracking and spotlight data by play once, for all plots.
+    tracking = get_play_table(df_tracking)
+    spotlight_search = get_play_table(df_spotlight_search)
+
     def plot(game_id, play_id):
         # Get tracking and spotlight data for play.
-        query_play = f"gameId == {game_id} and playId == {play_id}"
-        df_tracking_play = df_tracking.query(query_play)
-        spotlight = df_spotlight_search.query(query_play).reset_index().iloc[0]
+        df_tracking_play = tracking.get_play(game_id, play_id)
+        df_spotlight = spotlight_search.get_play(game_id, play_id)
+        spotlight = df_spotlight.reset_index().iloc[0]
 
         # Select start, mid, and end frames.
         frame_start = spotlight["window_start"]
@@ -430,8 +442,8 @@ def get_play_pocket_and_timeline_plotter_multiple(
             objects_per_frame[frame_id] = []
         objects_per_frame[frame_id].append(obj)
 
-    # Parse and store pocket for each frame and method.
-    stored_pockets: PocketAreaNestedMap = get_pocket_area_nested_map(df_areas)
+    # Store pocket for each frame and method, parsed when a frame is rendered.
+    stored_pockets = PocketAreaLookup(df_areas)
 
     # Store the area timeline data for each method.
     area_timeline_by_method: Dict[str, pd.DataFrame] = {}
@@ -467,7 +479,7 @@ def get_play_pocket_and_timeline_plotter_multiple(
 
         # Render pocket, if any.
         pocket_layer = []
-        pocket = stored_pockets.get(frame_id, {}).get(area_method)
+        pocket = stored_pockets.get(frame_id, area_method)
         if pocket:
             # Add pocket area to title.
             area_title = f"Pocket Area = {pocket.area:.1f} sq yds"
@@ -534,8 +546,8 @@ def get_play_pocket_and_timeline_plotter(
             objects_per_frame[frame_id] = []
         objects_per_frame[frame_id].append(obj)
 
-    # Parse and store pocket for each frame and method.
-    stored_pockets: PocketAreaNestedMap = get_pocket_area_nested_map(df_areas)
+    # Store pocket for each frame and method, parsed when a frame is rendered.
+    stored_pockets = PocketAreaLookup(df_areas)
 
     # Store the area timeline data for each method.
     area_timeline_by_method: Dict[str, pd.DataFrame] = {}
@@ -579,7 +591,7 @@ def get_play_pocket_and_timeline_plotter(
 
         # Render pocket, if any.
         pocket_layer = []
-        pocket = stored_pockets.get(frame_id, {}).get(area_method)
+        pocket = stored_pockets.get(frame_id, area_method)
         if pocket:
             # Add pocket area to title.
             area_title = f"Pocket Area = {pocket.area:.1f} sq yds"
@@ -0,0 +1,98 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+PlayKey = Tuple[int, int]
+
+PLAY_KEY_COLUMNS = ["gameId", "playId"]
+
+
+@dataclass
+class PlayTable:
+    """
+    Rows of a table sorted by play and frame, so that the rows of a play are
+    one slice of the table and the rows of a frame are one slice of the play.
+    Lookups do not scan the table, unlike a query on gameId and playId.
+
+    - df: the rows, sorted by gameId, playId, and frameId if the table has
+      frames, keeping the original order of rows with the same keys.
+    - frame_ids: the frameId of each row, or None if the table has no frames.
+    - play_slices: the slice of rows of each (gameId, playId).
+    """
+
+    df: pd.DataFrame
+    frame_ids: Optional[np.ndarray]
+    play_slices: Dict[PlayKey, slice]
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def __contains__(self, play_key: PlayKey) -> bool:
+        game_id, play_id = play_key
+        return (int(game_id), int(play_id)) in self.play_slices
+
+    def get_play_keys(self) -> List[PlayKey]:
+        return list(self.play_slices.keys())
+
+    def get_play(self, game_id: int, play_id: int) -> pd.DataFrame:
+        """Returns the rows of the play, which are empty if there are none."""
+        rows = self.play_slices.get((int(game_id), int(play_id)), slice(0, 0))
+        return self.df.iloc[rows]
+
+    def get_frame(
+        self, game_id: int, play_id: int, frame_id: int
+    ) -> pd.DataFrame:
+        """Returns the rows of one frame of the play, such as all players."""
+        if self.frame_ids is None:
+            raise ValueError("Table does not have a frameId column.")
+        rows = self.play_slices.get((int(game_id), int(play_id)), slice(0, 0))
+        play_frame_ids = self.frame_ids[rows]
+        start = rows.start + np.searchsorted(play_frame_ids, frame_id, "left")
+        end = rows.start + np.searchsorted(play_frame_ids, frame_id, "right")
+        return self.df.iloc[start:end]
+
+
+def play_table_from_dataframe(df: pd.DataFrame) -> PlayTable:
+    """
+    Creates a play table from a DataFrame with gameId and playId columns, and
+    optionally a frameId column.
+    """
+    has_frames = "frameId" in df.columns
+    sort_cols = PLAY_KEY_COLUMNS + (["frameId"] if has_frames else [])
+    # Sorting on several columns is stable, so rows with the same keys, such
+    # as the players of a frame, stay in their original order.
+    df_sorted = df.sort_values(sort_cols)
+
+    # Find the first row of each play.
+    game_ids = df_sorted["gameId"].to_numpy()
+    play_ids = df_sorted["playId"].to_numpy()
+    is_start = np.ones(len(df_sorted), dtype=bool)
+    is_start[1:] = (game_ids[1:] != game_ids[:-1]) | (
+        play_ids[1:] != play_ids[:-1]
+    )
+    starts = np.flatnonzero(is_start)
+    ends = np.append(starts[1:], len(df_sorted))
+    play_slices = {
+        (game_id, play_id): slice(start, end)
+        for game_id, play_id, start, end in zip(
+            game_ids[starts].tolist(),
+            play_ids[starts].tolist(),
+            starts.tolist(),
+            ends.tolist(),
+        )
+    }
+
+    frame_ids = df_sorted["frameId"].to_numpy() if has_frames else None
+    return PlayTable(df=df_sorted, frame_ids=frame_ids, play_slices=play_slices)
+
+
+def get_play_table(data: Union[pd.DataFrame, PlayTable]) -> PlayTable:
+    """
+    Returns the play table of a DataFrame, or the play table itself, so that
+    visualizations can share a play table instead of indexing the same data.
+    """
+    if isinstance(data, PlayTable):
+        return data
+    return play_table_from_dataframe(data)
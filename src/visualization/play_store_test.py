@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+from src.visualization.play_store import (
+    get_play_table,
+    play_table_from_dataframe,
+)
+
+
+def get_tracking():
+    return pd.DataFrame(
+        {
+            "gameId": [2, 1, 1, 1, 1, 2],
+            "playId": [1, 2, 1, 1, 1, 1],
+            "frameId": [1, 1, 2, 1, 1, 2],
+            "nflId": [10, 11, 12, 13, 14, 15],
+        }
+    )
+
+
+def test_play_table_get_play():
+    df = get_tracking()
+    table = play_table_from_dataframe(df)
+
+    actual = table.get_play(1, 1)
+
+    expected = df.query("gameId == 1 and playId == 1").sort_values("frameId")
+    assert actual["nflId"].tolist() == expected["nflId"].tolist()
+    # Rows keep their index, like the rows of a query.
+    assert actual.index.tolist() == [3, 4, 2]
+    assert table.get_play_keys() == [(1, 1), (1, 2), (2, 1)]
+    assert (2, 1) in table
+    assert table.get_play(3, 1).empty
+
+
+def test_play_table_get_frame():
+    table = play_table_from_dataframe(get_tracking())
+
+    # Rows of the same frame stay in their original order.
+    assert table.get_frame(1, 1, 1)["nflId"].tolist() == [13, 14]
+    assert table.get_frame(1, 1, 2)["nflId"].tolist() == [12]
+    assert table.get_frame(2, 1, 2)["nflId"].tolist() == [15]
+    assert table.get_frame(1, 1, 3).empty
+    assert table.get_frame(3, 1, 1).empty
+
+
+def test_play_table_without_frames():
+    df_plays = pd.DataFrame({"gameId": [1, 1], "playId": [2, 1]})
+    table = play_table_from_dataframe(df_plays)
+
+    assert table.get_play(1, 2).index.tolist() == [0]
+    with pytest.raises(ValueError):
+        table.get_frame(1, 2, 1)
+
+
+def test_get_play_table_shares_tables():
+    table = play_table_from_dataframe(get_tracking())
+
+    # A play table is used as is, instead of being indexed again.
+    assert get_play_table(table) is table
+    assert get_play_table(get_tracking()).get_play_keys() == [
+        (1, 1),
+        (1, 2),
+        (2, 1),
+    ]
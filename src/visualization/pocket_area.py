@@ -1,4 +1,5 @@
-from typing import Dict, Optional
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
 
 import ipywidgets as widgets
 import matplotlib.pyplot as plt
@@ -15,17 +16,67 @@ POCKET_KWARGS = dict(
     alpha=0.5,
 )
 
+# Number of decoded pockets to keep in a pocket area lookup, which is enough
+# for every method of every frame of a typical play.
+POCKET_LOOKUP_CACHE_SIZE = 1024
+
 PocketAreaNestedMap = Dict[int, Dict[str, PocketArea]]
 
 
+class PocketAreaLookup:
+    """
+    Pockets by frame and method, which are only parsed from their dictionaries
+    when a frame is rendered. Keeps the pocket column as an array with the row
+    of each (frameId, method), and the most recently parsed pockets.
+    """
+
+    def __init__(
+        self, df_areas: pd.DataFrame, cache_size: int = POCKET_LOOKUP_CACHE_SIZE
+    ):
+        self.pockets = df_areas["pocket"].to_numpy()
+        keys = zip(df_areas["frameId"].tolist(), df_areas["method"].tolist())
+        # If a frame and method appear more than once, the last row wins.
+        self.rows: Dict[Tuple[Hashable, str], int] = {
+            key: i for i, key in enumerate(keys)
+        }
+        self.cache_size = cache_size
+        self.cache: "OrderedDict[int, PocketArea]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, key: Tuple[Hashable, str]) -> bool:
+        return key in self.rows
+
+    def get(self, frame_id: Hashable, method: str) -> Optional[PocketArea]:
+        """Returns the pocket for the frame and method, if any."""
+        i = self.rows.get((frame_id, method))
+        if i is None:
+            return None
+
+        # Mark the pocket as the most recently used, or parse it.
+        if i in self.cache:
+            self.cache.move_to_end(i)
+            return self.cache[i]
+        pocket = pocket_from_json(self.pockets[i])
+        self.cache[i] = pocket
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return pocket
+
+
 def get_pocket_area_nested_map(df_areas: pd.DataFrame) -> PocketAreaNestedMap:
+    """
+    Parses every pocket into a nested map by frame and method. To only parse
+    the pockets of the frames that are rendered, use PocketAreaLookup.
+    """
     output: PocketAreaNestedMap = {}
-    for i, row in df_areas.iterrows():
-        # Retrieve keys from DataFrame.
-        frame_id = row["frameId"]
-        method = row["method"]
-        pocket_dict = row["pocket"]
-
+    rows = zip(
+        df_areas["frameId"].tolist(),
+        df_areas["method"].tolist(),
+        df_areas["pocket"].tolist(),
+    )
+    for frame_id, method, pocket_dict in rows:
         # Parse pocket area dataclass.
         pocket = pocket_from_json(pocket_dict)
 
@@ -3,6 +3,7 @@ from matplotlib.patches import Circle, Polygon
 
 from src.metrics.pocket_area.base import PocketArea, PocketAreaMetadata
 from src.visualization.pocket_area import (
+    PocketAreaLookup,
     get_pocket_area_nested_map,
     get_pocket_patch,
 )
@@ -83,3 +84,35 @@ def test_get_pocket_patch_circle():
     # Patch objects do not support equality, so we test the available properties
     assert type(actual) == type(expected)
     assert actual.radius == expected.radius
+
+
+def test_pocket_area_lookup():
+    df = pd.DataFrame(
+        [
+            {"frameId": 1, "method": "a", "pocket": {"area": 1}},
+            {
+                "frameId": 1,
+                "method": "b",
+                "pocket": {"area": 2, "metadata": {"radius": 1}},
+            },
+            {"frameId": 2, "method": "a", "pocket": {"area": 3}},
+        ]
+    )
+    lookup = PocketAreaLookup(df, cache_size=2)
+
+    assert len(lookup) == 3
+    assert lookup.get(1, "b") == PocketArea(
+        area=2, metadata=PocketAreaMetadata(radius=1)
+    )
+    assert lookup.get(2, "b") is None
+    assert lookup.get(3, "a") is None
+    # Pockets are only parsed when they are retrieved.
+    assert list(lookup.cache.keys()) == [1]
+
+    # The least recently used pocket is evicted.
+    first = lookup.get(1, "a")
+    assert lookup.get(1, "b") is lookup.get(1, "b")
+    lookup.get(2, "a")
+    assert list(lookup.cache.keys()) == [1, 2]
+    assert lookup.get(1, "a") == first
+    assert lookup.get(1, "a") is not first
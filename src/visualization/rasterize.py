@@ -0,0 +1,127 @@
+from typing import Iterator, Sequence, Tuple
+
+import numpy as np
+import shapely
+
+# Number of shapes to rasterize at once, which bounds the number of grid points
+# tested against shapes in memory at a time.
+RASTER_CHUNK_SIZE = 1000
+
+
+def get_sample_centers(bin_start, bin_end, bin_size) -> np.ndarray:
+    """
+    Returns the coordinate of the midpoint of each cell along one axis of the
+    grid, for cells starting at each bin edge from bin_start to bin_end.
+    """
+    bin_edges = np.arange(bin_start, bin_end + bin_size, bin_size)
+    return bin_edges + (bin_size / 2.0)
+
+
+def get_shape_cells(
+    shapes: np.ndarray, centers_x: np.ndarray, centers_y: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the shape index, row, and column of every grid cell whose midpoint
+    is within the bounding box of a shape, for all shapes at once.
+    """
+    min_x, min_y, max_x, max_y = shapely.bounds(shapes).T
+    # Empty shapes have null bounds, which are sorted past the last cell, so
+    # they have no cells.
+    col_start = np.searchsorted(centers_x, min_x, side="left")
+    col_stop = np.searchsorted(centers_x, max_x, side="right")
+    row_start = np.searchsorted(centers_y, min_y, side="left")
+    row_stop = np.searchsorted(centers_y, max_y, side="right")
+    n_cols = np.maximum(col_stop - col_start, 0)
+    n_rows = np.maximum(row_stop - row_start, 0)
+    n_cells = n_cols * n_rows
+
+    shape_indices = np.repeat(np.arange(len(shapes)), n_cells)
+    positions = np.arange(n_cells.sum()) - np.repeat(
+        np.cumsum(n_cells) - n_cells, n_cells
+    )
+    shape_cols = n_cols[shape_indices]
+    rows = row_start[shape_indices] + positions // np.maximum(shape_cols, 1)
+    cols = col_start[shape_indices] + positions % np.maximum(shape_cols, 1)
+    return shape_indices, rows, cols
+
+
+def iter_covered_cells(
+    shapes: np.ndarray,
+    centers_x: np.ndarray,
+    centers_y: np.ndarray,
+    chunk_size: int,
+    progress: bool,
+) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Yields the shape index, row, and column of the cells covered by each
+    chunk of shapes, testing each shape only against the cells within its
+    bounding box, with one vectorized test per chunk.
+    """
+    starts = range(0, len(shapes), chunk_size)
+    # Show progress bar, if requested.
+    if progress:
+        from tqdm.notebook import tqdm
+
+        starts = tqdm(starts)
+    for start in starts:
+        chunk = shapes[start : start + chunk_size]
+        shapely.prepare(chunk)
+        shape_indices, rows, cols = get_shape_cells(chunk, centers_x, centers_y)
+        is_covered = shapely.intersects_xy(
+            chunk[shape_indices], centers_x[cols], centers_y[rows]
+        )
+        yield (
+            start + shape_indices[is_covered],
+            rows[is_covered],
+            cols[is_covered],
+        )
+
+
+def get_covered_cells(
+    shapes: Sequence,
+    centers_x: np.ndarray,
+    centers_y: np.ndarray,
+    chunk_size: int = RASTER_CHUNK_SIZE,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the shape index, row, and column of each grid cell whose midpoint
+    is covered by a shape, including on its border, for every shape, given
+    the sorted midpoints of the cells along each axis.
+    """
+    shapes = np.asarray(shapes, dtype=object)
+    chunks = list(
+        iter_covered_cells(shapes, centers_x, centers_y, chunk_size, False)
+    )
+    if not chunks:
+        empty = np.zeros(0, dtype=int)
+        return empty, empty, empty
+    shape_indices, rows, cols = zip(*chunks)
+    return (
+        np.concatenate(shape_indices),
+        np.concatenate(rows),
+        np.concatenate(cols),
+    )
+
+
+def rasterize_shapes(
+    shapes: Sequence,
+    centers_x: np.ndarray,
+    centers_y: np.ndarray,
+    chunk_size: int = RASTER_CHUNK_SIZE,
+    progress: bool = False,
+) -> np.ndarray:
+    """
+    Counts how many shapes cover the midpoint of each cell of a grid, given
+    the sorted midpoints of the cells along each axis. A midpoint on the
+    border of a shape is covered by it.
+
+    Returns a matrix of counts with a row for each y and a column for each x.
+    """
+    shapes = np.asarray(shapes, dtype=object)
+    coverage = np.zeros(len(centers_y) * len(centers_x), dtype=np.int64)
+    for _, rows, cols in iter_covered_cells(
+        shapes, centers_x, centers_y, chunk_size, progress
+    ):
+        cells = rows * len(centers_x) + cols
+        coverage += np.bincount(cells, minlength=len(coverage))
+    return coverage.reshape(len(centers_y), len(centers_x))
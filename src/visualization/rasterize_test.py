@@ -0,0 +1,52 @@
+import numpy as np
+import shapely
+
+from src.visualization.rasterize import get_sample_centers, rasterize_shapes
+
+
+def test_get_sample_centers():
+    centers = get_sample_centers(-1, 1, 0.5)
+    assert centers.tolist() == [-0.75, -0.25, 0.25, 0.75, 1.25]
+
+
+def test_rasterize_shapes():
+    centers = np.array([0.5, 1.5, 2.5, 3.5])
+    shapes = [
+        shapely.box(0, 0, 2, 1),
+        # Midpoints on the border are covered.
+        shapely.box(1.5, 0.5, 2.5, 1.5),
+        # Triangle that covers the midpoints on and below its diagonal.
+        shapely.Polygon([(0, 0), (4, 0), (4, 4)]),
+        shapely.Polygon(),
+    ]
+
+    actual = rasterize_shapes(shapes, centers, centers)
+
+    expected = np.array(
+        [
+            [2, 3, 2, 1],
+            [0, 2, 2, 1],
+            [0, 0, 1, 1],
+            [0, 0, 0, 1],
+        ]
+    )
+    assert actual.tolist() == expected.tolist()
+
+
+def test_rasterize_shapes_matches_shapely_grid():
+    rng = np.random.default_rng(0)
+    centers_x = get_sample_centers(-10, 10, 0.5)
+    centers_y = get_sample_centers(-12, 4, 0.5)
+    shapes = [
+        shapely.convex_hull(shapely.multipoints(rng.uniform(-12, 6, (6, 2))))
+        for _ in range(20)
+    ]
+
+    actual = rasterize_shapes(shapes, centers_x, centers_y, chunk_size=7)
+
+    grid_x, grid_y = np.meshgrid(centers_x, centers_y)
+    expected = sum(
+        shapely.intersects_xy(shape, grid_x, grid_y).astype(int)
+        for shape in shapes
+    )
+    assert actual.tolist() == expected.tolist()